@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CertificationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'certifications'
+
+    def ready(self):
+        # Import des signaux
+        import certifications.signals
@@ -0,0 +1,83 @@
+"""
+Codes de certificat signés (HMAC).
+
+Un code encode l'apprenant, le cours, le niveau et la date de délivrance,
+suivis d'une signature HMAC tronquée. Il peut donc être validé par quiconque
+détient la clé, sans accès à la base de données. Le code est encodé en
+base32 (majuscules et chiffres) pour rester compact dans un QR code.
+"""
+import base64
+import binascii
+import datetime
+import hmac
+import struct
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+
+CODE_VERSION = 1
+SIGNATURE_LENGTH = 10
+EPOCH = datetime.date(2000, 1, 1)
+LEVELS = ('beginner', 'intermediate', 'advanced')
+
+# version, user_id, course_id, index du niveau, jours depuis EPOCH
+_PAYLOAD = struct.Struct('>BIIBH')
+_SALT = 'certifications.codes'
+
+
+@dataclass(frozen=True)
+class CertificateClaim:
+    user_id: int
+    course_id: int
+    level: str
+    issued_on: datetime.date
+
+
+def _signing_key() -> str:
+    return getattr(settings, 'CERTIFICATE_SIGNING_KEY', None) or settings.SECRET_KEY
+
+
+def _sign(payload: bytes) -> bytes:
+    return salted_hmac(_SALT, payload, secret=_signing_key(), algorithm='sha256').digest()[:SIGNATURE_LENGTH]
+
+
+def make_code(user_id: int, course_id: int, level: str, issued_on: datetime.date) -> str:
+    payload = _PAYLOAD.pack(
+        CODE_VERSION, user_id, course_id, LEVELS.index(level), (issued_on - EPOCH).days
+    )
+    return base64.b32encode(payload + _sign(payload)).decode('ascii').rstrip('=')
+
+
+def parse_code(code: str):
+    """
+    Valide la signature d'un code et retourne ses informations, ou ``None``
+    si le code est mal formé ou falsifié. Aucun accès à la base.
+    """
+    if not code:
+        return None
+    code = code.strip().upper()
+    try:
+        raw = base64.b32decode(code + '=' * (-len(code) % 8))
+    except (binascii.Error, ValueError):
+        return None
+    # Refuse les encodages non canoniques (bits de remplissage modifiés)
+    if len(raw) != _PAYLOAD.size + SIGNATURE_LENGTH or base64.b32encode(raw).decode('ascii').rstrip('=') != code:
+        return None
+    payload, signature = raw[:_PAYLOAD.size], raw[_PAYLOAD.size:]
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    version, user_id, course_id, level_index, days = _PAYLOAD.unpack(payload)
+    if version != CODE_VERSION or level_index >= len(LEVELS):
+        return None
+    return CertificateClaim(
+        user_id=user_id,
+        course_id=course_id,
+        level=LEVELS[level_index],
+        issued_on=EPOCH + datetime.timedelta(days=days),
+    )
+
+
+def is_legacy_code(code: str) -> bool:
+    """Les anciens certificats utilisent un uuid4 hexadécimal non signé."""
+    return len(code) == 32 and all(ch in '0123456789abcdef' for ch in code)
@@ -0,0 +1,62 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from certifications.models import Certification
+
+
+def _init_worker():
+    # Chaque processus ouvre ses propres connexions à la base
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crvslearning.settings')
+    django.setup()
+    connections.close_all()
+
+
+def _render(cert_id):
+    from certifications.tasks import render_certificate_now
+    try:
+        render_certificate_now(cert_id)
+        return cert_id, None
+    except Exception as exc:
+        return cert_id, str(exc)
+
+
+class Command(BaseCommand):
+    help = "Re-render certificate PDFs in parallel using a process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--course', type=int, help="Only certificates for this course id")
+        parser.add_argument('--level', help="Only certificates for this level")
+        parser.add_argument('--missing', action='store_true', help="Only certificates without a ready PDF")
+
+    def handle(self, *args, **options):
+        qs = Certification.objects.filter(is_valid=True)
+        if options['course']:
+            qs = qs.filter(course_id=options['course'])
+        if options['level']:
+            qs = qs.filter(level=options['level'])
+        if options['missing']:
+            qs = qs.exclude(render_status='ready')
+        cert_ids = list(qs.order_by('id').values_list('id', flat=True))
+        if not cert_ids:
+            self.stdout.write("No certificate to render.")
+            return
+
+        # Ne pas partager la connexion du parent avec les processus enfants
+        connections.close_all()
+
+        failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            futures = [pool.submit(_render, cert_id) for cert_id in cert_ids]
+            for future in as_completed(futures):
+                cert_id, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f"Certificate {cert_id}: {error}")
+
+        rendered = len(cert_ids) - failed
+        self.stdout.write(self.style.SUCCESS(f"{rendered} certificate(s) rendered, {failed} failed."))
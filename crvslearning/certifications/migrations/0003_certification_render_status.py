@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:43
+
+from django.db import migrations, models
+
+
+def mark_existing_ready(apps, schema_editor):
+    Certification = apps.get_model('certifications', 'Certification')
+    Certification.objects.exclude(pdf='').exclude(pdf__isnull=True).update(render_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certifications', '0002_alter_certification_pdf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certification',
+            name='render_status',
+            field=models.CharField(choices=[('pending', 'En attente'), ('rendering', 'En cours'), ('ready', 'Prêt'), ('failed', 'Échec')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_ready, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,9 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from courses.models import Course
-import uuid
+
+from .codes import make_code
 
 
 class Certification(models.Model):
@@ -11,6 +13,13 @@ class Certification(models.Model):
         ('advanced', 'Avancé'),
     ]
 
+    RENDER_STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('rendering', 'En cours'),
+        ('ready', 'Prêt'),
+        ('failed', 'Échec'),
+    ]
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='certifications')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='certifications')
     level = models.CharField(max_length=20, choices=LEVEL_CHOICES)
@@ -18,14 +27,15 @@ class Certification(models.Model):
     pdf = models.FileField(upload_to='certificates/', blank=True, null=True)
     issued_at = models.DateTimeField(auto_now_add=True)
     is_valid = models.BooleanField(default=True)
+    render_status = models.CharField(max_length=20, choices=RENDER_STATUS_CHOICES, default='pending')
 
     class Meta:
         unique_together = ('user', 'course', 'level')
 
     def save(self, *args, **kwargs):
         if not self.code:
-            # generate a compact unique code
-            self.code = uuid.uuid4().hex
+            # code compact signé, vérifiable sans accès à la base
+            self.code = make_code(self.user_id, self.course_id, self.level, timezone.localdate())
         return super().save(*args, **kwargs)
 
     def __str__(self):
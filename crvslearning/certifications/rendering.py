@@ -0,0 +1,191 @@
+"""
+Rendu PDF des certificats.
+
+Les éléments statiques (maillage de fond et logo) sont préparés une seule
+fois par processus : le logo est localisé et décodé une fois, le maillage
+est précalculé et dessiné en un seul appel dans un formulaire PDF (XObject)
+réutilisable. Le QR code est généré en mémoire, sans fichier temporaire.
+"""
+import io
+import os
+from functools import lru_cache
+
+import qrcode
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+PAGE_SIZE = landscape(A4)
+MARGIN = 36
+BACKGROUND_FORM = "certificate_background"
+
+
+def site_base_url() -> str:
+    verify_host = settings.ALLOWED_HOSTS[0] if getattr(settings, 'ALLOWED_HOSTS', []) else 'localhost'
+    scheme = 'http' if settings.DEBUG else 'https'
+    return f"{scheme}://{verify_host}"
+
+
+def certificate_relative_path(cert) -> str:
+    return f"certificates/{cert.code}.pdf"
+
+
+def qr_target_url(cert) -> str:
+    """Le QR code pointe vers la page de vérification du code signé."""
+    return f"{site_base_url()}{reverse('certifications:verify', args=[cert.code])}"
+
+
+@lru_cache(maxsize=1)
+def _logo_reader():
+    """Localise et décode le logo une seule fois par processus."""
+    candidate_paths = []
+    static_root = getattr(settings, 'STATIC_ROOT', '')
+    if static_root:
+        candidate_paths.append(os.path.join(static_root, 'img', 'logo.png'))
+    for p in getattr(settings, 'STATICFILES_DIRS', []):
+        candidate_paths.append(os.path.join(p, 'img', 'logo.png'))
+    for p in candidate_paths:
+        if os.path.exists(p):
+            try:
+                return ImageReader(p)
+            except Exception:
+                return None
+    return None
+
+
+@lru_cache(maxsize=1)
+def _background_segments(width: float, height: float) -> tuple:
+    """Segments du maillage diagonal, calculés une seule fois."""
+    segments = []
+    for x in range(0, int(width) + 200, 120):
+        segments.append((x - 200, MARGIN, x, height - MARGIN))
+    for x in range(0, int(width) + 200, 120):
+        segments.append((x - 200, height - MARGIN, x, MARGIN))
+    return tuple(segments)
+
+
+def _draw_static_layer(c, width: float, height: float) -> None:
+    """Dessine le fond et le logo dans un formulaire PDF puis l'applique."""
+    c.beginForm(BACKGROUND_FORM)
+    c.setStrokeColorRGB(0.8, 0.8, 0.8)
+    c.setLineWidth(0.5)
+    c.lines(_background_segments(width, height))
+
+    logo = _logo_reader()
+    if logo is not None:
+        try:
+            c.drawImage(logo, MARGIN, height - 90, width=140, height=40, preserveAspectRatio=True, mask='auto')
+        except Exception:
+            logo = None
+    if logo is None:
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica-Bold", 16)
+        c.drawString(MARGIN, height - 70, "CRVS TRAININGS")
+    c.endForm()
+    c.doForm(BACKGROUND_FORM)
+
+
+def _qr_reader(target: str) -> ImageReader:
+    buffer = io.BytesIO()
+    qrcode.make(target).save(buffer)
+    buffer.seek(0)
+    return ImageReader(buffer)
+
+
+def render_certificate(cert, module_title=None) -> bytes:
+    """Retourne le PDF du certificat sous forme d'octets."""
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=PAGE_SIZE)
+    width, height = PAGE_SIZE
+    c.setTitle("Certification")
+
+    _draw_static_layer(c, width, height)
+
+    # Title block centered
+    center_x = width / 2
+    y = height - 140
+    c.setFont("Helvetica", 12)
+    c.setFillColor(colors.black)
+    c.drawCentredString(center_x, y, "Civil Status Registration Office (BUNEC) certifies that")
+
+    # Recipient name
+    y -= 34
+    recipient = (cert.user.get_full_name() or cert.user.username).upper()
+    c.setFont("Helvetica-Bold", 28)
+    c.drawCentredString(center_x, y, recipient)
+
+    # Lead-in line
+    y -= 28
+    c.setFont("Helvetica", 12)
+    c.drawCentredString(center_x, y, "has successfully completed all program requirements and is certified as a")
+
+    # Certificate title (red)
+    y -= 36
+    c.setFont("Helvetica-Bold", 24)
+    c.setFillColor(colors.HexColor('#dc2626'))  # red-600
+    c.drawCentredString(center_x, y, f"CRVS {cert.course.title} EXPERT")
+
+    # Subtitles (level + module)
+    c.setFillColor(colors.black)
+    y -= 24
+    c.setFont("Helvetica", 12)
+    c.drawCentredString(center_x, y, f"Level: {cert.get_level_display()}")
+    if module_title:
+        y -= 18
+        c.drawCentredString(center_x, y, f"Module: {module_title}")
+
+    # Signature area bottom-left
+    sig_y = 90
+    c.setFont("Helvetica", 11)
+    c.drawString(MARGIN, sig_y + 28, "Alexandre M. YOMO")
+    c.setFont("Helvetica-Oblique", 10)
+    c.drawString(MARGIN, sig_y + 14, "General Manager, BUNEC")
+    c.setLineWidth(1)
+    c.line(MARGIN, sig_y + 8, MARGIN + 220, sig_y + 8)
+
+    # Seal bottom-right in grey box, with the QR code
+    seal_w, seal_h = 70, 80
+    seal_x, seal_y = width - MARGIN - seal_w, 60
+    c.setFillColor(colors.HexColor('#f3f4f6'))
+    c.roundRect(seal_x, seal_y, seal_w, seal_h, 10, fill=True, stroke=0)
+    c.setFillColor(colors.black)
+    try:
+        c.drawImage(_qr_reader(qr_target_url(cert)), seal_x + seal_w - 64, seal_y + 6, width=65, height=65, preserveAspectRatio=True, mask='auto')
+    except Exception:
+        pass
+
+    # Footer meta: date and certificate number
+    issued_at = timezone.localtime(cert.issued_at) if cert.issued_at else timezone.now()
+    c.setFont("Helvetica", 10)
+    footer_text = f"Date of Issue: {issued_at.strftime('%B %d, %Y')} — Certificate Number: {cert.code}"
+    c.drawCentredString(center_x, 36, footer_text)
+
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def write_certificate(cert) -> str:
+    """
+    Génère le PDF du certificat dans ``MEDIA_ROOT`` et retourne son chemin
+    relatif. Le fichier est écrit de façon atomique.
+    """
+    module_title = (
+        cert.course.modules.filter(level=cert.level)
+        .values_list('title', flat=True)
+        .first()
+    )
+    data = render_certificate(cert, module_title=module_title)
+
+    rel_path = certificate_relative_path(cert)
+    pdf_path = os.path.join(getattr(settings, 'MEDIA_ROOT', '.'), rel_path)
+    os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+    tmp_path = f"{pdf_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as fh:
+        fh.write(data)
+    os.replace(tmp_path, pdf_path)
+    return rel_path
@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Certification
+from .verification import invalidate_verification
+
+
+@receiver([post_save, post_delete], sender=Certification)
+def invalidate_verification_on_change(sender, instance, **kwargs):
+    """
+    Supprime la vérification en cache lorsqu'un certificat est modifié ou révoqué
+    """
+    if instance.code:
+        code = instance.code
+        transaction.on_commit(lambda: invalidate_verification(code))
@@ -0,0 +1,43 @@
+import logging
+
+from celery import shared_task
+from django.db import transaction
+
+from .models import Certification
+from .rendering import write_certificate
+from .verification import invalidate_verification
+
+logger = logging.getLogger(__name__)
+
+
+def render_certificate_now(cert_id: int) -> str:
+    """Rend le PDF d'un certificat et met à jour son statut."""
+    cert = Certification.objects.select_related('user', 'course').get(pk=cert_id)
+    Certification.objects.filter(pk=cert_id).update(render_status='rendering')
+    try:
+        rel_path = write_certificate(cert)
+    except Exception:
+        Certification.objects.filter(pk=cert_id).update(render_status='failed')
+        raise
+    Certification.objects.filter(pk=cert_id).update(pdf=rel_path, render_status='ready')
+    invalidate_verification(cert.code)
+    return rel_path
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def render_certificate_pdf(self, cert_id: int):
+    try:
+        return render_certificate_now(cert_id)
+    except Certification.DoesNotExist:
+        logger.warning("Certificat %s introuvable, rendu ignoré", cert_id)
+    except Exception as exc:
+        logger.exception("Échec du rendu du certificat %s", cert_id)
+        raise self.retry(exc=exc)
+
+
+def enqueue_certificate_render(cert: Certification) -> None:
+    """Planifie le rendu du certificat après validation de la transaction."""
+    if cert.render_status != 'pending':
+        Certification.objects.filter(pk=cert.pk).update(render_status='pending')
+        cert.render_status = 'pending'
+    transaction.on_commit(lambda: render_certificate_pdf.delay(cert.pk))
@@ -1,3 +1,89 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from courses.models import Course
+from .codes import parse_code
+from .models import Certification
+from .rendering import render_certificate
+from .tasks import enqueue_certificate_render
+from .verification import get_verification
+
+
+class CertificateRenderingTestCase(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create(username='learner', first_name='Ada', last_name='Lovelace')
+        self.user.set_password('pass')
+        self.user.save()
+        trainer = User.objects.create(username='trainer', role='trainer')
+        course = Course.objects.create(title='Etat civil', description='d', created_by=trainer)
+        self.cert = Certification.objects.create(user=self.user, course=course, level='beginner')
+
+    def test_render_certificate_returns_pdf(self):
+        data = render_certificate(self.cert)
+        self.assertTrue(data.startswith(b'%PDF'))
+
+    def test_render_in_background_and_poll_status(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            self.assertEqual(self.cert.render_status, 'pending')
+            with self.captureOnCommitCallbacks(execute=True):
+                enqueue_certificate_render(self.cert)
+            self.cert.refresh_from_db()
+            self.assertEqual(self.cert.render_status, 'ready')
+            self.assertTrue(os.path.exists(os.path.join(media_root, self.cert.pdf.name)))
+
+            self.client.login(username='learner', password='pass')
+            response = self.client.get(reverse('certifications:render_status', args=[self.cert.pk]))
+            self.assertEqual(response.json()['status'], 'ready')
+            self.assertTrue(response.json()['pdf_url'].endswith(f'{self.cert.code}.pdf'))
+
+
+class CertificateCodeTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create(username='learner')
+        trainer = User.objects.create(username='trainer', role='trainer')
+        self.course = Course.objects.create(title='Etat civil', description='d', created_by=trainer)
+        self.cert = Certification.objects.create(user=self.user, course=self.course, level='intermediate')
+
+    def test_code_is_signed_and_decodable(self):
+        claim = parse_code(self.cert.code)
+        self.assertEqual(claim.user_id, self.user.id)
+        self.assertEqual(claim.course_id, self.course.id)
+        self.assertEqual(claim.level, 'intermediate')
+        self.assertEqual(claim.issued_on, timezone.localdate())
+
+    def test_tampered_code_rejected_without_query(self):
+        code = self.cert.code
+        tampered = code[:10] + ('A' if code[10] != 'A' else 'B') + code[11:]
+        with self.assertNumQueries(0):
+            result = get_verification(tampered)
+        self.assertEqual(result['reason'], 'invalid_signature')
+
+    def test_verification_cached_until_revocation(self):
+        self.assertTrue(get_verification(self.cert.code)['valid'])
+        with self.assertNumQueries(0):
+            self.assertTrue(get_verification(self.cert.code)['valid'])
+        self.cert.is_valid = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cert.save()
+        self.assertEqual(get_verification(self.cert.code)['reason'], 'revoked')
+
+    def test_verify_batch(self):
+        response = self.client.post(
+            reverse('certifications:verify_batch'),
+            data=json.dumps({'codes': [self.cert.code, 'NOTACODE']}),
+            content_type='application/json',
+        )
+        results = response.json()['results']
+        self.assertEqual([r['valid'] for r in results], [True, False])
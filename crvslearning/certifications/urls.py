@@ -5,5 +5,7 @@ app_name = 'certifications'
 
 urlpatterns = [
     path('verify/<str:code>/', views.verify, name='verify'),
+    path('verify-batch/', views.verify_batch, name='verify_batch'),
     path('achievements/', views.achievements, name='achievements'),
+    path('<int:pk>/status/', views.render_status, name='render_status'),
 ]
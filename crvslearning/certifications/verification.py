@@ -0,0 +1,92 @@
+"""
+Vérification des certificats avec mise en cache.
+
+Le résultat de vérification d'un code est conservé en cache sans expiration
+et supprimé par les signaux dès que le certificat est modifié, révoqué ou
+supprimé. Les codes dont la signature est invalide sont rejetés sans
+interroger la base.
+"""
+from django.core.cache import cache
+
+from .codes import is_legacy_code, parse_code
+from .models import Certification
+
+VERIFICATION_CACHE_KEY = "certifications:verify:{code}"
+MAX_BATCH_SIZE = 500
+NOT_FOUND_TIMEOUT = 60 * 60
+
+
+def normalize_code(code: str) -> str:
+    code = (code or '').strip()
+    return code if is_legacy_code(code) else code.upper()
+
+
+def _cache_key(code: str) -> str:
+    return VERIFICATION_CACHE_KEY.format(code=code)
+
+
+def _unknown(code: str, reason: str) -> dict:
+    return {'code': code, 'valid': False, 'reason': reason}
+
+
+def _serialize(cert: Certification) -> dict:
+    if not cert.is_valid:
+        return _unknown(cert.code, 'revoked')
+    return {
+        'code': cert.code,
+        'valid': True,
+        'recipient': cert.user.get_full_name() or cert.user.username,
+        'course': cert.course.title,
+        'level': cert.level,
+        'level_display': cert.get_level_display(),
+        'issued_on': cert.issued_at.date().isoformat() if cert.issued_at else None,
+        'pdf_url': cert.pdf.url if cert.pdf and cert.render_status == 'ready' else None,
+    }
+
+
+def get_verifications(codes) -> dict:
+    """
+    Vérifie un lot de codes : lecture groupée du cache, puis une seule requête
+    pour les codes absents du cache. Retourne ``{code: résultat}`` dans l'ordre
+    des codes reçus.
+    """
+    order = list(dict.fromkeys(normalize_code(raw) for raw in codes))
+    results = {}
+    candidates = []
+    for code in order:
+        if parse_code(code) is None and not is_legacy_code(code):
+            results[code] = _unknown(code, 'invalid_signature')
+        else:
+            candidates.append(code)
+
+    if candidates:
+        cached = cache.get_many([_cache_key(code) for code in candidates])
+        missing = []
+        for code in candidates:
+            hit = cached.get(_cache_key(code))
+            if hit is None:
+                missing.append(code)
+            else:
+                results[code] = hit
+
+        if missing:
+            found = {
+                cert.code: _serialize(cert)
+                for cert in Certification.objects.filter(code__in=missing).select_related('user', 'course')
+            }
+            not_found = {code: _unknown(code, 'not_found') for code in missing if code not in found}
+            cache.set_many({_cache_key(code): result for code, result in found.items()}, None)
+            cache.set_many({_cache_key(code): result for code, result in not_found.items()}, NOT_FOUND_TIMEOUT)
+            results.update(found)
+            results.update(not_found)
+
+    return {code: results[code] for code in order}
+
+
+def get_verification(code: str) -> dict:
+    code = normalize_code(code)
+    return get_verifications([code])[code]
+
+
+def invalidate_verification(code: str) -> None:
+    cache.delete(_cache_key(normalize_code(code)))
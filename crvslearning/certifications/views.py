@@ -1,18 +1,45 @@
+import json
+
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpRequest, HttpResponse
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
 from django.db.models import Prefetch
 from .models import Certification
+from .verification import MAX_BATCH_SIZE, get_verification, get_verifications
 from courses.models import Course
 
 
 def verify(request: HttpRequest, code: str) -> HttpResponse:
-    cert = get_object_or_404(Certification, code=code)
+    verification = get_verification(code)
+    if verification.get('reason') in ('invalid_signature', 'not_found'):
+        raise Http404("Certificat introuvable")
     return render(request, 'certifications/verify.html', {
-        'cert': cert,
+        'verification': verification,
     })
 
 
+@csrf_exempt
+@require_POST
+def verify_batch(request: HttpRequest) -> JsonResponse:
+    """
+    Vérification groupée pour les employeurs.
+    Corps JSON attendu : {"codes": ["...", "..."]}
+    """
+    try:
+        codes = json.loads(request.body or b'{}').get('codes')
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'JSON invalide'}, status=400)
+    if not isinstance(codes, list) or not all(isinstance(c, str) for c in codes):
+        return JsonResponse({'error': 'Le champ "codes" doit être une liste de chaînes'}, status=400)
+    if len(codes) > MAX_BATCH_SIZE:
+        return JsonResponse({'error': f'Maximum {MAX_BATCH_SIZE} codes par requête'}, status=400)
+
+    results = get_verifications(codes)
+    return JsonResponse({'results': list(results.values())})
+
+
 @login_required
 def achievements(request: HttpRequest) -> HttpResponse:
     """Affiche la page des réalisations avec les badges de certification de l'utilisateur."""
@@ -24,3 +51,16 @@ def achievements(request: HttpRequest) -> HttpResponse:
     return render(request, 'certifications/achievements.html', {
         'certifications': certifications,
     })
+
+
+@login_required
+def render_status(request: HttpRequest, pk: int) -> JsonResponse:
+    """Statut du rendu PDF d'un certificat, interrogé par la page des réalisations."""
+    cert = get_object_or_404(
+        Certification.objects.only('id', 'user_id', 'pdf', 'render_status'),
+        pk=pk, user=request.user
+    )
+    return JsonResponse({
+        'status': cert.render_status,
+        'pdf_url': cert.pdf.url if cert.render_status == 'ready' and cert.pdf else None,
+    })
@@ -1,8 +1,8 @@
 from django.contrib import admin
 
-from .models import Classroom, ClassroomMembership, LiveSession
+from core.admin_lists import ScalableAdminMixin
 
-from .models import Classroom, ClassroomMembership, LiveSession
+from .models import Classroom, ClassroomMembership, ClassroomMessage, LiveSession
 
 @admin.register(Classroom)
 class ClassroomAdmin(admin.ModelAdmin):
@@ -22,4 +22,9 @@ class LiveSessionAdmin(admin.ModelAdmin):
     list_filter = ("start_at",)
     search_fields = ("title", "classroom__name")
 
-
+@admin.register(ClassroomMessage)
+class ClassroomMessageAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ("classroom", "user", "created_at")
+    list_filter = ("created_at",)
+    search_fields = ("classroom__name", "user__username", "text")
+    list_select_related = ("classroom", "user")
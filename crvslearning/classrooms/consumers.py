@@ -2,14 +2,16 @@ import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.contrib.auth.models import AnonymousUser
 from channels.db import database_sync_to_async
+from django.utils import timezone
 
-from .models import Classroom, ClassroomMembership
+from . import history, roster
+from .models import Classroom, ClassroomMembership, ClassroomMessage
 
 
 class ClassroomChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.classroom_id = self.scope['url_route']['kwargs'].get('classroom_id')
-        self.room_group_name = f'classroom_{self.classroom_id}'
+        self.room_group_name = roster.group_name(self.classroom_id)
 
         user = self.scope.get('user') or AnonymousUser()
         is_allowed = await self._user_allowed(user, self.classroom_id)
@@ -19,16 +21,19 @@ class ClassroomChatConsumer(AsyncWebsocketConsumer):
 
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
         await self.accept()
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'chat.message',
-                'message': json.dumps({'system': True, 'text': f"{user.username} a rejoint la discussion."})
-            }
-        )
+        self.user = user
+        # Rejoue l'historique récent (cache partagé ou base)
+        for payload in await history.replay(self.classroom_id):
+            await self.send(text_data=json.dumps({**payload, 'history': True}))
+        await roster.broadcaster.join(self.classroom_id, user, self.channel_name)
+        await self.send(text_data=json.dumps({
+            'roster': {'full': True, 'online': await roster.snapshot(self.classroom_id)}
+        }))
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        if getattr(self, 'user', None) is not None:
+            await roster.broadcaster.leave(self.classroom_id, self.user, self.channel_name)
 
     async def receive(self, text_data=None, bytes_data=None):
         user = self.scope.get('user')
@@ -39,15 +44,27 @@ class ClassroomChatConsumer(AsyncWebsocketConsumer):
             text = ''
         if not text:
             return
+        # Enregistré avant la diffusion : aucun message diffusé n'est perdu
+        message = await ClassroomMessage.objects.acreate(
+            classroom_id=self.classroom_id,
+            user_id=user.id,
+            text=text,
+            created_at=timezone.now(),
+        )
+        data = history.serialize(message, user.username)
+        await history.append(self.classroom_id, data)
         payload = {
             'type': 'chat.message',
-            'message': json.dumps({'user': user.username, 'text': text})
+            'message': json.dumps(data)
         }
         await self.channel_layer.group_send(self.room_group_name, payload)
 
     async def chat_message(self, event):
         await self.send(text_data=event['message'])
 
+    async def roster_update(self, event):
+        await self.send(text_data=json.dumps({'roster': event['update']}))
+
     @database_sync_to_async
     def _user_allowed(self, user, classroom_id):
         try:
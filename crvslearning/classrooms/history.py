@@ -0,0 +1,109 @@
+"""
+Historique du chat des classes.
+
+Chaque message est enregistré en base avant d'être diffusé : un message
+reçu par les participants n'est jamais perdu, même si le processus est tué.
+
+Avec un cache partagé (Redis), les messages récents de chaque classe sont
+aussi conservés dans un anneau borné en cache (``HISTORY_SIZE`` emplacements
+indexés par un numéro de séquence), rejoué aux nouvelles connexions sans
+requête en base. Sans Redis, le cache est propre à chaque processus et
+l'anneau ne contiendrait que les messages passés par ce processus : les
+nouvelles connexions relisent alors les derniers messages en base.
+"""
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ClassroomMessage
+
+HISTORY_SIZE = 50
+HISTORY_TTL = 7 * 24 * 60 * 60
+
+SEQ_KEY = "classroom:history:{classroom_id}:seq"
+SLOT_KEY = "classroom:history:{classroom_id}:{slot}"
+
+
+def _shared_cache() -> bool:
+    return bool(getattr(settings, 'REDIS_URL', None))
+
+
+def serialize(message: ClassroomMessage, username: str) -> dict:
+    return {
+        'user': username,
+        'text': message.text,
+        'timestamp': message.created_at.isoformat(),
+    }
+
+
+async def append(classroom_id: int, payload: dict) -> None:
+    """Ajoute un message à l'anneau de la classe (cache partagé uniquement)."""
+    if not _shared_cache():
+        return
+    seq_key = SEQ_KEY.format(classroom_id=classroom_id)
+    await cache.aadd(seq_key, 0, HISTORY_TTL)
+    try:
+        seq = await cache.aincr(seq_key)
+    except ValueError:
+        # Clé expirée entre les deux appels
+        await cache.aset(seq_key, 1, HISTORY_TTL)
+        seq = 1
+    await cache.aset(
+        SLOT_KEY.format(classroom_id=classroom_id, slot=seq % HISTORY_SIZE),
+        (seq, payload),
+        HISTORY_TTL,
+    )
+
+
+async def recent(classroom_id: int):
+    """
+    Retourne les derniers messages de la classe (du plus ancien au plus
+    récent), ou ``None`` si l'anneau n'existe pas encore en cache.
+    """
+    seq = await cache.aget(SEQ_KEY.format(classroom_id=classroom_id))
+    if seq is None:
+        return None
+    first = max(seq - HISTORY_SIZE + 1, 1)
+    keys = [
+        SLOT_KEY.format(classroom_id=classroom_id, slot=s % HISTORY_SIZE)
+        for s in range(first, seq + 1)
+    ]
+    entries = (await cache.aget_many(keys)).values()
+    # Un emplacement peut contenir un message plus ancien si une écriture
+    # concurrente n'est pas encore arrivée
+    return [payload for s, payload in sorted(entries, key=lambda e: e[0]) if s >= first]
+
+
+@database_sync_to_async
+def _load_recent(classroom_id: int) -> list:
+    messages = (
+        ClassroomMessage.objects.filter(classroom_id=classroom_id)
+        .select_related('user')
+        .order_by('-created_at')[:HISTORY_SIZE]
+    )
+    return [serialize(m, m.user.username) for m in reversed(messages)]
+
+
+async def replay(classroom_id: int) -> list:
+    """
+    Messages à rejouer à une nouvelle connexion. L'anneau est reconstruit
+    depuis la base uniquement s'il est absent du cache.
+    """
+    if not _shared_cache():
+        return await _load_recent(classroom_id)
+    messages = await recent(classroom_id)
+    if messages is not None:
+        return messages
+
+    messages = await _load_recent(classroom_id)
+    await cache.aset_many(
+        {
+            SLOT_KEY.format(classroom_id=classroom_id, slot=seq % HISTORY_SIZE): (seq, payload)
+            for seq, payload in enumerate(messages, start=1)
+        },
+        HISTORY_TTL,
+    )
+    # Si un message a été ajouté entre-temps, l'anneau existe déjà
+    await cache.aadd(SEQ_KEY.format(classroom_id=classroom_id), len(messages), HISTORY_TTL)
+    return messages
+
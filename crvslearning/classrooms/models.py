@@ -53,3 +53,19 @@ class LiveSession(models.Model):
 
     def __str__(self):
         return f"{self.title} @ {self.start_at:%Y-%m-%d %H:%M}"
+
+
+class ClassroomMessage(models.Model):
+    classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='messages')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='classroom_messages')
+    text = models.TextField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['classroom', '-created_at'], name='classroom_msg_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} @ {self.classroom}: {self.text[:30]}"
@@ -0,0 +1,226 @@
+"""
+Liste des participants connectés au chat d'une classe.
+
+Un utilisateur est présent tant qu'il lui reste au moins une connexion.
+Sans Redis, ses connexions sont les canaux de son groupe de présence
+(``classroom_<id>.user_<id>``) sur le hub de ``core.channel_layers`` :
+le décompte vaut pour tous les processus et les canaux d'un processus
+arrêté disparaissent avec sa connexion au hub. Avec Redis, le nombre de
+connexions est tenu dans le cache partagé ; chaque processus prolonge
+toutes les ``HEARTBEAT_INTERVAL`` secondes les compteurs de ses
+connexions, si bien qu'un processus arrêté laisse au plus
+``CONNECTIONS_TTL`` secondes de présence fantôme.
+
+Les arrivées et départs ne sont pas diffusés un par un : chaque processus
+les regroupe et envoie au plus une mise à jour par classe et par
+``ROSTER_INTERVAL``, avec l'état courant des seuls utilisateurs dont la
+présence diffère de celle du dernier envoi. Une reconnexion rapide (départ
+puis retour dans l'intervalle) ne produit donc aucune mise à jour.
+"""
+import asyncio
+import logging
+from collections import Counter, defaultdict
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Classroom, ClassroomMembership
+
+logger = logging.getLogger(__name__)
+
+ROSTER_INTERVAL = 2.0
+MEMBERS_TTL = 5 * 60
+HEARTBEAT_INTERVAL = 30
+# Borne la durée de vie d'un compteur laissé par un processus arrêté
+CONNECTIONS_TTL = 3 * HEARTBEAT_INTERVAL
+
+MEMBERS_KEY = "classroom:members:{classroom_id}"
+CONNECTIONS_KEY = "classroom:roster:{classroom_id}:{user_id}"
+
+
+def group_name(classroom_id) -> str:
+    return f'classroom_{classroom_id}'
+
+
+def _presence_group(classroom_id, user_id) -> str:
+    return f'{group_name(classroom_id)}.user_{user_id}'
+
+
+def _hub():
+    """Couche de canaux à interroger pour la présence, sans Redis."""
+    if getattr(settings, 'REDIS_URL', None):
+        return None
+    layer = get_channel_layer()
+    return layer if hasattr(layer, 'group_sizes') else None
+
+
+@database_sync_to_async
+def _load_members(classroom_id: int) -> dict:
+    members = dict(
+        ClassroomMembership.objects.filter(classroom_id=classroom_id)
+        .values_list('user_id', 'user__username')
+    )
+    owner = Classroom.objects.filter(pk=classroom_id).values_list('created_by_id', 'created_by__username').first()
+    if owner:
+        members[owner[0]] = owner[1]
+    return members
+
+
+async def get_members(classroom_id: int, refresh: bool = False) -> dict:
+    """Retourne ``{user_id: username}`` des membres de la classe (en cache)."""
+    key = MEMBERS_KEY.format(classroom_id=classroom_id)
+    members = None if refresh else await cache.aget(key)
+    if members is None:
+        members = await _load_members(classroom_id)
+        await cache.aset(key, members, MEMBERS_TTL)
+    return members
+
+
+async def _connections(classroom_id: int, user_ids) -> dict:
+    hub = _hub()
+    if hub is not None:
+        prefix = _presence_group(classroom_id, '')
+        sizes = await hub.group_sizes(prefix)
+        user_ids = set(user_ids)
+        return {
+            uid: size
+            for uid, size in ((int(group[len(prefix):]), size) for group, size in sizes.items())
+            if uid in user_ids
+        }
+    keys = {CONNECTIONS_KEY.format(classroom_id=classroom_id, user_id=uid): uid for uid in user_ids}
+    found = await cache.aget_many(list(keys))
+    return {keys[k]: v for k, v in found.items() if v > 0}
+
+
+async def snapshot(classroom_id: int) -> list:
+    """Participants actuellement connectés, triés par nom."""
+    members = await get_members(classroom_id)
+    online = await _connections(classroom_id, members)
+    return sorted(
+        ({'id': uid, 'username': members[uid]} for uid in online),
+        key=lambda m: m['username'].lower(),
+    )
+
+
+class RosterBroadcaster:
+    """Regroupe les changements de présence avant de les diffuser."""
+
+    def __init__(self, interval: float = ROSTER_INTERVAL, heartbeat_interval: float = HEARTBEAT_INTERVAL):
+        self.interval = interval
+        self.heartbeat_interval = heartbeat_interval
+        self.pending = defaultdict(dict)
+        # Connexions de ce processus, par classe et par utilisateur
+        self.local = defaultdict(Counter)
+        self._timers = {}
+        self._heartbeat = None
+
+    async def join(self, classroom_id: int, user, channel_name: str) -> None:
+        hub = _hub()
+        if hub is not None:
+            group = _presence_group(classroom_id, user.id)
+            await hub.group_add(group, channel_name)
+            count = (await hub.group_sizes(group)).get(group, 0)
+        else:
+            count = await self._incr(classroom_id, user.id)
+            self.local[classroom_id][user.id] += 1
+            self._start_heartbeat()
+        if user.id not in await get_members(classroom_id):
+            await get_members(classroom_id, refresh=True)
+        if count == 1:
+            self._changed(classroom_id, user, online=True)
+
+    async def leave(self, classroom_id: int, user, channel_name: str) -> None:
+        hub = _hub()
+        if hub is not None:
+            group = _presence_group(classroom_id, user.id)
+            await hub.group_discard(group, channel_name)
+            count = (await hub.group_sizes(group)).get(group, 0)
+        else:
+            count = await self._decr(classroom_id, user.id)
+            local = self.local[classroom_id]
+            local[user.id] -= 1
+            if local[user.id] <= 0:
+                del local[user.id]
+            if not local:
+                del self.local[classroom_id]
+        if count <= 0:
+            self._changed(classroom_id, user, online=False)
+
+    @staticmethod
+    async def _incr(classroom_id: int, user_id: int) -> int:
+        key = CONNECTIONS_KEY.format(classroom_id=classroom_id, user_id=user_id)
+        await cache.aadd(key, 0, CONNECTIONS_TTL)
+        try:
+            count = await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, CONNECTIONS_TTL)
+            count = 1
+        await cache.atouch(key, CONNECTIONS_TTL)
+        return count
+
+    @staticmethod
+    async def _decr(classroom_id: int, user_id: int) -> int:
+        key = CONNECTIONS_KEY.format(classroom_id=classroom_id, user_id=user_id)
+        try:
+            count = await cache.adecr(key)
+        except ValueError:
+            count = 0
+        if count <= 0:
+            await cache.adelete(key)
+        return count
+
+    def _start_heartbeat(self) -> None:
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.get_running_loop().call_later(
+                self.heartbeat_interval, lambda: asyncio.ensure_future(self.heartbeat())
+            )
+
+    async def heartbeat(self) -> None:
+        """Prolonge les compteurs des connexions ouvertes dans ce processus."""
+        self._heartbeat = None
+        for classroom_id, users in list(self.local.items()):
+            for user_id in list(users):
+                key = CONNECTIONS_KEY.format(classroom_id=classroom_id, user_id=user_id)
+                if not await cache.atouch(key, CONNECTIONS_TTL):
+                    # Compteur expiré (cache vidé, battement manqué) : recréé
+                    await cache.aadd(key, users[user_id], CONNECTIONS_TTL)
+        if self.local:
+            self._start_heartbeat()
+
+    def _changed(self, classroom_id: int, user, online: bool) -> None:
+        # Garde l'état d'avant le premier changement de l'intervalle
+        self.pending[classroom_id].setdefault(user.id, (user.username, not online))
+        if classroom_id not in self._timers:
+            self._timers[classroom_id] = asyncio.get_running_loop().call_later(
+                self.interval, lambda: asyncio.ensure_future(self.flush(classroom_id))
+            )
+
+    async def flush(self, classroom_id: int) -> dict:
+        """Diffuse l'état courant des utilisateurs modifiés depuis le dernier envoi."""
+        timer = self._timers.pop(classroom_id, None)
+        if timer is not None:
+            timer.cancel()
+        changed = self.pending.pop(classroom_id, {})
+        if not changed:
+            return {}
+        online = await _connections(classroom_id, changed)
+        # Les utilisateurs revenus à leur état initial s'annulent
+        changed = {uid: name for uid, (name, was_online) in changed.items() if (uid in online) != was_online}
+        if not changed:
+            return {}
+        update = {
+            'online': [{'id': uid, 'username': changed[uid]} for uid in changed if uid in online],
+            'offline': [uid for uid in changed if uid not in online],
+        }
+        channel_layer = get_channel_layer()
+        if channel_layer is not None:
+            try:
+                await channel_layer.group_send(group_name(classroom_id), {'type': 'roster.update', 'update': update})
+            except Exception as e:
+                logger.error(f"Diffusion de la liste des participants impossible: {e}")
+        return update
+
+
+broadcaster = RosterBroadcaster()
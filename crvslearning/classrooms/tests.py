@@ -0,0 +1,163 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+from asgiref.testing import ApplicationCommunicator
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.channel_layers import LocalSocketChannelLayer
+
+from . import history, roster
+from .models import Classroom, ClassroomMembership, ClassroomMessage
+from .routing import websocket_urlpatterns
+
+
+class ClassroomHistoryTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = get_user_model().objects.create(username='prof')
+        self.classroom = Classroom.objects.create(name='Classe', created_by=self.teacher)
+
+    async def connect(self):
+        # channels.testing dépend de daphne : on pilote l'application ASGI directement
+        communicator = ApplicationCommunicator(URLRouter(websocket_urlpatterns), {
+            'type': 'websocket',
+            'path': f'/ws/classrooms/{self.classroom.id}/',
+            'headers': [],
+            'user': self.teacher,
+        })
+        await communicator.send_input({'type': 'websocket.connect'})
+        self.assertEqual((await communicator.receive_output())['type'], 'websocket.accept')
+        return communicator
+
+    async def receive(self, communicator):
+        return json.loads((await communicator.receive_output())['text'])
+
+    async def send(self, communicator, data):
+        await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps(data)})
+
+    async def disconnect(self, communicator):
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait()
+
+    async def test_messages_replayed_and_persisted(self):
+        first = await self.connect()
+        await self.receive(first)  # liste des participants
+        for text in ('un', 'deux'):
+            await self.send(first, {'text': text})
+            await self.receive(first)
+        # Enregistrés avant d'être diffusés
+        self.assertEqual(await ClassroomMessage.objects.filter(classroom=self.classroom).acount(), 2)
+        await self.disconnect(first)
+
+        second = await self.connect()
+        replayed = [await self.receive(second) for _ in range(2)]
+        self.assertEqual((await self.receive(second))['roster']['online'][0]['username'], 'prof')
+        self.assertEqual([m['text'] for m in replayed], ['un', 'deux'])
+        self.assertTrue(all(m['history'] for m in replayed))
+        await self.disconnect(second)
+
+        await roster.broadcaster.flush(self.classroom.id)
+
+    @override_settings(REDIS_URL='redis://cache')
+    async def test_ring_is_bounded(self):
+        for i in range(history.HISTORY_SIZE + 5):
+            await history.append(self.classroom.id, {'user': 'prof', 'text': str(i)})
+        messages = await history.recent(self.classroom.id)
+        self.assertEqual(len(messages), history.HISTORY_SIZE)
+        self.assertEqual(messages[0]['text'], '5')
+        self.assertEqual(messages[-1]['text'], str(history.HISTORY_SIZE + 4))
+
+    @override_settings(REDIS_URL='redis://cache')
+    async def test_cold_cache_rebuilt_from_database(self):
+        await ClassroomMessage.objects.acreate(
+            classroom=self.classroom, user=self.teacher, text='ancien', created_at=timezone.now()
+        )
+        self.assertEqual([m['text'] for m in await history.replay(self.classroom.id)], ['ancien'])
+        self.assertEqual([m['text'] for m in await history.recent(self.classroom.id)], ['ancien'])
+
+class ClassroomRosterTestCase(TestCase):
+    """Sans Redis : présence tirée du hub de la couche de canaux."""
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.teacher = User.objects.create(username='prof')
+        self.learner = User.objects.create(username='eleve')
+        self.classroom = Classroom.objects.create(name='Classe', created_by=self.teacher)
+        ClassroomMembership.objects.create(classroom=self.classroom, user=self.learner, role='student')
+        self.broadcaster = roster.RosterBroadcaster(interval=60)
+        # Hub propre au test
+        self.hub_path = os.path.join(tempfile.mkdtemp(), 'hub.sock')
+        layers = override_settings(CHANNEL_LAYERS={'default': {
+            'BACKEND': 'core.channel_layers.LocalSocketChannelLayer',
+            'CONFIG': {'path': self.hub_path},
+        }})
+        layers.enable()
+        self.addCleanup(layers.disable)
+
+    async def channel(self):
+        return await get_channel_layer().new_channel()
+
+    async def test_reconnection_coalesced(self):
+        teacher, learner = await self.channel(), await self.channel()
+        await self.broadcaster.join(self.classroom.id, self.teacher, teacher)
+        await self.broadcaster.join(self.classroom.id, self.learner, learner)
+        await self.broadcaster.flush(self.classroom.id)
+
+        # Coupure réseau : départ puis retour dans le même intervalle
+        await self.broadcaster.leave(self.classroom.id, self.learner, learner)
+        learner = await self.channel()
+        await self.broadcaster.join(self.classroom.id, self.learner, learner)
+        self.assertEqual(await self.broadcaster.flush(self.classroom.id), {})
+
+        await self.broadcaster.leave(self.classroom.id, self.learner, learner)
+        update = await self.broadcaster.flush(self.classroom.id)
+        self.assertEqual(update['offline'], [self.learner.id])
+        self.assertEqual([m['username'] for m in await roster.snapshot(self.classroom.id)], ['prof'])
+
+    async def test_second_tab_does_not_broadcast(self):
+        first, second = await self.channel(), await self.channel()
+        await self.broadcaster.join(self.classroom.id, self.learner, first)
+        await self.broadcaster.flush(self.classroom.id)
+        await self.broadcaster.join(self.classroom.id, self.learner, second)
+        await self.broadcaster.leave(self.classroom.id, self.learner, second)
+        self.assertEqual(await self.broadcaster.flush(self.classroom.id), {})
+        self.assertEqual(len(await roster.snapshot(self.classroom.id)), 1)
+
+    async def test_stopped_process_leaves_no_ghost(self):
+        # Connexion ouverte par un autre processus, arrêté sans départ
+        other = LocalSocketChannelLayer(path=self.hub_path)
+        await self.broadcaster.join(self.classroom.id, self.learner, await other.new_channel())
+        self.assertEqual(len(await roster.snapshot(self.classroom.id)), 1)
+        await other.close()
+        for _ in range(50):
+            if not await roster.snapshot(self.classroom.id):
+                break
+            await asyncio.sleep(0.05)
+        self.assertEqual(await roster.snapshot(self.classroom.id), [])
+
+
+@override_settings(REDIS_URL='redis://cache')
+class ClassroomRosterCacheTestCase(ClassroomRosterTestCase):
+    """Avec Redis : compteurs de connexions dans le cache partagé."""
+
+    async def test_stopped_process_leaves_no_ghost(self):
+        await self.broadcaster.join(self.classroom.id, self.learner, await self.channel())
+        later = time.time() + roster.CONNECTIONS_TTL - 1
+        with mock.patch('time.time', return_value=later):
+            await self.broadcaster.heartbeat()
+        # Sans battement (processus arrêté), la présence expire
+        with mock.patch('time.time', return_value=later + roster.CONNECTIONS_TTL - 1):
+            self.assertEqual(len(await roster.snapshot(self.classroom.id)), 1)
+        with mock.patch('time.time', return_value=later + roster.CONNECTIONS_TTL + 1):
+            self.assertEqual(await roster.snapshot(self.classroom.id), [])
@@ -4,7 +4,6 @@ Core application for the CRVSLearning project.
 
 # This will make sure the app is always imported when
 # Django starts so that shared_task will use this app.
-# Temporarily commented out for migrations
-# from .celery import app as celery_app
+from .celery import app as celery_app
 
-# __all__ = ('celery_app',)
\ No newline at end of file
+__all__ = ('celery_app',)
@@ -1,8 +1,9 @@
 from django.contrib.admin import ModelAdmin, site
-from core.models import MessageModel
+from core.admin_lists import ScalableAdminMixin
+from core.models import ConversationSummary, MessageModel
 
 
-class MessageModelAdmin(ModelAdmin):
+class MessageModelAdmin(ScalableAdminMixin, ModelAdmin):
     readonly_fields = ('timestamp',)
     search_fields = ('id', 'body', 'user__username', 'recipient__username')
     list_display = ('id', 'user', 'recipient', 'timestamp', 'characters')
@@ -13,3 +14,12 @@ class MessageModelAdmin(ModelAdmin):
 
 site.register(MessageModel, MessageModelAdmin)
 
+
+
+class ConversationSummaryAdmin(ModelAdmin):
+    list_display = ('user', 'partner', 'last_timestamp', 'unread_count')
+    list_select_related = ('user', 'partner')
+    raw_id_fields = ('user', 'partner', 'last_message')
+
+
+site.register(ConversationSummary, ConversationSummaryAdmin)
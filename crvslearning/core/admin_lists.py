@@ -0,0 +1,134 @@
+"""
+Listes d'administration pour les grandes tables.
+
+- Comptages estimés : sur PostgreSQL, le nombre de lignes vient des
+  statistiques du planificateur (``pg_class.reltuples`` sans filtre,
+  ``EXPLAIN`` sinon) dès qu'il dépasse ``ESTIMATE_THRESHOLD`` ; en
+  dessous, ou sur les autres bases, le comptage reste exact.
+- Pagination par curseur (clé primaire) pour les listes de
+  ``users.admin_crud_views``.
+- ``ScalableAdminMixin`` : ``select_related`` automatique des clés
+  étrangères affichées, widgets d'autocomplétion (ou de saisie d'id) au lieu
+  des listes déroulantes complètes. À déclarer sur les ``ModelAdmin`` des
+  tables volumineuses (journaux, progression, messages) ; les petites
+  tables de référence gardent les listes déroulantes.
+"""
+import json
+
+from django.contrib.admin import widgets
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+ESTIMATE_THRESHOLD = 100000
+PAGE_SIZE = 25
+
+
+def estimated_count(queryset) -> int:
+    """Nombre de lignes, estimé sur PostgreSQL pour les grandes tables."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            estimate = row[0] if row else -1
+        else:
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = plan[0]['Plan']['Plan Rows']
+    # reltuples vaut -1 tant que la table n'a pas été analysée
+    if estimate < ESTIMATE_THRESHOLD:
+        return queryset.count()
+    return int(estimate)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator dont le total est estimé pour les grandes tables."""
+
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
+
+
+def keyset_page(queryset, after=None, before=None, size=PAGE_SIZE):
+    """
+    Page d'objets triés par clé primaire décroissante, sans OFFSET.
+    ``after`` : dernière clé de la page précédente (page suivante) ;
+    ``before`` : première clé de la page courante (page précédente).
+    Retourne ``(objets, clé pour la page suivante, clé pour la précédente)``.
+    """
+    if before is not None:
+        objects = list(queryset.filter(pk__gt=before).order_by('pk')[:size + 1])
+        has_more_before = len(objects) > size
+        objects = objects[:size][::-1]
+        next_key = objects[-1].pk if objects else None
+        previous_key = objects[0].pk if objects and has_more_before else None
+        return objects, next_key, previous_key
+
+    if after is not None:
+        queryset = queryset.filter(pk__lt=after)
+    objects = list(queryset.order_by('-pk')[:size + 1])
+    next_key = objects[size - 1].pk if len(objects) > size else None
+    objects = objects[:size]
+    previous_key = objects[0].pk if objects and after is not None else None
+    return objects, next_key, previous_key
+
+
+def displayed_relations(model, list_display) -> list:
+    """Clés étrangères (et one-to-one) présentes dans ``list_display``."""
+    names = []
+    for name in list_display:
+        if not isinstance(name, str):
+            continue
+        try:
+            field = model._meta.get_field(name)
+        except Exception:
+            continue
+        if (field.many_to_one or field.one_to_one) and field.concrete:
+            names.append(name)
+    return names
+
+
+class ScalableAdminMixin:
+    """Réglages des ``ModelAdmin`` pour les tables volumineuses."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_list_select_related(self, request):
+        selected = super().get_list_select_related(request)
+        if selected is True:
+            return True
+        related = displayed_relations(self.model, self.get_list_display(request))
+        return tuple(dict.fromkeys([*(selected or ()), *related])) or False
+
+    def get_autocomplete_fields(self, request):
+        fields = list(super().get_autocomplete_fields(request))
+        for field in self.model._meta.get_fields():
+            if not (field.many_to_one or field.many_to_many) or not field.concrete:
+                continue
+            if field.name in fields or field.name in self.raw_id_fields \
+                    or field.name in self.filter_horizontal or field.name in self.filter_vertical:
+                continue
+            related_admin = self.admin_site._registry.get(field.related_model)
+            if related_admin is not None and related_admin.get_search_fields(request):
+                fields.append(field.name)
+        return fields
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # Sans autocomplétion possible : saisie de l'id plutôt que toute la table
+        if 'widget' not in kwargs and db_field.name not in self.get_autocomplete_fields(request) \
+                and db_field.name not in self.radio_fields:
+            kwargs['widget'] = widgets.ForeignKeyRawIdWidget(
+                db_field.remote_field, self.admin_site, using=kwargs.get('using')
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
@@ -1,15 +1,24 @@
-from django.db.models import Q, Count, OuterRef, Subquery
-from django.shortcuts import get_object_or_404
-from django.contrib.auth.models import User
-from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, FilteredRelation, Q
+from django.db.models.functions import Coalesce
+from rest_framework import mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.viewsets import GenericViewSet, ReadOnlyModelViewSet
 from rest_framework.authentication import SessionAuthentication
 
-from chat import settings
+from core import conversations
+from core.delivery import queue_read_receipt
 from core.serializers import MessageModelSerializer, UserModelSerializer
 from core.models import MessageModel
 
+User = get_user_model()
+
 
 class CsrfExemptSessionAuthentication(SessionAuthentication):
     """
@@ -22,57 +31,145 @@ class CsrfExemptSessionAuthentication(SessionAuthentication):
         return
 
 
-class MessagePagination(PageNumberPagination):
+class MessagePagination(BasePagination):
     """
-    Limit message prefetch to one page.
+    Pagination par clé (keyset) sur (timestamp, id), du plus récent au plus
+    ancien. ``?before=<id>`` charge les messages plus anciens que le message
+    d'ancrage, ``?after=<id>`` les plus récents. Chaque page est une simple
+    lecture d'index bornée, quelle que soit sa profondeur, et reste stable
+    lorsque de nouveaux messages arrivent.
     """
-    page_size = settings.MESSAGES_TO_LOAD
+    page_size = getattr(settings, 'MESSAGES_TO_LOAD', 15)
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get('page_size', self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def _anchor(self, queryset, value):
+        try:
+            return queryset.filter(pk=int(value)).values_list('timestamp', 'id').get()
+        except (TypeError, ValueError, MessageModel.DoesNotExist):
+            raise NotFound("Message d'ancrage introuvable.")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self.get_page_size(request)
+        before = request.query_params.get('before')
+        after = request.query_params.get('after')
+
+        if after is not None:
+            timestamp, pk = self._anchor(queryset, after)
+            rows = list(
+                queryset.filter(Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk))
+                .order_by('timestamp', 'id')[:size + 1]
+            )
+            self.has_newer = len(rows) > size
+            self.has_older = True
+            page = rows[:size][::-1]
+        else:
+            if before is not None:
+                timestamp, pk = self._anchor(queryset, before)
+                queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk))
+            rows = list(queryset.order_by('-timestamp', '-id')[:size + 1])
+            self.has_older = len(rows) > size
+            self.has_newer = before is not None
+            page = rows[:size]
+
+        self.page = page
+        return page
+
+    def _link(self, param, message):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(remove_query_param(url, 'before'), 'after')
+        return replace_query_param(url, param, message.pk)
 
+    def get_paginated_response(self, data):
+        older = self._link('before', self.page[-1]) if self.page and self.has_older else None
+        newer = self._link('after', self.page[0]) if self.page and self.has_newer else None
+        return Response({
+            'next': older,
+            'previous': newer,
+            'results': data,
+        })
 
-class MessageModelViewSet(ModelViewSet):
-    queryset = MessageModel.objects.all()
+
+class MessageModelViewSet(ReadOnlyModelViewSet):
+    """
+    Historique des messages de l'utilisateur connecté (lecture seule) et
+    accusés de lecture. L'envoi passe par les WebSockets.
+    """
     serializer_class = MessageModelSerializer
-    allowed_methods = ('GET', 'POST', 'HEAD', 'OPTIONS')
     authentication_classes = (CsrfExemptSessionAuthentication,)
+    permission_classes = (IsAuthenticated,)
     pagination_class = MessagePagination
 
-    def list(self, request, *args, **kwargs):
-        self.queryset = self.queryset.filter(Q(recipient=request.user) |
-                                             Q(user=request.user))
+    def get_queryset(self):
+        user = self.request.user
+        queryset = MessageModel.objects.select_related('user', 'recipient').filter(
+            Q(recipient=user) | Q(user=user))
+        if self.action != 'list':
+            return queryset
+        chat = self.request.query_params.get('chat', None)
+        if chat is not None:
+            if not chat.isdigit():
+                raise NotFound("Conversation introuvable.")
+            # Utilise l'index (chat, timestamp)
+            queryset = queryset.filter(chat_id=int(chat))
         target = self.request.query_params.get('target', None)
         if target is not None:
-            self.queryset = self.queryset.filter(
-                Q(recipient=request.user, user__username=target) |
-                Q(recipient__username=target, user=request.user))
-        return super().list(request, *args, **kwargs)
-
-    def retrieve(self, request, *args, **kwargs):
-        msg = get_object_or_404(
-            self.queryset.filter(Q(recipient=request.user) |
-                                 Q(user=request.user),
-                                 Q(pk=kwargs['pk'])))
-        serializer = self.get_serializer(msg)
-        return Response(serializer.data)
-
-
-class UserModelViewSet(ModelViewSet):
-    queryset = User.objects.all()
+            # Résout l'interlocuteur d'abord pour filtrer sur les index (user, recipient, timestamp)
+            target_id = User.objects.filter(username=target).values_list('id', flat=True).first()
+            queryset = queryset.filter(
+                Q(recipient=user, user_id=target_id) |
+                Q(recipient_id=target_id, user=user))
+        return queryset
+
+    @action(detail=False, methods=['post'])
+    def read(self, request):
+        """
+        Accusé de lecture : avance le filigrane de la conversation avec
+        ``target`` jusqu'à ``last_read_id`` (ou jusqu'au dernier message).
+        """
+        partner_id = User.objects.filter(
+            username=request.data.get('target')
+        ).values_list('id', flat=True).first()
+        if partner_id is None:
+            raise NotFound("Conversation introuvable.")
+        last_read_id = request.data.get('last_read_id')
+        if last_read_id:
+            try:
+                last_read_id = int(last_read_id)
+            except (TypeError, ValueError):
+                raise NotFound("Message introuvable.")
+            if not conversations.mark_read(request.user.id, partner_id, last_read_id):
+                last_read_id = None
+        else:
+            last_read_id = conversations.mark_conversation_read(request.user.id, partner_id)
+        if last_read_id:
+            queue_read_receipt(request.user.id, partner_id, last_read_id)
+        return Response({'last_read_id': conversations.get_watermark(request.user.id, partner_id)})
+
+
+class UserModelViewSet(mixins.ListModelMixin, GenericViewSet):
     serializer_class = UserModelSerializer
-    allowed_methods = ('GET', 'HEAD', 'OPTIONS')
+    permission_classes = (IsAuthenticated,)
     pagination_class = None  # Get all user
 
-    def list(self, request, *args, **kwargs):
-        user = request.user
-        # Get all users except yourself
-        self.queryset = self.queryset.exclude(id=user.id)
-        
-        # get latest message along with users
-        # https://stackoverflow.com/a/62801980/2351696 
-        newest = MessageModel.objects.filter(Q(recipient=user)|Q(user=user)).filter(
-            Q(recipient_id=OuterRef('pk'))|Q(user_id=OuterRef('pk'))
-        )       
-        self.queryset = self.queryset.annotate(
-            latest_message=Subquery(newest.values('body').order_by('-timestamp')[:1]),
-            timestamp=Subquery(newest.values('timestamp').order_by('-timestamp')[:1]),
-        )
-        return super().list(request, *args, **kwargs)
+    def get_queryset(self):
+        user = self.request.user
+        # Get all users except yourself, with the summary of the conversation
+        # (one LEFT JOIN on the unique (user, partner) summary row)
+        return User.objects.exclude(id=user.id).annotate(
+            conversation=FilteredRelation(
+                'partner_conversations',
+                condition=Q(partner_conversations__user=user),
+            ),
+        ).annotate(
+            latest_message=F('conversation__snippet'),
+            timestamp=F('conversation__last_timestamp'),
+            unread_count=Coalesce(F('conversation__unread_count'), 0),
+        ).order_by(F('timestamp').desc(nulls_last=True), 'username')
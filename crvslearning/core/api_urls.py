@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from core.api import MessageModelViewSet
+
+# Seul l'historique des messages est exposé (monté sous /api/v1/)
+router = DefaultRouter()
+router.register(r'message', MessageModelViewSet, basename='message-api')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
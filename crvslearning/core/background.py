@@ -0,0 +1,67 @@
+"""
+Tâches Celery différées après la réponse HTTP quand il n'y a pas de broker.
+
+Sans Redis, Celery exécute les tâches sur place (``CELERY_TASK_ALWAYS_EAGER``) :
+``delay`` lancerait une diffusion à tous les abonnés dans la requête qui la
+déclenche et ``countdown`` serait ignoré. ``enqueue`` garde alors la tâche
+dans une file propre au processus ; ``run_pending`` exécute les tâches échues
+à la fin de chaque requête (signal ``request_finished``, une fois la réponse
+envoyée). Les tâches restantes sont exécutées à l'arrêt normal du processus
+et perdues s'il est tué : ce mode ne convient qu'au développement.
+
+Avec un broker, ``enqueue`` équivaut à ``apply_async``.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending = []
+
+
+def _eager() -> bool:
+    return getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False)
+
+
+def enqueue(task, args=(), kwargs=None, countdown=0) -> None:
+    """Planifie ``task`` dans ``countdown`` secondes, hors de la requête courante."""
+    if not _eager():
+        task.apply_async(args, kwargs, countdown=countdown or None)
+        return
+    with _lock:
+        _pending.append((time.monotonic() + countdown, task, tuple(args), kwargs or {}))
+
+
+def run_pending(force: bool = False) -> int:
+    """
+    Exécute les tâches en attente dont le délai est écoulé (toutes avec
+    ``force``). Retourne le nombre de tâches exécutées.
+    """
+    now = time.monotonic()
+    due, later = [], []
+    with _lock:
+        for item in _pending:
+            (due if force or item[0] <= now else later).append(item)
+        _pending[:] = later
+    for _, task, args, kwargs in due:
+        result = task.apply(args, kwargs)
+        if result.failed():
+            logger.error("Échec de la tâche %s : %s", task.name, result.result)
+    return len(due)
+
+
+def _on_request_finished(sender, **kwargs):
+    if _pending:
+        run_pending()
+
+
+def connect() -> None:
+    from django.core.signals import request_finished
+
+    request_finished.connect(_on_request_finished, dispatch_uid='core.background')
+    atexit.register(run_pending, force=True)
@@ -0,0 +1,384 @@
+"""
+Couche de canaux inter-processus sans courtier externe.
+
+Les processus d'une même machine (workers uvicorn, worker Celery)
+échangent leurs messages par un petit concentrateur (« hub ») joignable
+sur une socket Unix. Le premier processus qui obtient le verrou du hub le
+démarre dans un thread dédié ; si ce processus s'arrête, un autre reprend
+le verrou à la reconnexion suivante et chaque client ré-enregistre ses
+groupes.
+
+Le hub ne conserve que l'appartenance aux groupes (avec expiration) et
+route chaque message vers le processus propriétaire du canal, identifié
+dans le nom du canal (``specific.<client>!<aléa>``). Les files, leur
+capacité et l'expiration des messages restent gérées localement par
+``InMemoryChannelLayer``. La livraison est « au plus une fois » : un
+message destiné à un processus disparu ou saturé est perdu.
+
+Le hub répond aussi au nombre de canaux des groupes (``group_sizes``) :
+les canaux d'un processus arrêté en sont retirés dès la fermeture de sa
+connexion, ce qui permet d'en déduire une présence sans état périmé.
+"""
+import asyncio
+import fcntl
+import itertools
+import logging
+import marshal
+import os
+import random
+import string
+import struct
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from channels.exceptions import ChannelFull
+from channels.layers import InMemoryChannelLayer
+
+logger = logging.getLogger(__name__)
+
+# Répertoire d'exécution propre à l'application (créé en 0700 au démarrage du hub)
+DEFAULT_PATH = str(Path(__file__).resolve().parent.parent / 'run' / 'channels.sock')
+CONNECT_ATTEMPTS = 50
+CONNECT_DELAY = 0.1
+QUERY_TIMEOUT = 5
+# Au-delà, un client trop lent perd les messages qui lui sont destinés
+MAX_CLIENT_BUFFER = 8 * 1024 * 1024
+
+_HEADER = struct.Struct('!I')
+
+
+async def _read_frame(reader):
+    size, = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return marshal.loads(await reader.readexactly(size))
+
+
+def _write_frame(writer, frame) -> None:
+    data = marshal.dumps(frame)
+    writer.write(_HEADER.pack(len(data)) + data)
+
+
+def _owner(channel: str):
+    """Identifiant du client propriétaire d'un canal spécifique."""
+    if '!' not in channel:
+        return None
+    return channel[:channel.index('!')].rsplit('.', 1)[-1]
+
+
+# --------------------------------------------------------------------------
+# Hub
+# --------------------------------------------------------------------------
+
+class Hub:
+    """Routeur des messages entre processus ; tourne dans un thread dédié."""
+
+    def __init__(self, path: str, group_expiry: int, max_buffer: int = MAX_CLIENT_BUFFER):
+        self.path = path
+        self.group_expiry = group_expiry
+        self.max_buffer = max_buffer
+        self.clients = {}
+        self.groups = {}
+
+    async def serve(self, ready: threading.Event) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = await asyncio.start_unix_server(self._handle, self.path)
+        os.chmod(self.path, 0o600)
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader, writer) -> None:
+        client_id = None
+        try:
+            while True:
+                op, *args = await _read_frame(reader)
+                if op == 'send':
+                    self._route([args[0]], args[1])
+                elif op == 'group_send':
+                    self._route(self._members(args[0]), args[1])
+                elif op == 'group_add':
+                    self.groups.setdefault(args[0], {})[args[1]] = time.time()
+                elif op == 'group_discard':
+                    self._discard(args[0], args[1])
+                elif op == 'hello':
+                    client_id = args[0]
+                    self.clients[client_id] = writer
+                elif op == 'flush':
+                    self.groups.clear()
+                elif op == 'group_sizes':
+                    _write_frame(writer, ('reply', args[0], self._sizes(args[1])))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"Hub des canaux: trame invalide ({e})")
+        finally:
+            if client_id is not None and self.clients.get(client_id) is writer:
+                del self.clients[client_id]
+                self._forget(client_id)
+            writer.close()
+
+    def _members(self, group: str) -> list:
+        channels = self.groups.get(group)
+        if not channels:
+            return []
+        timeout = time.time() - self.group_expiry
+        for channel, joined_at in list(channels.items()):
+            if joined_at < timeout:
+                del channels[channel]
+        return list(channels)
+
+    def _sizes(self, prefix: str) -> dict:
+        sizes = {}
+        for group in [g for g in self.groups if g.startswith(prefix)]:
+            size = len(self._members(group))
+            if size:
+                sizes[group] = size
+        return sizes
+
+    def _discard(self, group: str, channel: str) -> None:
+        channels = self.groups.get(group)
+        if channels:
+            channels.pop(channel, None)
+            if not channels:
+                del self.groups[group]
+
+    def _forget(self, client_id: str) -> None:
+        """Retire des groupes les canaux d'un client déconnecté."""
+        for group, channels in list(self.groups.items()):
+            for channel in [c for c in channels if _owner(c) == client_id]:
+                del channels[channel]
+            if not channels:
+                del self.groups[group]
+
+    def _route(self, channels, message) -> None:
+        by_client = defaultdict(list)
+        for channel in channels:
+            by_client[_owner(channel)].append(channel)
+        for client_id, client_channels in by_client.items():
+            writer = self.clients.get(client_id)
+            if writer is None or writer.is_closing():
+                continue
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                logger.warning(f"Hub des canaux: client {client_id} saturé, message perdu")
+                continue
+            _write_frame(writer, ('deliver', client_channels, message))
+
+
+_hub_lock = threading.Lock()
+# Verrous détenus par ce processus, par chemin de socket
+_hub_lock_files = {}
+
+
+def start_hub(path: str, group_expiry: int) -> bool:
+    """
+    Démarre le hub dans ce processus si aucun autre ne le détient.
+    Retourne ``True`` si ce processus héberge le hub.
+    """
+    with _hub_lock:
+        if path in _hub_lock_files:
+            return True
+        # Le chmod de la socket suit le bind : le répertoire privé couvre l'intervalle
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        lock_file = open(f'{path}.lock', 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        _hub_lock_files[path] = lock_file
+
+    ready = threading.Event()
+    hub = Hub(path, group_expiry)
+    threading.Thread(
+        target=lambda: asyncio.run(hub.serve(ready)), name='channels-hub', daemon=True
+    ).start()
+    ready.wait(5)
+    return True
+
+
+# --------------------------------------------------------------------------
+# Client
+# --------------------------------------------------------------------------
+
+class _Connection:
+    """Connexion au hub pour une boucle d'événements du processus."""
+
+    def __init__(self, layer, client_id: str):
+        self.layer = layer
+        self.client_id = client_id
+        self.groups = defaultdict(set)
+        self.writer = None
+        self.reader = None
+        # Vrai dès que la connexion possède des canaux : les boucles qui ne
+        # font qu'envoyer (async_to_sync) ne lancent pas de lecture
+        self.listening = False
+        self.lock = asyncio.Lock()
+        self.replies = {}
+        self._request_ids = itertools.count()
+
+    async def ensure(self, listen: bool = False):
+        self.listening = self.listening or listen
+        async with self.lock:
+            if self.writer is None or self.writer.is_closing():
+                self.reader, self.writer = await self._open()
+                # Le tampon d'écriture est vidé à chaque envoi : une boucle
+                # éphémère peut être fermée juste après
+                self.writer.transport.set_write_buffer_limits(high=0)
+                _write_frame(self.writer, ('hello', self.client_id))
+                # Après un changement de hub, les appartenances sont à refaire
+                for group, channels in self.groups.items():
+                    for channel in channels:
+                        _write_frame(self.writer, ('group_add', group, channel))
+                await self.writer.drain()
+            if self.listening and self.reader is not None:
+                reader, self.reader = self.reader, None
+                asyncio.ensure_future(self._read(reader, self.writer))
+        return self.writer
+
+    async def _open(self):
+        for _ in range(CONNECT_ATTEMPTS):
+            try:
+                return await asyncio.open_unix_connection(self.layer.path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                await asyncio.get_running_loop().run_in_executor(
+                    None, start_hub, self.layer.path, self.layer.group_expiry
+                )
+                await asyncio.sleep(CONNECT_DELAY * random.random())
+        raise ConnectionError(f"Hub des canaux injoignable sur {self.layer.path}")
+
+    async def _read(self, reader, writer) -> None:
+        try:
+            while True:
+                kind, *frame = await _read_frame(reader)
+                if kind == 'reply':
+                    future = self.replies.pop(frame[0], None)
+                    if future is not None and not future.done():
+                        future.set_result(frame[1])
+                    continue
+                channels, message = frame
+                for channel in channels:
+                    try:
+                        await InMemoryChannelLayer.send(self.layer, channel, message)
+                    except ChannelFull:
+                        logger.warning(f"Canal {channel} plein, message perdu")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            if self.writer is writer:
+                self.writer = None
+                # Le hub a disparu : on se reconnecte pour ne pas manquer de messages
+                asyncio.ensure_future(self.ensure())
+        finally:
+            writer.close()
+
+    async def request(self, *frame) -> None:
+        writer = self.writer
+        if writer is None or writer.is_closing():
+            writer = await self.ensure()
+        _write_frame(writer, frame)
+        await writer.drain()
+
+    async def query(self, op: str, *args):
+        """Envoie une requête au hub et attend sa réponse."""
+        writer = await self.ensure(listen=True)
+        request_id = next(self._request_ids)
+        future = self.replies[request_id] = asyncio.get_running_loop().create_future()
+        try:
+            _write_frame(writer, (op, request_id, *args))
+            await writer.drain()
+            return await asyncio.wait_for(future, QUERY_TIMEOUT)
+        finally:
+            self.replies.pop(request_id, None)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+# Uniques dans le processus, même avec plusieurs couches vers le même hub
+_client_ids = itertools.count()
+
+
+class LocalSocketChannelLayer(InMemoryChannelLayer):
+    """
+    Couche de canaux partagée entre les processus d'une machine via un hub
+    sur socket Unix. Options : ``path`` (socket du hub) en plus de celles
+    d'``InMemoryChannelLayer`` (``expiry``, ``group_expiry``, ``capacity``,
+    ``channel_capacity``).
+    """
+
+    def __init__(self, path: str = None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path or DEFAULT_PATH
+        self._connections = {}
+
+    def _connection(self) -> _Connection:
+        loop = asyncio.get_running_loop()
+        connection = self._connections.get(loop)
+        if connection is None:
+            # async_to_sync crée des boucles éphémères : on oublie les fermées
+            for closed in [lp for lp in self._connections if lp.is_closed()]:
+                del self._connections[closed]
+            client_id = f'{os.getpid():x}x{next(_client_ids)}'
+            connection = self._connections[loop] = _Connection(self, client_id)
+        return connection
+
+    def _is_local(self, channel: str) -> bool:
+        owner = _owner(channel)
+        return owner is None or any(c.client_id == owner for c in self._connections.values())
+
+    async def new_channel(self, prefix='specific.'):
+        connection = self._connection()
+        await connection.ensure(listen=True)
+        suffix = ''.join(random.choice(string.ascii_letters) for _ in range(12))
+        return f'{prefix}.{connection.client_id}!{suffix}'
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_channel_name(channel)
+        if self._is_local(channel):
+            await super().send(channel, message)
+        else:
+            await self._connection().request('send', channel, message)
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        connection = self._connection()
+        connection.groups[group].add(channel)
+        await connection.request('group_add', group, channel)
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        connection = self._connection()
+        channels = connection.groups.get(group)
+        if channels is not None:
+            channels.discard(channel)
+            if not channels:
+                del connection.groups[group]
+        await connection.request('group_discard', group, channel)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "Message is not a dict"
+        self.require_valid_group_name(group)
+        await self._connection().request('group_send', group, message)
+
+    async def group_sizes(self, prefix: str) -> dict:
+        """
+        Nombre de canaux (tous processus confondus) de chaque groupe non
+        vide dont le nom commence par ``prefix``.
+        """
+        return await self._connection().query('group_sizes', prefix)
+
+    async def flush(self):
+        await super().flush()
+        for connection in self._connections.values():
+            connection.groups.clear()
+        await self._connection().request('flush')
+
+    async def close(self):
+        connection = self._connections.pop(asyncio.get_running_loop(), None)
+        if connection is not None:
+            connection.close()
@@ -8,15 +8,18 @@ from django.contrib.auth import get_user_model
 from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 
+from core import conversations
+from core.delivery import queue_read_receipt
 from core.models import MessageModel
 
+from users import presence
+
 # Configuration du logger
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
-# Configure logger
-logger = logging.getLogger(__name__)
-User = get_user_model()
+# Délai minimal entre deux enregistrements de présence pour une connexion
+PRESENCE_REFRESH_INTERVAL = 30
 
 class ChatConsumer(AsyncWebsocketConsumer):
     """
@@ -48,7 +51,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             logger.info(f"WebSocket connecté: {self.user.username} dans le groupe {self.group_name}")
             
             # Mettre à jour le statut de dernière connexion
-            await self.update_last_seen()
+            await self.update_last_seen(force=True)
             
             # Envoyer la confirmation de connexion
             await self.send(text_data=json.dumps({
@@ -84,16 +87,20 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 
                 # Mettre à jour le statut de dernière connexion
                 if hasattr(self, 'user'):
-                    await self.update_last_seen()
+                    await self.update_last_seen(force=True)
             except Exception as e:
                 logger.error(f"Erreur lors de la déconnexion WebSocket: {str(e)}", exc_info=True)
 
-    @database_sync_to_async
-    def update_last_seen(self):
-        """Met à jour le champ last_seen de l'utilisateur."""
-        if hasattr(self.user, 'last_seen'):
-            self.user.last_seen = timezone.now()
-            self.user.save(update_fields=['last_seen'])
+    async def update_last_seen(self, force=False):
+        """
+        Enregistre l'activité de l'utilisateur dans le service de présence
+        (cache), au plus une fois par ``PRESENCE_REFRESH_INTERVAL``.
+        """
+        now = time.monotonic()
+        if not force and now - getattr(self, '_presence_refreshed', 0) < PRESENCE_REFRESH_INTERVAL:
+            return
+        self._presence_refreshed = now
+        await sync_to_async(presence.mark_seen)(self.user.id)
     
     async def receive(self, text_data=None, bytes_data=None):
         """
@@ -104,7 +111,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'type': 'chat_message',  # ou 'typing', 'read_receipt', 'typing_status'
             'recipient_id': <int>,
             'message': <str>,
-            'message_id': <int> (optionnel, pour les accusés de lecture)
+            'partner_id': <int> (accusés de lecture),
+            'message_id': <int> (optionnel, dernier message lu)
         }
         """
         if not text_data:
@@ -115,8 +123,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
             data = json.loads(text_data)
             message_type = data.get('type')
             
-            # Mettre à jour le statut de dernière connexion à chaque message
-            await self.update_last_seen()
+            # Les indicateurs de saisie ne comptent pas comme une activité
+            if message_type not in ('typing', 'typing_status'):
+                await self.update_last_seen()
             
             if message_type == 'chat_message':
                 await self.handle_chat_message(data)
@@ -146,31 +155,82 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.send_error("Destinataire ou message manquant")
             return
         
-        if not recipient_id or not message_text:
-            logger.warning(f"Missing required fields in chat message: {data}")
-            await self.send_error("Missing required fields")
-            return
-        
-        # Get or generate message ID
-        message_id = data.get('message_id') or f"msg_{self.user.id}_{int(time.time() * 1000)}"
-        
-        # Save message to database
+        # Enregistrer le message ; la diffusion à l'expéditeur et au
+        # destinataire est faite après validation (core.delivery)
         try:
-            message = await self.save_message(
+            await self.save_message(
                 user=self.user,
                 recipient_id=recipient_id,
                 message=message_text,
-                message_id=message_id
             )
         except Exception as e:
             logger.error(f"Erreur lors de l'enregistrement du message: {str(e)}", exc_info=True)
             await self.send_error("Erreur lors de l'enregistrement du message")
+    
+    async def handle_typing_indicator(self, data):
+        """Relaie l'indicateur de saisie au destinataire."""
+        recipient_id = data.get('recipient_id')
+        if not recipient_id:
             return
-        
-        # Envoyer le message au destinataire
         await self.channel_layer.group_send(
             f"user_{recipient_id}",
             {
+                'type': 'typing_indicator',
+                'user_id': self.user.id,
+                'is_typing': bool(data.get('is_typing', True)),
+            }
+        )
+    
+    async def handle_typing_status(self, data):
+        await self.handle_typing_indicator(data)
+    
+    async def handle_read_receipt(self, data):
+        """
+        Avance le filigrane de lecture de la conversation ; il est diffusé à
+        l'interlocuteur et aux autres connexions de l'utilisateur.
+
+        ``partner_id`` désigne la conversation ; ``message_id`` (optionnel)
+        le dernier message lu, sinon toute la conversation est lue.
+        """
+        await self.advance_watermark(data.get('partner_id'), data.get('message_id'))
+    
+    @database_sync_to_async
+    def save_message(self, user, recipient_id, message):
+        recipient = User.objects.get(pk=recipient_id)
+        return MessageModel.objects.create(user=user, recipient=recipient, body=message)
+    
+    @database_sync_to_async
+    def advance_watermark(self, partner_id, message_id):
+        try:
+            partner_id = int(partner_id) if partner_id else None
+            message_id = int(message_id) if message_id else None
+        except (TypeError, ValueError):
+            return None
+        if partner_id is None and message_id is not None:
+            partner_id = (
+                MessageModel.objects.filter(pk=message_id, recipient=self.user)
+                .values_list('user_id', flat=True)
+                .first()
+            )
+        if partner_id is None:
+            return None
+        if message_id is None:
+            last_read_id = conversations.mark_conversation_read(self.user.id, partner_id)
+        elif conversations.mark_read(self.user.id, partner_id, message_id):
+            last_read_id = message_id
+        else:
+            last_read_id = None
+        if last_read_id:
+            queue_read_receipt(self.user.id, partner_id, last_read_id)
+        return last_read_id
+    
+    async def send_error(self, message):
+        await self.send(text_data=json.dumps({'type': 'error', 'message': message}))
+    
+    async def chat_message(self, event):
+        """Transmet au WebSocket un message diffusé dans le groupe."""
+        try:
+            message_data = event['message']
             # Envoyer le message au WebSocket
             await self.send(text_data=json.dumps({
                 'type': 'chat_message',
@@ -181,4 +241,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
             
         except Exception as e:
             logger.error(f"Error in chat_message: {str(e)}")
-            logger.error(f"Event data: {event}")
\ No newline at end of file
+            logger.error(f"Event data: {event}")
+    
+    async def chat_frames(self, event):
+        """Transmet des trames déjà sérialisées par ``core.delivery``."""
+        for frame in event['frames']:
+            await self.send(text_data=frame)
+    
+    async def typing_indicator(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'typing',
+            'user_id': event['user_id'],
+            'is_typing': event['is_typing'],
+        }))
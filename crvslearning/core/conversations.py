@@ -0,0 +1,151 @@
+"""
+Maintenance incrémentale des résumés de conversation (``ConversationSummary``).
+
+Chaque nouveau message met à jour deux lignes (expéditeur et destinataire)
+par un UPDATE indexé ; la ligne n'est créée qu'au premier message de la
+paire. Les listes de conversations se lisent ainsi en une requête triée par
+date.
+
+L'état de lecture est un filigrane par conversation (``last_read_id``) :
+un accusé de lecture est un seul UPDATE qui avance le filigrane et recalcule
+le nombre de messages non lus situés après lui.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from core.models import ConversationSummary, MessageModel
+
+SNIPPET_LENGTH = 100
+
+
+def _snippet(body: str) -> str:
+    return body[:SNIPPET_LENGTH]
+
+
+def _upsert(user_id, partner_id, message, unread_increment: int) -> None:
+    values = {
+        'last_message_id': message.id,
+        'snippet': _snippet(message.body),
+        'last_timestamp': message.timestamp,
+    }
+    rows = ConversationSummary.objects.filter(user_id=user_id, partner_id=partner_id)
+    if rows.update(unread_count=F('unread_count') + unread_increment, **values):
+        return
+    try:
+        with transaction.atomic():
+            ConversationSummary.objects.create(
+                user_id=user_id, partner_id=partner_id, unread_count=unread_increment, **values
+            )
+    except IntegrityError:
+        # Créée entre-temps par une écriture concurrente
+        rows.update(unread_count=F('unread_count') + unread_increment, **values)
+
+
+def record_message(message) -> None:
+    """Met à jour les résumés de l'expéditeur et du destinataire."""
+    if not message.recipient_id:
+        return
+    _upsert(message.user_id, message.recipient_id, message, 0)
+    if message.recipient_id != message.user_id:
+        _upsert(message.recipient_id, message.user_id, message, 1)
+
+
+def _unread_after(user_id, partner_id, message_id):
+    return Coalesce(
+        Subquery(
+            MessageModel.objects.filter(user_id=partner_id, recipient_id=user_id, id__gt=message_id)
+            .order_by()
+            .values('recipient_id')
+            .annotate(n=Count('id'))
+            .values('n')
+        ),
+        Value(0),
+    )
+
+
+def mark_read(user_id, partner_id, message_id) -> bool:
+    """
+    Avance le filigrane de lecture de ``user_id`` dans sa conversation avec
+    ``partner_id`` jusqu'à ``message_id``. Retourne ``False`` si le filigrane
+    était déjà au-delà.
+    """
+    return bool(
+        ConversationSummary.objects.filter(
+            user_id=user_id,
+            partner_id=partner_id,
+            last_read_id__lt=message_id,
+            # Le filigrane ne peut dépasser le dernier message de la conversation
+            last_message_id__gte=message_id,
+        ).update(
+            last_read_id=message_id,
+            unread_count=_unread_after(user_id, partner_id, message_id),
+        )
+    )
+
+
+def mark_conversation_read(user_id, partner_id):
+    """
+    Marque toute la conversation comme lue. Retourne le nouveau filigrane,
+    ou ``None`` s'il n'a pas bougé.
+    """
+    last_id = (
+        ConversationSummary.objects.filter(user_id=user_id, partner_id=partner_id)
+        .values_list('last_message_id', flat=True)
+        .first()
+    )
+    if last_id and mark_read(user_id, partner_id, last_id):
+        return last_id
+    return None
+
+
+def get_watermark(user_id, partner_id) -> int:
+    return (
+        ConversationSummary.objects.filter(user_id=user_id, partner_id=partner_id)
+        .values_list('last_read_id', flat=True)
+        .first()
+    ) or 0
+
+
+def rebuild_summaries(batch_size: int = 1000) -> int:
+    """
+    Reconstruit tous les résumés à partir des messages existants, en
+    conservant les filigranes de lecture.
+    """
+    watermarks = {
+        (user_id, partner_id): last_read_id
+        for user_id, partner_id, last_read_id in ConversationSummary.objects.values_list(
+            'user_id', 'partner_id', 'last_read_id'
+        )
+    }
+    latest = {}
+    unread = {}
+    rows = MessageModel.objects.filter(recipient__isnull=False).values_list(
+        'id', 'user_id', 'recipient_id', 'body', 'timestamp'
+    ).order_by('timestamp', 'id')
+    for message_id, sender_id, recipient_id, body, timestamp in rows.iterator(chunk_size=5000):
+        summary = (message_id, _snippet(body), timestamp)
+        latest[(sender_id, recipient_id)] = summary
+        latest[(recipient_id, sender_id)] = summary
+        key = (recipient_id, sender_id)
+        if sender_id != recipient_id and message_id > watermarks.get(key, 0):
+            unread[key] = unread.get(key, 0) + 1
+
+    with transaction.atomic():
+        ConversationSummary.objects.all().delete()
+        ConversationSummary.objects.bulk_create(
+            [
+                ConversationSummary(
+                    user_id=user_id,
+                    partner_id=partner_id,
+                    last_message_id=message_id,
+                    snippet=snippet,
+                    last_timestamp=timestamp,
+                    unread_count=unread.get((user_id, partner_id), 0),
+                    last_read_id=watermarks.get((user_id, partner_id), 0),
+                )
+                for (user_id, partner_id), (message_id, snippet, timestamp) in latest.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(latest)
@@ -0,0 +1,147 @@
+"""
+Diffusion WebSocket des messages de chat.
+
+Les notifications ne sont envoyées qu'après la validation de la transaction
+(``transaction.on_commit``) : un message annulé n'est jamais diffusé et
+l'enregistrement n'attend jamais la couche de canaux. Chaque message est
+sérialisé une seule fois en JSON ; les trames en attente sont regroupées par
+groupe destinataire et envoyées en un seul ``group_send`` par groupe.
+"""
+import asyncio
+import json
+import logging
+import threading
+import weakref
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def user_group(user_id) -> str:
+    return f"user_{user_id}"
+
+
+def _user_data(user) -> dict:
+    return {
+        'id': user.id,
+        'username': user.username,
+        'avatar': user.get_avatar_display() if hasattr(user, 'get_avatar_display') else None,
+        'is_online': user.is_online if hasattr(user, 'is_online') else False,
+    }
+
+
+def serialize_message(message) -> dict:
+    return {
+        'id': message.id,
+        'user': _user_data(message.user),
+        'recipient': _user_data(message.recipient) if message.recipient_id else None,
+        'body': message.body,
+        'timestamp': message.timestamp.isoformat(),
+        'type': 'chat_message',
+    }
+
+
+class _Batch:
+    """Trames en attente pour une transaction (ou un point de sauvegarde)."""
+
+    def __init__(self):
+        self.frames = defaultdict(list)
+
+    def add(self, groups, frame: str) -> None:
+        for group in groups:
+            self.frames[group].append(frame)
+
+    def flush(self) -> None:
+        frames, self.frames = self.frames, defaultdict(list)
+        if frames:
+            send_frames(frames)
+
+
+def _pending_batch() -> _Batch:
+    """
+    Retourne le lot associé au niveau de transaction courant et enregistre
+    son envoi avec ``on_commit``. Un lot par niveau de point de sauvegarde.
+
+    Seul le rappel ``on_commit`` garde le lot en vie (le registre n'en
+    conserve qu'une référence faible) : si la transaction ou le point de
+    sauvegarde est annulé, Django abandonne le rappel et le lot disparaît
+    avec ses trames.
+    """
+    connection = transaction.get_connection()
+    batches = getattr(_local, 'batches', None)
+    if batches is None:
+        batches = _local.batches = weakref.WeakValueDictionary()
+    scope = (connection.alias, *connection.savepoint_ids)
+    batch = batches.get(scope)
+    if batch is None:
+        batch = batches[scope] = _Batch()
+
+        def send():
+            batches.pop(scope, None)
+            batch.flush()
+
+        transaction.on_commit(send, using=connection.alias)
+    return batch
+
+
+def queue_message(message) -> None:
+    """Planifie la diffusion d'un nouveau message à l'expéditeur et au destinataire."""
+    frame = json.dumps(
+        {'type': 'chat_message', 'message': serialize_message(message)},
+        cls=DjangoJSONEncoder,
+    )
+    groups = {user_group(message.user_id)}
+    if message.recipient_id:
+        groups.add(user_group(message.recipient_id))
+
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        send_frames({group: [frame] for group in groups})
+        return
+    _pending_batch().add(groups, frame)
+
+
+def queue_read_receipt(reader_id, partner_id, last_read_id) -> None:
+    """
+    Diffuse le filigrane de lecture à l'interlocuteur et aux autres
+    connexions du lecteur, après validation de la transaction.
+    """
+    frame = json.dumps({
+        'type': 'read_receipt',
+        'reader_id': reader_id,
+        'partner_id': partner_id,
+        'last_read_id': last_read_id,
+    })
+    groups = {user_group(reader_id), user_group(partner_id)}
+    transaction.on_commit(lambda: send_frames({group: [frame] for group in groups}))
+
+
+async def _send_all(channel_layer, frames: dict) -> None:
+    results = await asyncio.gather(
+        *(
+            channel_layer.group_send(group, {'type': 'chat.frames', 'frames': group_frames})
+            for group, group_frames in frames.items()
+        ),
+        return_exceptions=True,
+    )
+    for group, result in zip(frames, results):
+        if isinstance(result, Exception):
+            logger.error(f"Diffusion impossible vers {group}: {result}")
+
+
+def send_frames(frames: dict) -> None:
+    """Envoie ``{groupe: [trames JSON]}`` à la couche de canaux, en parallèle."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(_send_all)(channel_layer, frames)
+    except Exception as e:
+        logger.error(f"Erreur lors de la diffusion des messages: {str(e)}", exc_info=True)
@@ -0,0 +1,431 @@
+"""
+Test de charge des consommateurs WebSocket (chat privé et chat de classe).
+
+Des utilisateurs virtuels se connectent, envoient des messages, des
+indicateurs de saisie et se reconnectent aléatoirement pendant une durée
+donnée. Chaque message porte l'instant de son envoi, ce qui permet de
+mesurer la latence de diffusion de chaque copie reçue.
+
+Deux transports sont disponibles :
+
+- ``inprocess`` : l'application ASGI est pilotée directement dans le
+  processus (l'utilisateur est placé dans le scope, sans session) ;
+- ``server`` : de vrais clients WebSocket asyncio se connectent à un
+  serveur ASGI (uvicorn) avec un cookie de session.
+
+Les utilisateurs (``loadtest_<n>``) et les classes créés pour le test sont
+supprimés à la fin, avec leurs messages.
+"""
+import asyncio
+import base64
+import json
+import os
+import random
+import struct
+import time
+from dataclasses import dataclass, field
+from importlib import import_module
+
+import numpy as np
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+
+USERNAME_PREFIX = 'loadtest_'
+CONNECT_TIMEOUT = 10
+DRAIN_DELAY = 2.0
+MARKER = 'lt:'
+
+CONSUMER_PATHS = {
+    'chat': lambda user_id, room_id: '/ws/ws/',
+    'classroom': lambda user_id, room_id: f'/ws/classrooms/{room_id}/',
+}
+
+
+class ConnectionClosed(Exception):
+    pass
+
+
+# --------------------------------------------------------------------------
+# Transports
+# --------------------------------------------------------------------------
+
+class InProcessClient:
+    """Client branché directement sur l'application ASGI, sans réseau."""
+
+    def __init__(self, app, path, user):
+        self.app = app
+        self.path = path
+        self.user = user
+        self.communicator = None
+
+    async def connect(self):
+        self.communicator = ApplicationCommunicator(self.app, {
+            'type': 'websocket',
+            'path': self.path,
+            'headers': [],
+            'subprotocols': [],
+            'user': self.user,
+        })
+        await self.communicator.send_input({'type': 'websocket.connect'})
+        event = await asyncio.wait_for(self.communicator.output_queue.get(), CONNECT_TIMEOUT)
+        if event['type'] != 'websocket.accept':
+            raise ConnectionError(f"Connexion refusée: {event['type']}")
+
+    async def send(self, text):
+        await self.communicator.send_input({'type': 'websocket.receive', 'text': text})
+
+    async def recv(self):
+        # On lit la file directement : receive_output annule l'application
+        # en cas de délai dépassé
+        event = await self.communicator.output_queue.get()
+        if event['type'] == 'websocket.close':
+            raise ConnectionClosed()
+        return event.get('text')
+
+    async def close(self):
+        if self.communicator is None:
+            return
+        await self.communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        try:
+            await self.communicator.wait(CONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _mask(payload: bytes, key: bytes) -> bytes:
+    n = len(payload)
+    repeated = (key * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, 'little') ^ int.from_bytes(repeated, 'little')).to_bytes(n, 'little')
+
+
+class RawClient:
+    """Client WebSocket minimal (RFC 6455) sur les flux asyncio."""
+
+    def __init__(self, host, port, path, cookie=None):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.cookie = cookie
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), CONNECT_TIMEOUT
+        )
+        key = base64.b64encode(os.urandom(16)).decode()
+        lines = [
+            f'GET {self.path} HTTP/1.1',
+            f'Host: {self.host}:{self.port}',
+            f'Origin: http://{self.host}:{self.port}',
+            'Upgrade: websocket',
+            'Connection: Upgrade',
+            f'Sec-WebSocket-Key: {key}',
+            'Sec-WebSocket-Version: 13',
+        ]
+        if self.cookie:
+            lines.append(f'Cookie: {self.cookie}')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+        response = await asyncio.wait_for(self.reader.readuntil(b'\r\n\r\n'), CONNECT_TIMEOUT)
+        status = response.split(b'\r\n', 1)[0]
+        if b' 101 ' not in status:
+            self.writer.close()
+            raise ConnectionError(f"Connexion refusée: {status.decode(errors='replace')}")
+
+    def _frame(self, opcode: int, payload: bytes) -> bytes:
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, 0x80 | length)
+        elif length < 65536:
+            header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, length)
+        key = os.urandom(4)
+        return header + key + _mask(payload, key)
+
+    async def send(self, text):
+        self.writer.write(self._frame(0x1, text.encode()))
+        await self.writer.drain()
+
+    async def recv(self):
+        while True:
+            try:
+                first, second = await self.reader.readexactly(2)
+                length = second & 0x7F
+                if length == 126:
+                    length, = struct.unpack('!H', await self.reader.readexactly(2))
+                elif length == 127:
+                    length, = struct.unpack('!Q', await self.reader.readexactly(8))
+                payload = await self.reader.readexactly(length)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                raise ConnectionClosed()
+            opcode = first & 0x0F
+            if opcode == 0x8:
+                raise ConnectionClosed()
+            if opcode == 0x9:
+                self.writer.write(self._frame(0xA, payload))
+            elif opcode == 0x1:
+                return payload.decode()
+
+    async def close(self):
+        if self.writer is None:
+            return
+        try:
+            self.writer.write(self._frame(0x8, struct.pack('!H', 1000)))
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+        self.writer.close()
+
+
+# --------------------------------------------------------------------------
+# Mesures
+# --------------------------------------------------------------------------
+
+@dataclass
+class Metrics:
+    setup: list = field(default_factory=list)
+    fanout: list = field(default_factory=list)
+    sent: int = 0
+    typing: int = 0
+    received: int = 0
+    reconnects: int = 0
+    errors: int = 0
+    rss_per_connection: float = None
+
+    def report(self, duration: float) -> dict:
+        def percentiles(values):
+            if not values:
+                return None
+            p50, p95, p99 = np.percentile(np.array(values) * 1000, [50, 95, 99])
+            return {'p50_ms': round(p50, 2), 'p95_ms': round(p95, 2), 'p99_ms': round(p99, 2),
+                    'max_ms': round(max(values) * 1000, 2)}
+
+        return {
+            'connections': len(self.setup) - self.reconnects,
+            'reconnects': self.reconnects,
+            'errors': self.errors,
+            'setup_latency': percentiles(self.setup),
+            'fanout_latency': percentiles(self.fanout),
+            'sent': self.sent,
+            'typing': self.typing,
+            'delivered': self.received,
+            'sent_per_sec': round(self.sent / duration, 1),
+            'delivered_per_sec': round(self.received / duration, 1),
+            'rss_per_connection_kb': (
+                round(self.rss_per_connection / 1024, 1) if self.rss_per_connection is not None else None
+            ),
+        }
+
+
+def rss_bytes(pid=None):
+    """Mémoire résidente d'un processus (Linux uniquement), sinon ``None``."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+# --------------------------------------------------------------------------
+# Utilisateurs virtuels
+# --------------------------------------------------------------------------
+
+@dataclass
+class Scenario:
+    consumer: str = 'chat'
+    users: int = 1000
+    duration: float = 30.0
+    rate: float = 0.2
+    typing_ratio: float = 0.3
+    reconnect_ratio: float = 0.02
+    room_size: int = 300
+    ramp: float = 5.0
+
+
+class VirtualUser:
+
+    def __init__(self, scenario, metrics, make_client, partner_id):
+        self.scenario = scenario
+        self.metrics = metrics
+        self.make_client = make_client
+        self.partner_id = partner_id
+        self.client = None
+        self.reader = None
+
+    async def connect(self):
+        self.client = self.make_client()
+        started = time.perf_counter()
+        await self.client.connect()
+        self.metrics.setup.append(time.perf_counter() - started)
+        self.reader = asyncio.ensure_future(self._read(self.client))
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+        if self.reader is not None:
+            self.reader.cancel()
+
+    async def _read(self, client):
+        while True:
+            try:
+                text = await client.recv()
+            except (ConnectionClosed, asyncio.CancelledError):
+                return
+            received_at = time.perf_counter()
+            sent_at = self._marker(text)
+            if sent_at is not None:
+                self.metrics.received += 1
+                self.metrics.fanout.append(received_at - sent_at)
+
+    def _marker(self, text):
+        try:
+            data = json.loads(text or '{}')
+        except ValueError:
+            return None
+        if self.scenario.consumer == 'chat':
+            body = (data.get('message') or {}).get('body') if data.get('type') == 'chat_message' else None
+        else:
+            body = None if data.get('history') else data.get('text')
+        if not body or not body.startswith(MARKER):
+            return None
+        return float(body[len(MARKER):])
+
+    def _message_frame(self):
+        marker = f'{MARKER}{time.perf_counter():.6f}'
+        if self.scenario.consumer == 'chat':
+            return {'type': 'chat_message', 'recipient_id': self.partner_id, 'message': marker}
+        return {'text': marker}
+
+    async def run(self, deadline):
+        scenario = self.scenario
+        while True:
+            await asyncio.sleep(random.expovariate(scenario.rate))
+            if time.perf_counter() >= deadline:
+                return
+            roll = random.random()
+            try:
+                if roll < scenario.reconnect_ratio:
+                    await self.close()
+                    await self.connect()
+                    self.metrics.reconnects += 1
+                elif roll < scenario.reconnect_ratio + scenario.typing_ratio:
+                    # Le chat de classe n'a pas d'indicateur de saisie
+                    if scenario.consumer == 'chat':
+                        await self.client.send(json.dumps(
+                            {'type': 'typing', 'recipient_id': self.partner_id, 'is_typing': True}
+                        ))
+                        self.metrics.typing += 1
+                else:
+                    await self.client.send(json.dumps(self._message_frame()))
+                    self.metrics.sent += 1
+            except Exception:
+                self.metrics.errors += 1
+
+
+async def run_scenario(scenario, make_client, partners, rss=None) -> dict:
+    """
+    Exécute un scénario. ``make_client(index)`` retourne un client non
+    connecté pour l'utilisateur virtuel ``index`` ; ``partners[index]`` est
+    l'identifiant de son interlocuteur (chat privé). ``rss`` retourne la
+    mémoire du serveur, pour estimer le coût d'une connexion.
+    """
+    metrics = Metrics()
+    users = [
+        VirtualUser(scenario, metrics, lambda i=i: make_client(i), partners[i])
+        for i in range(scenario.users)
+    ]
+
+    rss_before = rss() if rss else None
+    step = scenario.ramp / max(len(users), 1)
+
+    async def connect(index, user):
+        await asyncio.sleep(index * step)
+        try:
+            await user.connect()
+            return True
+        except Exception:
+            metrics.errors += 1
+            return False
+
+    connected = await asyncio.gather(*(connect(i, u) for i, u in enumerate(users)))
+    active = [u for u, ok in zip(users, connected) if ok]
+    rss_after = rss() if rss else None
+    if rss_before is not None and rss_after is not None and active:
+        metrics.rss_per_connection = (rss_after - rss_before) / len(active)
+
+    started = time.perf_counter()
+    deadline = started + scenario.duration
+    await asyncio.gather(*(u.run(deadline) for u in active))
+    await asyncio.sleep(DRAIN_DELAY)
+    elapsed = time.perf_counter() - started
+    await asyncio.gather(*(u.close() for u in active), return_exceptions=True)
+    return metrics.report(elapsed)
+
+
+# --------------------------------------------------------------------------
+# Données de test
+# --------------------------------------------------------------------------
+
+class ExistingDataError(Exception):
+    """Des utilisateurs du préfixe de test existent déjà."""
+
+
+def prepare_users(count: int) -> list:
+    """
+    Crée les utilisateurs du test. Refuse de réutiliser des comptes
+    existants portant le préfixe : ``cleanup`` ne supprime que ceux créés ici.
+    """
+    User = get_user_model()
+    if User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+        raise ExistingDataError(
+            f"Des utilisateurs « {USERNAME_PREFIX}* » existent déjà ; "
+            f"supprimez-les ou renommez-les avant de relancer le test."
+        )
+    User.objects.bulk_create(
+        [User(username=f'{USERNAME_PREFIX}{i}') for i in range(count)],
+        batch_size=1000,
+    )
+    users = {u.username: u for u in User.objects.filter(username__startswith=USERNAME_PREFIX)}
+    return [users[f'{USERNAME_PREFIX}{i}'] for i in range(count)]
+
+
+def prepare_classrooms(users: list, room_size: int) -> list:
+    """Répartit les utilisateurs dans des classes ; retourne la classe de chacun."""
+    from classrooms.models import Classroom, ClassroomMembership
+
+    rooms = []
+    memberships = []
+    for start in range(0, len(users), room_size):
+        members = users[start:start + room_size]
+        classroom = Classroom.objects.create(name=f'{USERNAME_PREFIX}{start}', created_by=members[0])
+        rooms.extend([classroom.id] * len(members))
+        memberships.extend(
+            ClassroomMembership(classroom=classroom, user=u, role='student') for u in members[1:]
+        )
+    ClassroomMembership.objects.bulk_create(memberships, batch_size=1000)
+    return rooms
+
+
+def session_cookies(users: list) -> list:
+    """Ouvre une session authentifiée par utilisateur (mode serveur)."""
+    engine = import_module(settings.SESSION_ENGINE)
+    backend = settings.AUTHENTICATION_BACKENDS[0] if getattr(settings, 'AUTHENTICATION_BACKENDS', None) \
+        else 'django.contrib.auth.backends.ModelBackend'
+    cookies = []
+    for user in users:
+        session = engine.SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = backend
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        cookies.append(f'{settings.SESSION_COOKIE_NAME}={session.session_key}')
+    return cookies
+
+
+def cleanup(users: list) -> None:
+    """Supprime les utilisateurs créés par le test, leurs classes et leurs messages."""
+    get_user_model().objects.filter(pk__in=[u.pk for u in users]).delete()
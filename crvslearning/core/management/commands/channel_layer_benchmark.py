@@ -0,0 +1,150 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+GROUP = 'benchmark'
+RECEIVE_TIMEOUT = 30
+
+BACKENDS = {
+    'memory': 'channels.layers.InMemoryChannelLayer',
+    'local': 'core.channel_layers.LocalSocketChannelLayer',
+    'redis': 'channels_redis.core.RedisChannelLayer',
+}
+
+
+async def _receive_all(layer, names, expected):
+    """Reçoit ``expected`` messages sur chaque canal ; retourne (fin, reçus)."""
+    received = 0
+
+    async def drain(name):
+        nonlocal received
+        for _ in range(expected):
+            await layer.receive(name)
+            received += 1
+
+    try:
+        await asyncio.wait_for(asyncio.gather(*(drain(n) for n in names)), RECEIVE_TIMEOUT)
+    except asyncio.TimeoutError:
+        pass
+    return time.perf_counter(), received
+
+
+async def _open_channels(layer, count):
+    names = [await layer.new_channel() for _ in range(count)]
+    for name in names:
+        await layer.group_add(GROUP, name)
+    return names
+
+
+def _receiver(backend, config, count, expected, pipe):
+    """Processus récepteur : ouvre ses canaux puis attend les messages."""
+    async def run():
+        layer = import_string(backend)(**config)
+        names = await _open_channels(layer, count)
+        pipe.send(names)
+        pipe.send(await _receive_all(layer, names, expected))
+
+    asyncio.run(run())
+
+
+class Command(BaseCommand):
+    help = "Benchmark channel layer throughput (send and group_send) across processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--layer', nargs='+', choices=list(BACKENDS), default=['memory', 'local'])
+        parser.add_argument('--messages', type=int, default=2000, help="Messages sent per pattern")
+        parser.add_argument('--processes', type=int, default=4,
+                            help="Receiver processes (0 = receivers in the sending process)")
+        parser.add_argument('--channels', type=int, default=25, help="Channels per receiver process")
+        parser.add_argument('--redis-url', default=os.environ.get('REDIS_URL'))
+
+    def handle(self, *args, **options):
+        if 'redis' in options['layer'] and not options['redis_url']:
+            raise CommandError("The redis layer needs --redis-url (or REDIS_URL).")
+
+        for layer in options['layer']:
+            processes = options['processes']
+            if layer == 'memory' and processes:
+                # La couche en mémoire ne traverse pas les processus
+                processes = 0
+            for pattern in ('send', 'group_send'):
+                try:
+                    seconds, sent, delivered, expected = self._run(layer, pattern, processes, options)
+                except ImportError as e:
+                    raise CommandError(f"Layer '{layer}' unavailable: {e}")
+                where = f"{processes} process(es)" if processes else "in-process"
+                self.stdout.write(
+                    f"{layer:>6} {pattern:>10} [{where}]: {sent} sent, {delivered}/{expected} delivered "
+                    f"in {seconds:.3f}s -> {delivered / seconds:,.0f} deliveries/s"
+                )
+
+    def _config(self, layer, options):
+        capacity = options['messages'] + 100
+        if layer == 'memory':
+            return {'capacity': capacity}
+        if layer == 'local':
+            return {'capacity': capacity, 'path': os.path.join(self.tmpdir, 'hub.sock')}
+        return {'capacity': capacity, 'hosts': [options['redis_url']]}
+
+    def _run(self, layer, pattern, processes, options):
+        if not hasattr(self, 'tmpdir'):
+            self.tmpdir = tempfile.mkdtemp()
+        backend, config = BACKENDS[layer], self._config(layer, options)
+        import_string(backend)
+        messages, per_process = options['messages'], options['channels']
+        total_channels = per_process * max(processes, 1)
+        if pattern == 'send':
+            messages -= messages % total_channels
+            expected = messages // total_channels
+        else:
+            expected = messages
+        message = {'type': 'benchmark.message', 'text': 'x' * 200}
+
+        async def send_all(sender, names):
+            started = time.perf_counter()
+            if pattern == 'send':
+                for i in range(messages):
+                    await sender.send(names[i % len(names)], message)
+            else:
+                for _ in range(messages):
+                    await sender.group_send(GROUP, message)
+            return started
+
+        if not processes:
+            async def run_local():
+                sender = import_string(backend)(**config)
+                await sender.flush()
+                names = await _open_channels(sender, per_process)
+                receiving = asyncio.ensure_future(_receive_all(sender, names, expected))
+                started = await send_all(sender, names)
+                finished, received = await receiving
+                return finished - started, received
+
+            seconds, delivered = asyncio.run(run_local())
+            return seconds, messages, delivered, expected * total_channels
+
+        context = multiprocessing.get_context('spawn')
+        pipes, workers = [], []
+        for _ in range(processes):
+            parent, child = context.Pipe()
+            worker = context.Process(target=_receiver, args=(backend, config, per_process, expected, child))
+            worker.start()
+            pipes.append(parent)
+            workers.append(worker)
+        names = [name for pipe in pipes for name in pipe.recv()]
+
+        async def run_sender():
+            sender = import_string(backend)(**config)
+            return await send_all(sender, names)
+
+        started = asyncio.run(run_sender())
+        results = [pipe.recv() for pipe in pipes]
+        for worker in workers:
+            worker.join(RECEIVE_TIMEOUT)
+        finished = max(r[0] for r in results)
+        return finished - started, messages, sum(r[1] for r in results), expected * total_channels
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.conversations import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user conversation summaries from existing messages"
+
+    def handle(self, *args, **options):
+        count = rebuild_summaries()
+        self.stdout.write(self.style.SUCCESS(f"{count} conversation summaries rebuilt"))
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import sessions
+
+
+class Command(BaseCommand):
+    help = "Report session saves written to the database versus skipped by the cached session engine"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Reset the counters after reporting")
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE != 'core.sessions':
+            self.stderr.write(self.style.WARNING(
+                f"SESSION_ENGINE is {settings.SESSION_ENGINE}; counters only move with core.sessions."
+            ))
+        stats = sessions.write_stats()
+        self.stdout.write(
+            f"writes={stats['writes']} skipped={stats['skipped']} "
+            f"skipped_ratio={stats['skipped_ratio']:.1%} "
+            f"(threshold {getattr(settings, 'SESSION_WRITE_THRESHOLD', sessions.DEFAULT_WRITE_THRESHOLD)}s)"
+        )
+        if options['reset']:
+            sessions.reset_write_stats()
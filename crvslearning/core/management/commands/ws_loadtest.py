@@ -0,0 +1,204 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core import loadtest
+
+LAYERS = ('memory', 'redis')
+SERVER_START_TIMEOUT = 30
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the chat and classroom WebSocket consumers with simulated users "
+        "(connection setup latency, fan-out latency, throughput, memory per connection)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumer', nargs='+', choices=list(loadtest.CONSUMER_PATHS),
+                            default=list(loadtest.CONSUMER_PATHS))
+        parser.add_argument('--layer', nargs='+', choices=LAYERS, default=['memory'])
+        parser.add_argument('--mode', choices=('inprocess', 'server'), default='inprocess',
+                            help="Drive the ASGI app in-process, or real sockets against uvicorn")
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--duration', type=float, default=30.0, help="Seconds of traffic after ramp-up")
+        parser.add_argument('--rate', type=float, default=0.2, help="Actions per second per user")
+        parser.add_argument('--typing-ratio', type=float, default=0.3)
+        parser.add_argument('--reconnect-ratio', type=float, default=0.02)
+        parser.add_argument('--room-size', type=int, default=300, help="Users per classroom")
+        parser.add_argument('--ramp', type=float, default=5.0, help="Seconds over which users connect")
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--external-server', action='store_true',
+                            help="Use an already running server at --host/--port (server mode)")
+        parser.add_argument('--server-pid', type=int, help="PID of the external server, for memory figures")
+        parser.add_argument('--redis-url', default=os.environ.get('REDIS_URL'))
+        parser.add_argument('--json', action='store_true', help="Print results as JSON")
+        parser.add_argument('--keep-data', action='store_true', help="Keep the generated users and messages")
+
+    def handle(self, *args, **options):
+        if 'redis' in options['layer'] and not options['redis_url']:
+            raise CommandError("The redis layer needs --redis-url (or REDIS_URL).")
+        if options['external_server'] and len(options['layer']) > 1:
+            raise CommandError("An external server runs a single channel layer; pass one --layer.")
+        self._raise_fd_limit()
+
+        try:
+            users = loadtest.prepare_users(options['users'])
+        except loadtest.ExistingDataError:
+            raise CommandError(
+                f"Users named '{loadtest.USERNAME_PREFIX}*' already exist (left over by a --keep-data run?); "
+                f"delete them before running the load test."
+            )
+
+        results = []
+        try:
+            partners = [u.id for u in self._pair(users)]
+            rooms = loadtest.prepare_classrooms(users, options['room_size'])
+            cookies = loadtest.session_cookies(users) if options['mode'] == 'server' else None
+            for layer in options['layer']:
+                for consumer in options['consumer']:
+                    scenario = loadtest.Scenario(
+                        consumer=consumer,
+                        users=len(users),
+                        duration=options['duration'],
+                        rate=options['rate'],
+                        typing_ratio=options['typing_ratio'],
+                        reconnect_ratio=options['reconnect_ratio'],
+                        room_size=options['room_size'],
+                        ramp=options['ramp'],
+                    )
+                    path = loadtest.CONSUMER_PATHS[consumer]
+                    if options['mode'] == 'inprocess':
+                        report = self._run_inprocess(scenario, layer, users, partners, rooms, path, options)
+                    else:
+                        report = self._run_server(scenario, layer, users, partners, rooms, path, cookies, options)
+                    results.append({'consumer': consumer, 'layer': layer, 'mode': options['mode'], **report})
+                    if not options['json']:
+                        self._print(results[-1])
+        finally:
+            if not options['keep_data']:
+                loadtest.cleanup(users)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+
+    @staticmethod
+    def _pair(users):
+        # Conversations deux à deux : 0<->1, 2<->3...
+        return [users[i ^ 1] if (i ^ 1) < len(users) else users[i - 1] for i in range(len(users))]
+
+    @staticmethod
+    def _raise_fd_limit():
+        try:
+            import resource
+        except ImportError:
+            return
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    @staticmethod
+    def _layer_settings(layer, redis_url):
+        if layer == 'memory':
+            return {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+        return {'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [redis_url]},
+        }}
+
+    def _run_inprocess(self, scenario, layer, users, partners, rooms, path, options):
+        from channels.routing import URLRouter
+        from crvslearning.asgi import websocket_urlpatterns
+
+        app = URLRouter(websocket_urlpatterns)
+
+        def make_client(i):
+            return loadtest.InProcessClient(app, path(users[i].id, rooms[i]), users[i])
+
+        async def run():
+            report = await loadtest.run_scenario(scenario, make_client, partners, rss=loadtest.rss_bytes)
+            if scenario.consumer == 'classroom':
+                # Les tampons des classes sont liés à la boucle qui se termine
+                from classrooms import roster
+                for room_id in set(rooms):
+                    await roster.broadcaster.flush(room_id)
+            return report
+
+        with override_settings(CHANNEL_LAYERS=self._layer_settings(layer, options['redis_url'])):
+            try:
+                return asyncio.run(run())
+            except ImportError as e:
+                raise CommandError(f"Channel layer '{layer}' unavailable: {e}")
+
+    def _run_server(self, scenario, layer, users, partners, rooms, path, cookies, options):
+        host, port = options['host'], options['port']
+
+        def make_client(i):
+            return loadtest.RawClient(host, port, path(users[i].id, rooms[i]), cookies[i])
+
+        if options['external_server']:
+            pid = options['server_pid']
+            return asyncio.run(loadtest.run_scenario(
+                scenario, make_client, partners, rss=(lambda: loadtest.rss_bytes(pid)) if pid else None
+            ))
+
+        server = self._start_server(host, port, options['redis_url'] if layer == 'redis' else None)
+        try:
+            return asyncio.run(loadtest.run_scenario(
+                scenario, make_client, partners, rss=lambda: loadtest.rss_bytes(server.pid)
+            ))
+        finally:
+            server.terminate()
+            server.wait(10)
+
+    def _start_server(self, host, port, redis_url):
+        env = os.environ.copy()
+        # Le serveur choisit sa couche de canaux (et son cache) selon REDIS_URL
+        if redis_url:
+            env['REDIS_URL'] = redis_url
+        else:
+            env.pop('REDIS_URL', None)
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'crvslearning.asgi:application',
+             '--host', host, '--port', str(port), '--log-level', 'warning'],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("uvicorn exited during startup (is it installed?)")
+            try:
+                socket.create_connection((host, port), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f"uvicorn did not start on {host}:{port}")
+
+    def _print(self, result):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{result['consumer']} / {result['layer']} layer / {result['mode']}"
+        ))
+        for key in ('setup_latency', 'fanout_latency'):
+            value = result[key]
+            line = ', '.join(f"{k}={v}" for k, v in value.items()) if value else 'n/a'
+            self.stdout.write(f"  {key.replace('_', ' ')}: {line}")
+        self.stdout.write(
+            f"  connections={result['connections']} reconnects={result['reconnects']} errors={result['errors']}"
+        )
+        self.stdout.write(
+            f"  sent={result['sent']} ({result['sent_per_sec']}/s) typing={result['typing']} "
+            f"delivered={result['delivered']} ({result['delivered_per_sec']}/s)"
+        )
+        rss = result['rss_per_connection_kb']
+        self.stdout.write(f"  memory per connection: {f'{rss} KiB' if rss is not None else 'n/a'}")
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_messagemodel_read_by_alter_messagemodel_recipient_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='messagemodel',
+            index=models.Index(fields=['user', 'recipient', 'timestamp'], name='core_messag_user_id_cbe217_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+SNIPPET_LENGTH = 100
+
+
+def build_summaries(apps, schema_editor):
+    """
+    Construit les résumés à partir des messages existants (logique figée
+    ici plutôt qu'importée de ``core.conversations``).
+    """
+    MessageModel = apps.get_model('core', 'MessageModel')
+    ConversationSummary = apps.get_model('core', 'ConversationSummary')
+    latest = {}
+    unread = {}
+    rows = MessageModel.objects.filter(recipient__isnull=False).values_list(
+        'id', 'user_id', 'recipient_id', 'body', 'timestamp', 'read'
+    ).order_by('timestamp', 'id')
+    for message_id, sender_id, recipient_id, body, timestamp, read in rows.iterator(chunk_size=5000):
+        summary = (message_id, body[:SNIPPET_LENGTH], timestamp)
+        latest[(sender_id, recipient_id)] = summary
+        latest[(recipient_id, sender_id)] = summary
+        if not read and sender_id != recipient_id:
+            unread[(recipient_id, sender_id)] = unread.get((recipient_id, sender_id), 0) + 1
+
+    ConversationSummary.objects.bulk_create(
+        [
+            ConversationSummary(
+                user_id=user_id,
+                partner_id=partner_id,
+                last_message_id=message_id,
+                snippet=snippet,
+                last_timestamp=timestamp,
+                unread_count=unread.get((user_id, partner_id), 0),
+            )
+            for (user_id, partner_id), (message_id, snippet, timestamp) in latest.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_messagemodel_user_recipient_timestamp_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snippet', models.CharField(blank=True, max_length=100, verbose_name='extrait')),
+                ('last_timestamp', models.DateTimeField(verbose_name='dernier message')),
+                ('unread_count', models.PositiveIntegerField(default=0, verbose_name='non lus')),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.messagemodel')),
+                ('partner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='partner_conversations', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'conversation',
+                'verbose_name_plural': 'conversations',
+                'ordering': ('-last_timestamp',),
+                'indexes': [models.Index(fields=['user', '-last_timestamp'], name='core_conver_user_id_03fd3b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'partner'), name='core_conversation_user_partner')],
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:55
+
+from django.db import migrations, models
+from django.db.models import Max
+
+SNIPPET_LENGTH = 100
+
+
+def build_summaries(apps, schema_editor):
+    """
+    Reconstruit les résumés ; le filigrane initial est le dernier message
+    marqué comme lu dans chaque conversation. Logique figée ici plutôt
+    qu'importée de ``core.conversations``.
+    """
+    MessageModel = apps.get_model('core', 'MessageModel')
+    ConversationSummary = apps.get_model('core', 'ConversationSummary')
+    watermarks = {
+        (row['recipient_id'], row['user_id']): row['last_read_id']
+        for row in MessageModel.objects.filter(read=True, recipient__isnull=False)
+        .values('recipient_id', 'user_id')
+        .annotate(last_read_id=Max('id'))
+        .order_by()
+    }
+    latest = {}
+    unread = {}
+    rows = MessageModel.objects.filter(recipient__isnull=False).values_list(
+        'id', 'user_id', 'recipient_id', 'body', 'timestamp'
+    ).order_by('timestamp', 'id')
+    for message_id, sender_id, recipient_id, body, timestamp in rows.iterator(chunk_size=5000):
+        summary = (message_id, body[:SNIPPET_LENGTH], timestamp)
+        latest[(sender_id, recipient_id)] = summary
+        latest[(recipient_id, sender_id)] = summary
+        key = (recipient_id, sender_id)
+        if sender_id != recipient_id and message_id > watermarks.get(key, 0):
+            unread[key] = unread.get(key, 0) + 1
+
+    ConversationSummary.objects.all().delete()
+    ConversationSummary.objects.bulk_create(
+        [
+            ConversationSummary(
+                user_id=user_id,
+                partner_id=partner_id,
+                last_message_id=message_id,
+                snippet=snippet,
+                last_timestamp=timestamp,
+                unread_count=unread.get((user_id, partner_id), 0),
+                last_read_id=watermarks.get((user_id, partner_id), 0),
+            )
+            for (user_id, partner_id), (message_id, snippet, timestamp) in latest.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_conversationsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationsummary',
+            name='last_read_id',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='dernier message lu'),
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='messagemodel',
+            name='read_by',
+        ),
+    ]
@@ -1,10 +1,9 @@
 from django.conf import settings
 from django.db import models
 from django.db.models import (Model, TextField, DateTimeField, ForeignKey,
-                              CASCADE, BooleanField, Q)
+                              CASCADE, BooleanField, OuterRef, Subquery)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from shortuuidfield import ShortUUIDField
 from django.contrib.auth import get_user_model
 
@@ -39,9 +38,12 @@ class ChatRoom(models.Model):
         return self.messages.order_by('-timestamp').first()
     
     def get_unread_count(self, user):
-        return self.messages.filter(
-            ~Q(sender=user),
-            read=False
+        """Messages des autres membres postérieurs au filigrane de lecture de ``user``."""
+        last_read = ConversationSummary.objects.filter(
+            user=user, partner=OuterRef('user')
+        ).values('last_read_id')[:1]
+        return self.messages.exclude(user=user).filter(
+            id__gt=Coalesce(Subquery(last_read), 0)
         ).count()
         
     def get_other_member(self, user):
@@ -66,9 +68,9 @@ class MessageModel(Model):
     timestamp = DateTimeField('date d\'envoi', auto_now_add=True, 
                             editable=False, db_index=True)
     body = TextField('contenu')
+    # Hérités : l'état de lecture est porté par ConversationSummary.last_read_id
     read = BooleanField('lu', default=False, db_index=True)
     read_at = DateTimeField('date de lecture', null=True, blank=True)
-    read_by = models.ManyToManyField(User, related_name='core_read_messages', blank=True)
 
     def __str__(self):
         return f"{self.user.username}: {self.body[:50]}"
@@ -82,55 +84,11 @@ class MessageModel(Model):
 
     def notify_ws_clients(self):
         """
-        Informe les clients qu'un nouveau message est disponible via WebSocket.
+        Planifie la diffusion du message via WebSocket après la validation
+        de la transaction (voir ``core.delivery``).
         """
-        from django.core.serializers.json import DjangoJSONEncoder
-        import json
-        
-        # Récupérer les informations de l'expéditeur et du destinataire
-        user_data = {
-            'id': self.user.id,
-            'username': self.user.username,
-            'avatar': self.user.get_avatar_display() if hasattr(self.user, 'get_avatar_display') else None,
-            'is_online': self.user.is_online if hasattr(self.user, 'is_online') else False
-        }
-        
-        recipient_data = {
-            'id': self.recipient.id,
-            'username': self.recipient.username,
-            'avatar': self.recipient.get_avatar_display() if hasattr(self.recipient, 'get_avatar_display') else None,
-            'is_online': self.recipient.is_online if hasattr(self.recipient, 'is_online') else False
-        }
-        
-        # Créer un dictionnaire avec les données du message
-        message_data = {
-            'id': self.id,
-            'user': user_data,
-            'recipient': recipient_data,
-            'body': self.body,
-            'timestamp': self.timestamp.isoformat(),
-            'read': self.read,
-            'read_at': self.read_at.isoformat() if self.read_at else None,
-            'type': 'chat_message'
-        }
-        
-        # Créer la notification
-        notification = {
-            'type': 'chat_message',
-            'message': message_data
-        }
-        
-        # Envoyer la notification via le canal
-        channel_layer = get_channel_layer()
-        
-        # Envoyer à l'expéditeur
-        sender_group = f"user_{self.user.id}"
-        async_to_sync(channel_layer.group_send)(sender_group, notification)
-        
-        # Envoyer au destinataire (si différent de l'expéditeur)
-        if self.user.id != self.recipient.id:
-            recipient_group = f"user_{self.recipient.id}"
-            async_to_sync(channel_layer.group_send)(recipient_group, notification)
+        from core.delivery import queue_message
+        queue_message(self)
 
     def save(self, *args, **kwargs):
         """
@@ -146,24 +104,24 @@ class MessageModel(Model):
             
         super().save(*args, **kwargs)
         
-        # Mettre à jour la date de mise à jour de la salle de discussion
-        if self.chat:
-            self.chat.updated_at = timezone.now()
-            self.chat.save(update_fields=['updated_at'])
-        
-        # Notifier les clients uniquement pour les nouveaux messages
         if is_new:
+            # Mettre à jour la date de la salle de discussion en un seul UPDATE
+            if self.chat_id:
+                ChatRoom.objects.filter(pk=self.chat_id).update(updated_at=self.timestamp)
+            from core.conversations import record_message
+            record_message(self)
+            # Notifier les clients uniquement pour les nouveaux messages
             self.notify_ws_clients()
     
     def mark_as_read(self, user):
-        """Marque le message comme lu par un utilisateur spécifique"""
-        if not self.read:
-            self.read = True
-            self.read_at = timezone.now()
-            self.read_by.add(user)
-            self.save(update_fields=['read', 'read_at'])
-            return True
-        return False
+        """
+        Marque la conversation comme lue par ``user`` jusqu'à ce message
+        inclus (avance son filigrane de lecture).
+        """
+        from core.conversations import mark_read
+        if user.id != self.recipient_id:
+            return False
+        return mark_read(user.id, self.user_id, self.id)
 
     class Meta:
         app_label = 'core'
@@ -174,8 +132,42 @@ class MessageModel(Model):
             models.Index(fields=['user', 'recipient', 'read']),
             models.Index(fields=['recipient', 'read']),
             models.Index(fields=['chat', 'timestamp']),
+            models.Index(fields=['user', 'recipient', 'timestamp']),
         ]
         
     def get_absolute_url(self):
         from django.urls import reverse
         return reverse('core:message_detail', kwargs={'pk': self.pk})
+
+
+class ConversationSummary(models.Model):
+    """
+    Résumé d'une conversation directe vue par un utilisateur : dernier
+    message, extrait, date et nombre de messages non lus. Tenu à jour à
+    chaque envoi et lecture (voir ``core.conversations``).
+
+    ``last_read_id`` est le filigrane de lecture : tous les messages du
+    partenaire dont l'id est inférieur ou égal sont lus.
+    """
+    user = ForeignKey(User, on_delete=CASCADE, related_name='conversations')
+    partner = ForeignKey(User, on_delete=CASCADE, related_name='partner_conversations')
+    last_message = ForeignKey(MessageModel, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    snippet = models.CharField('extrait', max_length=100, blank=True)
+    last_timestamp = DateTimeField('dernier message')
+    unread_count = models.PositiveIntegerField('non lus', default=0)
+    last_read_id = models.PositiveBigIntegerField('dernier message lu', default=0)
+
+    class Meta:
+        app_label = 'core'
+        verbose_name = 'conversation'
+        verbose_name_plural = 'conversations'
+        ordering = ('-last_timestamp',)
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'partner'], name='core_conversation_user_partner'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-last_timestamp']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} ↔ {self.partner_id}"
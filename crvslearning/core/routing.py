@@ -1,7 +1,7 @@
-from core import consumers
+from django.urls import re_path
 
-from django.conf.urls import url
+from core import consumers
 
 websocket_urlpatterns = [
-    url(r'^ws$', consumers.ChatConsumer.as_asgi()),
+    re_path(r'^ws/ws/$', consumers.ChatConsumer.as_asgi()),
 ]
@@ -1,7 +1,9 @@
-from django.contrib.auth.models import User
+from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from core.models import MessageModel
-from rest_framework.serializers import ModelSerializer, CharField, DateTimeField
+from rest_framework.serializers import ModelSerializer, CharField, DateTimeField, IntegerField
+
+User = get_user_model()
 
 
 class MessageModelSerializer(ModelSerializer):
@@ -26,6 +28,7 @@ class MessageModelSerializer(ModelSerializer):
 class UserModelSerializer(ModelSerializer):
     latest_message = CharField()
     timestamp = DateTimeField()
+    unread_count = IntegerField()
     class Meta:
         model = User
-        fields = ('username', 'latest_message','timestamp')
+        fields = ('id', 'username', 'latest_message', 'timestamp', 'unread_count')
@@ -0,0 +1,154 @@
+"""
+Sessions en cache avec écriture différée en base.
+
+Avec ``SESSION_SAVE_EVERY_REQUEST`` (et ``CSRF_USE_SESSIONS``), chaque
+requête enregistre la session alors que, la plupart du temps, seule sa
+date d'expiration avance. Ce moteur garde la session en cache et ne
+l'écrit en base (puis en cache) que si :
+
+- ses données ont réellement changé ;
+- ou l'expiration repoussée dépasse de ``SESSION_WRITE_THRESHOLD``
+  secondes celle enregistrée en base.
+
+L'expiration côté serveur peut donc retarder d'au plus ce seuil sur celle
+du cookie. Les écritures faites et évitées sont comptées dans le cache
+(voir ``write_stats`` et la commande ``session_write_stats``).
+"""
+import hashlib
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import caches
+
+logger = logging.getLogger('django.contrib.sessions')
+
+KEY_PREFIX = 'core.sessions.'
+DEFAULT_WRITE_THRESHOLD = 60 * 60
+STATS_KEYS = {
+    'writes': 'core.sessions.stats:writes',
+    'skipped': 'core.sessions.stats:skipped',
+}
+STATS_TTL = 7 * 24 * 60 * 60
+
+
+def _count(cache, name) -> None:
+    key = STATS_KEYS[name]
+    try:
+        cache.add(key, 0, STATS_TTL)
+        cache.incr(key)
+    except Exception:
+        pass
+
+
+def write_stats() -> dict:
+    """Écritures faites et évitées depuis la dernière remise à zéro."""
+    cache = caches[settings.SESSION_CACHE_ALIAS]
+    values = cache.get_many(STATS_KEYS.values())
+    stats = {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
+    total = stats['writes'] + stats['skipped']
+    stats['skipped_ratio'] = round(stats['skipped'] / total, 4) if total else 0.0
+    return stats
+
+
+def reset_write_stats() -> None:
+    caches[settings.SESSION_CACHE_ALIAS].delete_many(STATS_KEYS.values())
+
+
+class SessionStore(DBStore):
+    """Session en cache, écrite en base seulement quand c'est nécessaire."""
+
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        self._cache = caches[settings.SESSION_CACHE_ALIAS]
+        self.write_threshold = getattr(settings, 'SESSION_WRITE_THRESHOLD', DEFAULT_WRITE_THRESHOLD)
+        # Empreinte des données et expiration telles qu'enregistrées en base
+        self._stored_digest = None
+        self._stored_expiry = None
+        super().__init__(session_key)
+
+    @property
+    def cache_key(self):
+        return self.cache_key_prefix + self._get_or_create_session_key()
+
+    def _digest(self, data) -> bytes:
+        return hashlib.blake2b(self.serializer().dumps(data), digest_size=16).digest()
+
+    def load(self):
+        try:
+            entry = self._cache.get(self.cache_key)
+        except Exception:
+            entry = None
+
+        if entry is None:
+            s = self._get_session_from_db()
+            if not s:
+                return {}
+            data = self.decode(s.session_data)
+            entry = (data, s.expire_date.timestamp())
+            self._cache.set(self.cache_key, entry, self.get_expiry_age(expiry=s.expire_date))
+
+        data, self._stored_expiry = entry
+        self._stored_digest = self._digest(data)
+        return data
+
+    def _needs_write(self) -> bool:
+        # Charge la session si elle n'a pas été lue pendant la requête
+        digest = self._digest(self._session)
+        if self._stored_digest is None or digest != self._stored_digest:
+            return True
+        return time.time() + self.get_expiry_age() - self._stored_expiry >= self.write_threshold
+
+    def save(self, must_create=False):
+        if not must_create and self.session_key is not None and not self._needs_write():
+            _count(self._cache, 'skipped')
+            return
+        super().save(must_create)
+        expiry = self.get_expiry_date().timestamp()
+        try:
+            self._cache.set(self.cache_key, (self._session, expiry), self.get_expiry_age())
+        except Exception:
+            logger.exception("Error saving to cache (%s)", self._cache)
+        self._stored_digest = self._digest(self._session)
+        self._stored_expiry = expiry
+        _count(self._cache, 'writes')
+
+    def exists(self, session_key):
+        return (
+            session_key
+            and (self.cache_key_prefix + session_key) in self._cache
+            or super().exists(session_key)
+        )
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        self._cache.delete(self.cache_key_prefix + session_key)
+
+    def flush(self):
+        self.clear()
+        self.delete(self.session_key)
+        self._session_key = None
+        self._stored_digest = self._stored_expiry = None
+
+    # Les variantes asynchrones passent par les versions synchrones
+    async def aload(self):
+        return await sync_to_async(self.load)()
+
+    async def asave(self, must_create=False):
+        await sync_to_async(self.save)(must_create)
+
+    async def aexists(self, session_key):
+        return await sync_to_async(self.exists)(session_key)
+
+    async def adelete(self, session_key=None):
+        await sync_to_async(self.delete)(session_key)
+
+    async def aflush(self):
+        await sync_to_async(self.flush)()
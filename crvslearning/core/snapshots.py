@@ -0,0 +1,48 @@
+"""
+Instantanés versionnés conservés en cache.
+
+Chaque objet (une évaluation, une leçon...) possède un numéro de version en
+cache. L'instantané est stocké sous une clé qui inclut cette version : il
+suffit d'incrémenter la version pour que toutes les lectures suivantes
+reconstruisent un instantané neuf, sans avoir à supprimer l'ancien.
+"""
+import time
+
+from django.core.cache import cache
+
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+VERSION_KEY = "snapshot:{namespace}:{object_id}:version"
+SNAPSHOT_KEY = "snapshot:{namespace}:{object_id}:v{version}"
+
+
+def get_version(namespace: str, object_id) -> int:
+    key = VERSION_KEY.format(namespace=namespace, object_id=object_id)
+    version = cache.get(key)
+    if version is None:
+        # Une version initiale basée sur l'horloge évite de relire un ancien
+        # instantané si la clé de version a été évincée du cache.
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace: str, object_id) -> None:
+    key = VERSION_KEY.format(namespace=namespace, object_id=object_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), None)
+
+
+def get_snapshot(namespace: str, object_id, builder, timeout=SNAPSHOT_TIMEOUT):
+    """
+    Retourne l'instantané courant de ``object_id``, construit par
+    ``builder(object_id)`` si absent du cache.
+    """
+    version = get_version(namespace, object_id)
+    key = SNAPSHOT_KEY.format(namespace=namespace, object_id=object_id, version=version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = builder(object_id)
+        cache.set(key, snapshot, timeout)
+    return snapshot
@@ -59,6 +59,10 @@ function initWebSocket() {
                 // Mettre à jour la liste des utilisateurs dans tous les cas
                 updateUserList(message);
                 
+            } else if (data.type === 'notification') {
+                // Mettre à jour le badge des notifications non lues
+                const badge = $('#notification-badge');
+                badge.text(data.unread_count).toggle(data.unread_count > 0);
             } else if (data.type === 'connection_established') {
                 console.log('WebSocket connection confirmed:', data);
             } else {
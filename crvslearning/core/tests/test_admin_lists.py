@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect, ForeignKeyRawIdWidget
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.test import RequestFactory, TestCase
+
+from core.admin_lists import ScalableAdminMixin, keyset_page
+from courses.models import Category, Course
+from tracking.models import ActivityLog
+
+
+class AdminListsTestCase(TestCase):
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.request = RequestFactory().get('/')
+        self.request.user = self.admin_user
+
+    def test_keyset_pages(self):
+        ids = [Course.objects.create(title=f'C{i}', description='d', created_by=self.admin_user).pk for i in range(5)]
+        queryset = Course.objects.all()
+        page, next_key, previous_key = keyset_page(queryset, size=2)
+        self.assertEqual([c.pk for c in page], [ids[4], ids[3]])
+        self.assertIsNone(previous_key)
+        page, next_key, previous_key = keyset_page(queryset, after=next_key, size=2)
+        self.assertEqual([c.pk for c in page], [ids[2], ids[1]])
+        page, _, previous_key = keyset_page(queryset, before=previous_key, size=2)
+        self.assertEqual([c.pk for c in page], [ids[4], ids[3]])
+        self.assertIsNone(previous_key)
+
+    def test_large_table_admins_are_scalable(self):
+        # Petite table de référence : listes déroulantes conservées
+        self.assertNotIsInstance(admin.site._registry[Category], ScalableAdminMixin)
+        model_admin = admin.site._registry[ActivityLog]
+        self.assertIsInstance(model_admin, ScalableAdminMixin)
+        self.assertEqual(model_admin.get_list_select_related(self.request), ('user', 'course', 'lesson'))
+        # L'admin des utilisateurs a des champs de recherche : autocomplétion
+        self.assertIn('user', model_admin.get_autocomplete_fields(self.request))
+        form = model_admin.get_form(self.request)
+        self.assertIsInstance(form.base_fields['user'].widget.widget, AutocompleteSelect)
+        # Pas de champ de recherche sur l'admin des leçons : saisie de l'id
+        self.assertIsInstance(form.base_fields['lesson'].widget.widget, ForeignKeyRawIdWidget)
+
+    def test_changelist_without_exact_count(self):
+        Course.objects.create(title='C', description='d', created_by=self.admin_user)
+        for _ in range(3):
+            ActivityLog.objects.create(user=self.admin_user, action='login')
+        self.client.force_login(self.admin_user)
+        response = self.client.get('/admin/tracking/activitylog/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['cl'].full_result_count)
+
+    def test_crud_model_list_keyset(self):
+        from users import admin_crud_views
+        for i in range(30):
+            ActivityLog.objects.create(user=self.admin_user, action='login')
+        with mock.patch.object(admin_crud_views, 'render', lambda request, template, context: context):
+            context = admin_crud_views.model_list(self.request, 'tracking', 'activitylog')
+            self.assertEqual(len(context['rows']), 25)
+            self.assertEqual(context['rows'][0][1][2], 'Connexion')
+            request = RequestFactory().get('/', {'after': context['next_key']})
+            request.user = self.admin_user
+            context = admin_crud_views.model_list(request, 'tracking', 'activitylog')
+        self.assertEqual(len(context['rows']), 5)
+        self.assertIsNone(context['next_key'])
+        self.assertEqual(context['total_count'], 30)
+
+    def test_crud_views_follow_model_admin(self):
+        from users import admin_crud_views
+        staff = get_user_model().objects.create_user('staff', is_staff=True)
+        request = RequestFactory().get('/')
+        request.user = staff
+        with self.assertRaises(Http404):
+            admin_crud_views.model_list(request, 'tracking', 'activitylog')
+
+        with mock.patch.object(admin_crud_views, 'render', lambda request, template, context: context):
+            context = admin_crud_views.model_add(self.request, 'evaluations', 'attempt')
+        # Champs en lecture seule de l'admin exclus du formulaire
+        self.assertNotIn('score', context['form'].fields)
+        self.assertNotIn('passed', context['form'].fields)
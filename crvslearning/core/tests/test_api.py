@@ -1,72 +1,53 @@
-from django.contrib.auth.models import User
+from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from core.models import MessageModel
+
 
 class MessageApiTestCase(APITestCase):
     def setUp(self):
+        User = get_user_model()
         self.test_user1 = User.objects.create(username='u1')
-        self.test_user1.set_password('u1')
-        self.test_user1.save()
-        self.test_user2 = User.objects.create(username='u2', password='u2')
-        self.test_user2.set_password('u2')
-        self.test_user2.save()
-        self.test_user3 = User.objects.create(username='u3', password='u3')
-        self.test_user3.set_password('u3')
-        self.test_user3.save()
+        self.test_user2 = User.objects.create(username='u2')
+        self.test_user3 = User.objects.create(username='u3')
+        self.message = MessageModel.objects.create(user=self.test_user1, recipient=self.test_user2, body='hello')
+        self.detail_url = reverse('message-api-detail', kwargs={'pk': self.message.pk})
 
     def test_list_request(self):
-        self.login_user1()
+        self.client.force_login(self.test_user1)
         response = self.client.get(reverse('message-api-list'), format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.logout()
-
-    def test_send_message_unauth(self):
-        url = reverse('message-api-list')
-        message = {'recipient': 'u1', 'body': 'No auth!'}
-        response = self.client.post(url, message, format='json')
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual([m['body'] for m in response.data['results']], ['hello'])
 
-    def test_send_message(self):
-        self.login_user1()
-        url = reverse('message-api-list')
-        message = {'recipient': 'u2', 'body': 'hello'}
-        response = self.client.post(url, message, format='json')
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.logout()
+    def test_anonymous_rejected(self):
+        # Authentification par session : 403 plutôt que 401
+        response = self.client.get(reverse('message-api-list'), format='json')
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+        response = self.client.get(self.detail_url, format='json')
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
 
     def test_read_message(self):
-        self.login_user1()
-        url = reverse('message-api-list')
-        message = {'recipient': 'u2', 'body': 'hello'}
-        response = self.client.post(url, message, format='json')
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.logout()
-        # Change user
-        self.login_user2()
-        url = reverse('message-api-detail', kwargs={'pk': 1})
-        response = self.client.get(url, format='json')
+        self.client.force_login(self.test_user2)
+        response = self.client.get(self.detail_url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['body'], 'hello')
-        self.logout()
-        # Change to another user (not in conversation)
-        self.login_user3()
-        response = self.client.get(url, format='json')
+        # Utilisateur hors de la conversation
+        self.client.force_login(self.test_user3)
+        response = self.client.get(self.detail_url, format='json')
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
-        self.logout()
-
-    def login_user1(self):
-        self.login('u1', 'u1')
-
-    def login_user2(self):
-        self.login('u2', 'u2')
-
-    def login_user3(self):
-        self.login('u3', 'u3')
-
-    def login(self, username, password):
-        self.assertTrue(self.client.login(username=username, password=password))
 
-    def logout(self):
-        self.client.logout()
+    def test_write_methods_not_allowed(self):
+        self.client.force_login(self.test_user1)
+        response = self.client.post(reverse('message-api-list'), {'recipient': 'u2', 'body': 'x'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.client.force_login(self.test_user3)
+        response = self.client.delete(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertTrue(MessageModel.objects.filter(pk=self.message.pk).exists())
+
+    def test_only_message_history_is_mounted(self):
+        self.client.force_login(self.test_user1)
+        self.assertEqual(self.client.get('/api/v1/user/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/simpleui/').status_code, status.HTTP_404_NOT_FOUND)
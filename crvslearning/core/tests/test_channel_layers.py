@@ -0,0 +1,72 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from core.channel_layers import LocalSocketChannelLayer
+
+
+class LocalSocketChannelLayerTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'hub.sock')
+
+    def run_in_other_process(self, code):
+        script = textwrap.dedent(f"""
+            import asyncio
+            from core.channel_layers import LocalSocketChannelLayer
+            layer = LocalSocketChannelLayer(path={self.path!r})
+            asyncio.run({code})
+        """)
+        subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, check=True, timeout=30)
+
+    async def test_group_send_from_other_process(self):
+        layer = LocalSocketChannelLayer(path=self.path)
+        channel = await layer.new_channel()
+        await layer.group_add('classe', channel)
+
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.run_in_other_process, "layer.group_send('classe', {'type': 'chat.message', 'n': 1})"
+        )
+        message = await asyncio.wait_for(layer.receive(channel), 5)
+        self.assertEqual(message, {'type': 'chat.message', 'n': 1})
+
+        await layer.group_discard('classe', channel)
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.run_in_other_process, "layer.group_send('classe', {'type': 'chat.message', 'n': 2})"
+        )
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(layer.receive(channel), 0.3)
+
+    async def test_direct_send_to_channel_of_other_process(self):
+        layer = LocalSocketChannelLayer(path=self.path)
+        channel = await layer.new_channel()
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.run_in_other_process, f"layer.send({channel!r}, {{'type': 'ping'}})"
+        )
+        self.assertEqual(await asyncio.wait_for(layer.receive(channel), 5), {'type': 'ping'})
+
+    async def test_group_sizes_forget_closed_connections(self):
+        layer = LocalSocketChannelLayer(path=self.path)
+        for _ in range(2):
+            await layer.group_add('classe.user_1', await layer.new_channel())
+        # Autre client du hub (un autre processus, par exemple)
+        other = LocalSocketChannelLayer(path=self.path)
+        await other.group_add('classe.user_2', await other.new_channel())
+        # Aller-retour sur la connexion de l'autre client : son ajout est traité
+        await other.group_sizes('classe.')
+        self.assertEqual(await layer.group_sizes('classe.'), {'classe.user_1': 2, 'classe.user_2': 1})
+
+        # Connexion fermée (processus arrêté) : ses canaux sont oubliés
+        await other.close()
+        for _ in range(50):
+            sizes = await layer.group_sizes('classe.')
+            if 'classe.user_2' not in sizes:
+                break
+            await asyncio.sleep(0.05)
+        self.assertEqual(sizes, {'classe.user_1': 2})
@@ -0,0 +1,88 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from core.api import UserModelViewSet
+from core.conversations import rebuild_summaries
+from core.models import ChatRoom, ConversationSummary, MessageModel
+
+
+class ConversationSummaryTestCase(APITestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.alice = User.objects.create(username='alice')
+        self.bob = User.objects.create(username='bob')
+        self.carol = User.objects.create(username='carol')
+
+    def summary(self, user, partner):
+        return ConversationSummary.objects.get(user=user, partner=partner)
+
+    def test_summaries_follow_messages_and_reads(self):
+        MessageModel.objects.create(user=self.alice, recipient=self.bob, body='salut')
+        MessageModel.objects.create(user=self.alice, recipient=self.bob, body='ça va ?')
+        self.assertEqual(self.summary(self.bob, self.alice).unread_count, 2)
+        self.assertEqual(self.summary(self.alice, self.bob).unread_count, 0)
+        self.assertEqual(self.summary(self.bob, self.alice).snippet, 'ça va ?')
+
+        first = MessageModel.objects.order_by('id').first()
+        self.assertTrue(first.mark_as_read(self.bob))
+        self.assertEqual(self.summary(self.bob, self.alice).unread_count, 1)
+        # Le filigrane ne recule pas
+        self.assertFalse(first.mark_as_read(self.bob))
+
+        expected = {
+            (s.user_id, s.partner_id): (s.last_message_id, s.unread_count)
+            for s in ConversationSummary.objects.all()
+        }
+        rebuild_summaries()
+        rebuilt = {
+            (s.user_id, s.partner_id): (s.last_message_id, s.unread_count)
+            for s in ConversationSummary.objects.all()
+        }
+        self.assertEqual(rebuilt, expected)
+
+    def test_room_unread_count_follows_watermark(self):
+        room = ChatRoom.objects.create()
+        first = MessageModel.objects.create(user=self.alice, recipient=self.bob, chat=room, body='un')
+        MessageModel.objects.create(user=self.alice, recipient=self.bob, chat=room, body='deux')
+        self.assertEqual(room.get_unread_count(self.bob), 2)
+        first.mark_as_read(self.bob)
+        self.assertEqual(room.get_unread_count(self.bob), 1)
+        self.assertEqual(room.get_unread_count(self.alice), 0)
+
+    def test_user_list_sorted_by_recency(self):
+        MessageModel.objects.create(user=self.carol, recipient=self.alice, body='vieux')
+        MessageModel.objects.create(user=self.bob, recipient=self.alice, body='récent')
+        # La liste des utilisateurs n'est pas montée : appel direct de la vue
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, self.alice)
+        with CaptureQueriesContext(connection) as queries:
+            data = UserModelViewSet.as_view({'get': 'list'})(request).data
+        user_queries = [q for q in queries if 'users_customuser' in q['sql'] and 'conversation' in q['sql']]
+        self.assertEqual(len(user_queries), 1)
+        self.assertEqual([u['username'] for u in data], ['bob', 'carol'])
+        self.assertEqual(data[0]['latest_message'], 'récent')
+        self.assertEqual(data[0]['unread_count'], 1)
+
+    def test_read_receipt_is_one_update(self):
+        messages = [
+            MessageModel.objects.create(user=self.alice, recipient=self.bob, body=str(i))
+            for i in range(50)
+        ]
+        self.client.force_login(self.bob)
+        with mock.patch('core.delivery.send_frames') as send_frames:
+            with self.captureOnCommitCallbacks(execute=True):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.post(reverse('message-api-read'), {'target': 'alice'})
+        writes = [q for q in queries if q['sql'].startswith('UPDATE "core_')]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(response.json()['last_read_id'], messages[-1].id)
+        self.assertEqual(self.summary(self.bob, self.alice).unread_count, 0)
+        frame = json.loads(send_frames.call_args.args[0][f'user_{self.alice.id}'][0])
+        self.assertEqual(frame['last_read_id'], messages[-1].id)
@@ -0,0 +1,64 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase
+
+from core.models import ChatRoom, MessageModel
+
+
+class DeliveryTestCase(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.alice = User.objects.create(username='alice')
+        self.bob = User.objects.create(username='bob')
+        self.room = ChatRoom.objects.create()
+
+    def test_messages_sent_after_commit_in_one_batch(self):
+        with mock.patch('core.delivery.send_frames') as send_frames:
+            with self.captureOnCommitCallbacks(execute=True):
+                for body in ('un', 'deux'):
+                    MessageModel.objects.create(user=self.alice, recipient=self.bob, chat=self.room, body=body)
+                send_frames.assert_not_called()
+        send_frames.assert_called_once()
+        frames = send_frames.call_args.args[0]
+        self.assertEqual(set(frames), {f'user_{self.alice.id}', f'user_{self.bob.id}'})
+        bodies = [json.loads(f)['message']['body'] for f in frames[f'user_{self.bob.id}']]
+        self.assertEqual(bodies, ['un', 'deux'])
+
+    def test_rolled_back_savepoint_is_not_sent(self):
+        with mock.patch('core.delivery.send_frames') as send_frames:
+            with self.captureOnCommitCallbacks(execute=True):
+                MessageModel.objects.create(user=self.alice, recipient=self.bob, body='gardé')
+                try:
+                    with transaction.atomic():
+                        MessageModel.objects.create(user=self.alice, recipient=self.bob, body='annulé')
+                        raise ValueError
+                except ValueError:
+                    pass
+        frames = send_frames.call_args.args[0][f'user_{self.bob.id}']
+        self.assertEqual([json.loads(f)['message']['body'] for f in frames], ['gardé'])
+
+    def test_batch_of_rolled_back_savepoint_is_dropped(self):
+        with mock.patch('core.delivery.send_frames') as send_frames:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        MessageModel.objects.create(user=self.alice, recipient=self.bob, body='annulé')
+                        raise ValueError
+                except ValueError:
+                    pass
+                with transaction.atomic():
+                    MessageModel.objects.create(user=self.alice, recipient=self.bob, body='envoyé')
+        send_frames.assert_called_once()
+        frames = send_frames.call_args.args[0][f'user_{self.bob.id}']
+        self.assertEqual([json.loads(f)['message']['body'] for f in frames], ['envoyé'])
+
+    def test_room_timestamp_bumped(self):
+        before = self.room.updated_at
+        message = MessageModel.objects.create(user=self.alice, recipient=self.bob, chat=self.room, body='x')
+        self.room.refresh_from_db()
+        self.assertGreaterEqual(self.room.updated_at, before)
+        self.assertEqual(self.room.updated_at, message.timestamp)
@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import MessageModel
+
+
+class MessageHistoryTestCase(APITestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.alice = User.objects.create(username='alice')
+        self.bob = User.objects.create(username='bob')
+        self.ids = [
+            MessageModel.objects.create(user=self.alice, recipient=self.bob, body=f'm{i}').id
+            for i in range(7)
+        ]
+        self.client.force_login(self.alice)
+        self.url = reverse('message-api-list')
+
+    def test_pages_walk_backwards_and_forwards(self):
+        page = self.client.get(self.url, {'target': 'bob', 'page_size': 3}).json()
+        self.assertEqual([m['id'] for m in page['results']], self.ids[:-4:-1])
+        self.assertIsNone(page['previous'])
+
+        older = self.client.get(page['next']).json()
+        self.assertEqual([m['id'] for m in older['results']], self.ids[3:0:-1])
+
+        newer = self.client.get(older['previous']).json()
+        self.assertEqual([m['id'] for m in newer['results']], self.ids[:-4:-1])
+
+    def test_new_messages_do_not_shift_pages(self):
+        page = self.client.get(self.url, {'target': 'bob', 'page_size': 3}).json()
+        MessageModel.objects.create(user=self.bob, recipient=self.alice, body='nouveau')
+        older = self.client.get(page['next']).json()
+        self.assertEqual([m['id'] for m in older['results']], self.ids[3:0:-1])
+
+    def test_unknown_anchor(self):
+        response = self.client.get(self.url, {'before': 999999})
+        self.assertEqual(response.status_code, 404)
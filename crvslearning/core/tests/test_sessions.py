@@ -0,0 +1,44 @@
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core import sessions
+from core.sessions import SessionStore
+
+
+@override_settings(SESSION_WRITE_THRESHOLD=3600)
+class SessionStoreTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        store = SessionStore()
+        store['user'] = 'alice'
+        store.create()
+        self.key = store.session_key
+
+    def reload(self):
+        return SessionStore(self.key)
+
+    def test_unchanged_session_not_rewritten(self):
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                store = self.reload()
+                self.assertEqual(store['user'], 'alice')
+                store.save()
+        self.assertEqual(sessions.write_stats()['skipped'], 3)
+
+    def test_changed_data_written_through(self):
+        store = self.reload()
+        store['user'] = 'bob'
+        store.save()
+        cache.clear()
+        self.assertEqual(self.reload()['user'], 'bob')
+        self.assertEqual(Session.objects.count(), 1)
+
+    def test_expiry_refresh_past_threshold(self):
+        expire_date = Session.objects.get().expire_date
+        with mock.patch('core.sessions.time.time', return_value=expire_date.timestamp() + 1):
+            self.reload().save()
+        self.assertGreater(Session.objects.get().expire_date, expire_date)
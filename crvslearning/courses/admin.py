@@ -5,7 +5,8 @@ from django.contrib import admin
 
 from django.apps import apps
 from django.contrib.admin.sites import AlreadyRegistered
-from .models import Course, Module, Lesson, UserLessonProgress, Category, Enrollment
+from .models import Course, Module, Lesson, UserLessonProgress, Category, Enrollment, LessonProgress, VideoView
+from core.admin_lists import ScalableAdminMixin
 
 
 @admin.register(Category)
@@ -77,11 +78,23 @@ class EnrollmentAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'course__title')
 
 @admin.register(UserLessonProgress)
-class UserLessonProgressAdmin(admin.ModelAdmin):
+class UserLessonProgressAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'lesson', 'is_completed', 'completed_at')
     list_filter = ('is_completed', 'completed_at')
     search_fields = ('user__username', 'lesson__title')
 
+@admin.register(LessonProgress)
+class LessonProgressAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'user', 'lesson', 'is_completed', 'completed_at')
+    list_filter = ('is_completed',)
+    search_fields = ('user__username',)
+
+
+@admin.register(VideoView)
+class VideoViewAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'video', 'user', 'ip_address', 'created_at')
+    search_fields = ('user__username', 'ip_address')
+
 # Auto-register any other models in the app without a custom admin
 app_config = apps.get_app_config('courses')
 for model in app_config.get_models():
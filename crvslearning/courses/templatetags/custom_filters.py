@@ -1,5 +1,6 @@
 from django import template
 from notifications.models import Notification
+from notifications.service import unread_count as cached_unread_count
 
 register = template.Library()
 
@@ -31,4 +32,4 @@ def unread_count(user):
     """
     if not hasattr(user, 'notifications'):
         return 0
-    return user.notifications.filter(is_read=False).count()
+    return cached_unread_count(user.pk)
@@ -10,6 +10,7 @@ from django.views.generic import DetailView
 from .models import Course, Module, Lesson, Enrollment, Comment, CourseRating, CourseLike, LessonVideo, Category, CourseCompletion
 from evaluations.models import EvaluationLevel
 from exercices.models import UserExerciseAttempt
+from exercices.snapshots import get_exercise_set
 from certifications.models import Certification
 from .forms import CourseForm, ModuleForm, LessonForm
 from django.utils import timezone
@@ -418,19 +419,19 @@ def lesson_detail(request, lesson_id):
             except Exception:
                 pass
 
-    # Get user exercise attempts
+    # Exercices depuis l'instantané en cache, puis tentatives de l'utilisateur
+    exercises = get_exercise_set(lesson.id)
     user_exercise_attempts = {}
-    if request.user.is_authenticated:
-        from exercices.models import UserExerciseAttempt
+    if request.user.is_authenticated and exercises:
         attempts = UserExerciseAttempt.objects.filter(
             user=request.user,
-            exercise__in=lesson.exercises.all()
-        ).select_related('selected_choice', 'exercise')
-        
-        for attempt in attempts:
-            user_exercise_attempts[attempt.exercise.id] = {
-                'choice_id': attempt.selected_choice.id,
-                'is_correct': attempt.is_correct
+            exercise_id__in=[e['id'] for e in exercises]
+        ).values_list('exercise_id', 'selected_choice_id', 'is_correct')
+
+        for exercise_id, choice_id, is_correct in attempts:
+            user_exercise_attempts[exercise_id] = {
+                'choice_id': choice_id,
+                'is_correct': is_correct
             }
 
     # Comments and ratings context
@@ -481,6 +482,7 @@ def lesson_detail(request, lesson_id):
         'lesson_videos': lesson_videos,
         'active_video_url': active_video_url,
         'combined_playlist': combined_playlist,
+        'exercises': exercises,
         'user_exercise_attempts': user_exercise_attempts,
         'lesson_completed': lesson_completed,
         'video_views_count': video_views_count,
@@ -795,16 +797,9 @@ def search(request):
         
         # Recherche de formateurs (chaînes)
         if search_type in ['all', 'channels']:
-            from django.db.models import Subquery, OuterRef, Count, Q, Case, When, Value, IntegerField
+            from django.db.models import Count, Q, Case, When, Value, IntegerField
             from django.db.models.functions import Concat
             
-            # Sous-requête pour compter les abonnés actifs
-            from subscriptions.models import Subscription
-            active_subscribers = Subscription.objects.filter(
-                trainer=OuterRef('pk'),
-                is_active=True
-            ).values('trainer').annotate(count=Count('id')).values('count')
-            
             # Récupérer tous les formateurs correspondant à la recherche
             instructor_results = User.objects.filter(
                 Q(username__icontains=q) | 
@@ -817,7 +812,6 @@ def search(request):
             ).annotate(
                 full_name=Concat('first_name', Value(' '), 'last_name'),
                 courses_count=Count('courses', distinct=True),
-                subscribers_count=Subquery(active_subscribers, output_field=IntegerField()),
                 # Score de pertinence
                 relevance=Case(
                     When(username__iexact=q, then=Value(100)),
@@ -829,11 +823,6 @@ def search(request):
                     output_field=IntegerField()
                 )
             ).order_by('-relevance', '-subscribers_count')
-            
-            # Remplacer None par 0 pour les formateurs sans abonnés
-            for instructor in instructor_results:
-                if instructor.subscribers_count is None:
-                    instructor.subscribers_count = 0
         
         # Recherche de cours
         if search_type in ['all', 'courses']:
@@ -954,7 +943,6 @@ def search(request):
             role='trainer'
         ).annotate(
             courses_count=Count('course', distinct=True),
-            subscribers_count=Count('subscribers', filter=Q(subscriptions__is_active=True), distinct=True)
         ).order_by('-subscribers_count', '-courses_count')[:5]
         
         if suggested_instructors.exists():
@@ -109,6 +109,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "notifications.context_processors.unread_notifications",
             ],
         },
     },
@@ -192,7 +193,14 @@ MEDIA_ROOT = BASE_DIR / "media"
 # ==================================================
 # SESSIONS & CSRF (PROD SAFE)
 # ==================================================
-SESSION_ENGINE = "django.contrib.sessions.backends.db"
+# Avec Redis : sessions en cache, écrites en base seulement si elles changent
+# ou si l'expiration avance de plus de SESSION_WRITE_THRESHOLD secondes.
+# Sans cache partagé, un cache local par processus garderait une session
+# fermée (déconnexion) valide dans les autres workers : sessions en base.
+SESSION_ENGINE = (
+    "core.sessions" if os.environ.get("REDIS_URL") else "django.contrib.sessions.backends.db"
+)
+SESSION_WRITE_THRESHOLD = int(os.getenv("SESSION_WRITE_THRESHOLD", 3600))
 SESSION_COOKIE_NAME = "crvslearning_sessionid"
 SESSION_COOKIE_AGE = 1209600
 # SESSION_COOKIE_SECURE = not DEBUG
@@ -239,12 +247,56 @@ if REDIS_URL:
         }
     }
 else:
+    # Sans Redis : hub local sur socket Unix partagé par les workers
     CHANNEL_LAYERS = {
         "default": {
-            "BACKEND": "channels.layers.InMemoryChannelLayer",
+            "BACKEND": "core.channel_layers.LocalSocketChannelLayer",
+            "CONFIG": {
+                # Par défaut : core.channel_layers.DEFAULT_PATH (BASE_DIR/run/)
+                "path": os.environ.get("CHANNELS_SOCKET_PATH"),
+            },
+        }
+    }
+
+# ==================================================
+# CACHE
+# ==================================================
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
         }
     }
 
+# ==================================================
+# CELERY
+# ==================================================
+
+if REDIS_URL:
+    CELERY_BROKER_URL = REDIS_URL
+else:
+    # Sans broker, les tâches s'exécutent de façon synchrone
+    CELERY_TASK_ALWAYS_EAGER = True
+
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+CELERY_BEAT_SCHEDULE = {
+    # Report en base des dernières activités (users.presence)
+    "flush-presence": {
+        "task": "users.tasks.flush_presence",
+        "schedule": 120.0,
+    },
+}
+
 # ==================================================
 # MISC
 # ==================================================
@@ -254,3 +306,6 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 MEETING_BASE_URL = os.environ.get(
     "MEETING_BASE_URL", "https://meet.etatcivil.cm"
 )
+
+# Clé HMAC des codes de certificat (SECRET_KEY par défaut)
+CERTIFICATE_SIGNING_KEY = os.environ.get("CERTIFICATE_SIGNING_KEY", "")
@@ -22,6 +22,7 @@ urlpatterns = [
     path('exercices/', include('exercices.urls', namespace='exercises')),
     path('sms/', include('sms.urls', namespace='sms')),
     path('tracking/', include('tracking.urls', namespace='tracking')),
+    path('api/v1/', include('core.api_urls')),
     path('dashboard/', lambda request: redirect('courses:all_courses')),
     re_path(r'^@(?P<username>[\w.@+-]+)/$', user_views.instructor_public, name='handle_profile'),
     re_path(r'^@(?P<username>[\w.@+-]+)/dashboard/$', user_views.learner_dashboard_handle, name='learner_dashboard_handle'),
@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from .models import EvaluationLevel, Attempt, EvaluationQuestion, EvaluationChoice, AttemptAnswer
+from core.admin_lists import ScalableAdminMixin
+
+from .models import EvaluationLevel, Attempt, EvaluationQuestion, EvaluationChoice, AttemptAnswer, ItemAnalysis
 
 
 class EvaluationChoiceInline(admin.TabularInline):
@@ -36,10 +38,14 @@ class AttemptAnswerInline(admin.TabularInline):
 
 
 @admin.register(Attempt)
-class AttemptAdmin(admin.ModelAdmin):
+class AttemptAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ("user", "evaluation", "score", "passed", "created_at")
     list_filter = ("evaluation", "passed")
     readonly_fields = ("user", "evaluation", "score", "passed", "created_at")
     inlines = [AttemptAnswerInline]
 
 
+@admin.register(ItemAnalysis)
+class ItemAnalysisAdmin(admin.ModelAdmin):
+    list_display = ("evaluation", "attempts_count", "updated_at")
+    readonly_fields = ("evaluation", "last_attempt_id", "attempts_count", "stats", "results", "updated_at")
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class EvaluationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'evaluations'
+
+    def ready(self):
+        # Import des signaux
+        import evaluations.signals
@@ -0,0 +1,94 @@
+"""
+Moteur de correction des évaluations QCM.
+
+Le corrigé de chaque évaluation (question -> choix corrects et points) est
+dérivé de l'instantané en cache du jeu de questions. Une soumission est notée
+entièrement en mémoire et enregistrée dans une seule transaction.
+"""
+from dataclasses import dataclass
+
+from django.db import transaction
+
+from .models import Attempt, AttemptAnswer
+from .snapshots import get_question_set
+from .tasks import schedule_item_analysis
+
+
+@dataclass(frozen=True)
+class QuestionKey:
+    question_id: int
+    points: int
+    correct_choice_ids: frozenset
+    choice_ids: frozenset
+
+
+def get_answer_key(evaluation_id: int) -> tuple:
+    """Construit le corrigé à partir de l'instantané en cache du jeu de questions."""
+    return tuple(
+        QuestionKey(
+            question_id=q['id'],
+            points=q['points'],
+            correct_choice_ids=frozenset(c['id'] for c in q['choices'] if c['is_correct']),
+            choice_ids=frozenset(c['id'] for c in q['choices']),
+        )
+        for q in get_question_set(evaluation_id)
+    )
+
+
+def grade_submission(answer_key: tuple, data) -> dict:
+    """
+    Note une soumission en mémoire.
+
+    ``data`` est un mapping du type ``request.POST`` contenant ``q_<id>``.
+    Un choix absent, invalide ou n'appartenant pas à la question est ignoré.
+    """
+    total_points = sum(q.points for q in answer_key) or 1
+    earned_points = 0
+    selections = {}
+
+    for q in answer_key:
+        chosen = None
+        raw = data.get(f'q_{q.question_id}')
+        if raw:
+            try:
+                chosen = int(raw)
+            except (TypeError, ValueError):
+                chosen = None
+            if chosen not in q.choice_ids:
+                chosen = None
+        selections[q.question_id] = chosen
+        if chosen is not None and chosen in q.correct_choice_ids:
+            earned_points += q.points
+
+    percent = round((earned_points / total_points) * 100, 2)
+    return {
+        'earned': earned_points,
+        'total': total_points,
+        'percent': percent,
+        'selections': selections,
+    }
+
+
+def record_attempt(user, evaluation, data) -> Attempt:
+    """
+    Note la soumission puis enregistre la tentative et toutes ses réponses
+    dans une seule transaction (un INSERT pour la tentative, un
+    ``bulk_create`` pour les réponses).
+    """
+    answer_key = get_answer_key(evaluation.id)
+    result = grade_submission(answer_key, data)
+    percent = result['percent']
+
+    with transaction.atomic():
+        attempt = Attempt.objects.create(
+            user=user,
+            evaluation=evaluation,
+            score=percent,
+            passed=percent >= evaluation.threshold,
+        )
+        AttemptAnswer.objects.bulk_create([
+            AttemptAnswer(attempt=attempt, question_id=question_id, choice_id=choice_id)
+            for question_id, choice_id in result['selections'].items()
+        ])
+    schedule_item_analysis(evaluation.id)
+    return attempt
@@ -0,0 +1,181 @@
+"""
+Analyse d'items des évaluations QCM, vectorisée avec NumPy.
+
+Pour chaque question : difficulté (taux de bonnes réponses), discrimination
+(corrélation point-bisériale entre la réussite à la question et le score de
+la tentative) et taux de sélection de chaque choix (distracteurs).
+
+Les réponses sont chargées par lots de tentatives sous forme de tableaux et
+réduites en sommes cumulées (n, Σx, Σy, Σy², Σxy) conservées dans
+``ItemAnalysis.stats``. Une mise à jour ne traite donc que les tentatives
+arrivées depuis la précédente.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from core.snapshots import get_version
+
+from .models import Attempt, AttemptAnswer, ItemAnalysis
+from .snapshots import NAMESPACE, get_question_set
+
+BATCH_ATTEMPTS = 20000
+# Les tentatives plus récentes peuvent encore être en cours de validation
+SETTLE_DELAY = timedelta(seconds=60)
+
+TOO_EASY = 0.9
+TOO_HARD = 0.2
+LOW_DISCRIMINATION = 0.2
+
+_ROW = np.dtype([
+    ('question', np.int64),
+    ('choice', np.int64),
+    ('score', np.float64),
+])
+# n, Σx (bonnes réponses), Σy, Σy², Σxy, sans réponse
+_FIELDS = 6
+
+
+def _load_answers(evaluation_id: int, after_id: int, upto_id: int) -> np.ndarray:
+    rows = AttemptAnswer.objects.filter(
+        attempt__evaluation_id=evaluation_id,
+        attempt_id__gt=after_id,
+        attempt_id__lte=upto_id,
+    ).values_list('question_id', 'choice_id', 'attempt__score')
+    return np.fromiter(
+        ((q, c or 0, s) for q, c, s in rows.iterator(chunk_size=5000)),
+        dtype=_ROW,
+    )
+
+
+def _accumulate(stats: dict, answers: np.ndarray, correct_ids: np.ndarray) -> None:
+    if not answers.size:
+        return
+    x = np.isin(answers['choice'], correct_ids).astype(np.float64)
+    y = answers['score']
+    questions, idx = np.unique(answers['question'], return_inverse=True)
+    k = questions.size
+    sums = np.vstack([
+        np.bincount(idx, minlength=k).astype(np.float64),
+        np.bincount(idx, weights=x, minlength=k),
+        np.bincount(idx, weights=y, minlength=k),
+        np.bincount(idx, weights=y * y, minlength=k),
+        np.bincount(idx, weights=x * y, minlength=k),
+        np.bincount(idx, weights=(answers['choice'] == 0).astype(np.float64), minlength=k),
+    ]).T
+
+    per_question = stats.setdefault('questions', {})
+    for question_id, row in zip(questions.tolist(), sums.tolist()):
+        current = per_question.get(str(question_id), [0.0] * _FIELDS)
+        per_question[str(question_id)] = [a + b for a, b in zip(current, row)]
+
+    chosen = answers['choice'][answers['choice'] != 0]
+    choice_ids, counts = np.unique(chosen, return_counts=True)
+    per_choice = stats.setdefault('choices', {})
+    for choice_id, count in zip(choice_ids.tolist(), counts.tolist()):
+        per_choice[str(choice_id)] = per_choice.get(str(choice_id), 0) + count
+
+
+def compute_results(stats: dict, question_set: list) -> list:
+    """Calcule les indicateurs par question à partir des sommes cumulées."""
+    per_question = stats.get('questions', {})
+    per_choice = stats.get('choices', {})
+    sums = np.array(
+        [per_question.get(str(q['id']), [0.0] * _FIELDS) for q in question_set],
+        dtype=np.float64,
+    ).reshape(-1, _FIELDS)
+    n, sx, sy, syy, sxy, skipped = sums.T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        difficulty = np.where(n > 0, sx / n, np.nan)
+        numerator = n * sxy - sx * sy
+        denominator = np.sqrt((n * sx - sx * sx) * (n * syy - sy * sy))
+        discrimination = np.where(denominator > 0, numerator / denominator, np.nan)
+
+    results = []
+    for i, q in enumerate(question_set):
+        responses = int(n[i])
+        p = None if np.isnan(difficulty[i]) else round(float(difficulty[i]), 4)
+        r = None if np.isnan(discrimination[i]) else round(float(discrimination[i]), 4)
+        choices = []
+        correct_rate = 0.0
+        best_distractor_rate = 0.0
+        for c in q['choices']:
+            rate = per_choice.get(str(c['id']), 0) / responses if responses else 0.0
+            choices.append({'id': c['id'], 'text': c['text'], 'is_correct': c['is_correct'], 'rate': round(rate, 4)})
+            if c['is_correct']:
+                correct_rate = max(correct_rate, rate)
+            else:
+                best_distractor_rate = max(best_distractor_rate, rate)
+
+        flags = []
+        if p is not None and p >= TOO_EASY:
+            flags.append('too_easy')
+        if p is not None and p <= TOO_HARD:
+            flags.append('too_hard')
+        if r is not None and r < LOW_DISCRIMINATION:
+            flags.append('low_discrimination')
+        if responses and best_distractor_rate > correct_rate:
+            flags.append('misleading')
+
+        results.append({
+            'question_id': q['id'],
+            'text': q['text'],
+            'responses': responses,
+            'skipped_rate': round(float(skipped[i]) / responses, 4) if responses else 0.0,
+            'difficulty': p,
+            'discrimination': r,
+            'choices': choices,
+            'flags': flags,
+        })
+    return results
+
+
+def has_pending_attempts(analysis: ItemAnalysis) -> bool:
+    """Indique si des tentatives validées n'ont pas encore été analysées."""
+    return Attempt.objects.filter(
+        evaluation_id=analysis.evaluation_id,
+        id__gt=analysis.last_attempt_id,
+        created_at__lte=timezone.now() - SETTLE_DELAY,
+    ).exists()
+
+
+def refresh_item_analysis(evaluation_id: int, full: bool = False) -> ItemAnalysis:
+    """
+    Met à jour l'analyse d'items d'une évaluation avec les nouvelles
+    tentatives. L'analyse est reconstruite entièrement si ``full`` est vrai
+    ou si le corrigé a changé depuis la dernière mise à jour.
+    """
+    question_set = get_question_set(evaluation_id)
+    key_version = get_version(NAMESPACE, evaluation_id)
+    correct_ids = np.array(
+        [c['id'] for q in question_set for c in q['choices'] if c['is_correct']],
+        dtype=np.int64,
+    )
+
+    with transaction.atomic():
+        analysis, _ = ItemAnalysis.objects.select_for_update().get_or_create(evaluation_id=evaluation_id)
+        if full or analysis.stats.get('key_version') != key_version:
+            analysis.stats = {'key_version': key_version}
+            analysis.last_attempt_id = 0
+            analysis.attempts_count = 0
+
+        attempt_ids = list(
+            Attempt.objects.filter(
+                evaluation_id=evaluation_id,
+                id__gt=analysis.last_attempt_id,
+                created_at__lte=timezone.now() - SETTLE_DELAY,
+            ).order_by('id').values_list('id', flat=True)
+        )
+        for start in range(0, len(attempt_ids), BATCH_ATTEMPTS):
+            batch = attempt_ids[start:start + BATCH_ATTEMPTS]
+            answers = _load_answers(evaluation_id, analysis.last_attempt_id, batch[-1])
+            _accumulate(analysis.stats, answers, correct_ids)
+            analysis.last_attempt_id = batch[-1]
+            analysis.attempts_count += len(batch)
+
+        analysis.results = compute_results(analysis.stats, question_set)
+        analysis.save()
+    return analysis
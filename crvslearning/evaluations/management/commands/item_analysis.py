@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from evaluations.item_analysis import refresh_item_analysis
+from evaluations.models import EvaluationLevel
+
+
+class Command(BaseCommand):
+    help = "Refresh item analysis (difficulty, discrimination, distractors) for evaluations"
+
+    def add_arguments(self, parser):
+        parser.add_argument('evaluation_ids', nargs='*', type=int)
+        parser.add_argument('--full', action='store_true', help="Rebuild from all attempts instead of only new ones")
+
+    def handle(self, *args, **options):
+        evaluation_ids = options['evaluation_ids'] or list(
+            EvaluationLevel.objects.filter(is_active=True).values_list('id', flat=True)
+        )
+        for evaluation_id in evaluation_ids:
+            analysis = refresh_item_analysis(evaluation_id, full=options['full'])
+            self.stdout.write(f"Evaluation {evaluation_id}: {analysis.attempts_count} attempt(s) analysed")
+        self.stdout.write(self.style.SUCCESS('Item analysis refreshed.'))
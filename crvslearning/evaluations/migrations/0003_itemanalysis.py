@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluations', '0002_evaluationquestion_evaluationchoice_attemptanswer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_attempt_id', models.BigIntegerField(default=0)),
+                ('attempts_count', models.PositiveIntegerField(default=0)),
+                ('stats', models.JSONField(blank=True, default=dict)),
+                ('results', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('evaluation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='item_analysis', to='evaluations.evaluationlevel')),
+            ],
+        ),
+    ]
@@ -68,3 +68,21 @@ class AttemptAnswer(models.Model):
 
     def __str__(self):
         return f"Attempt#{self.attempt_id} - Q{self.question_id} -> {self.choice_id}"
+
+
+class ItemAnalysis(models.Model):
+    """
+    Analyse d'items d'une évaluation (difficulté, discrimination, distracteurs).
+
+    ``stats`` conserve des sommes cumulées par question afin que l'analyse
+    soit mise à jour de façon incrémentale avec les nouvelles tentatives.
+    """
+    evaluation = models.OneToOneField(EvaluationLevel, on_delete=models.CASCADE, related_name='item_analysis')
+    last_attempt_id = models.BigIntegerField(default=0)
+    attempts_count = models.PositiveIntegerField(default=0)
+    stats = models.JSONField(default=dict, blank=True)
+    results = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Analyse d'items - {self.evaluation}"
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import EvaluationChoice, EvaluationQuestion
+from .snapshots import bump_question_set
+
+
+@receiver([post_save, post_delete], sender=EvaluationQuestion)
+def bump_question_set_on_question_change(sender, instance, **kwargs):
+    """
+    Incrémente la version du jeu de questions lorsqu'une question est modifiée
+    """
+    bump_question_set(instance.evaluation_id)
+
+
+@receiver([post_save, post_delete], sender=EvaluationChoice)
+def bump_question_set_on_choice_change(sender, instance, **kwargs):
+    """
+    Incrémente la version du jeu de questions lorsqu'un choix est modifié
+    """
+    evaluation_id = (
+        EvaluationQuestion.objects.filter(pk=instance.question_id)
+        .values_list('evaluation_id', flat=True)
+        .first()
+    )
+    # Si la question a été supprimée, son propre signal a déjà incrémenté la version
+    if evaluation_id is not None:
+        bump_question_set(evaluation_id)
@@ -0,0 +1,42 @@
+"""
+Instantané sérialisé du jeu de questions d'une évaluation.
+
+La page d'examen et la correction lisent cet instantané au lieu de parcourir
+``EvaluationQuestion`` et ``EvaluationChoice`` à chaque requête. La version
+est incrémentée par les signaux lors de toute modification.
+"""
+from django.db import transaction
+
+from core.snapshots import bump_version, get_snapshot
+
+from .models import EvaluationChoice, EvaluationQuestion
+
+NAMESPACE = "evaluation_questions"
+
+
+def build_question_set(evaluation_id: int) -> list:
+    questions = list(
+        EvaluationQuestion.objects.filter(evaluation_id=evaluation_id)
+        .order_by('order', 'id')
+        .values('id', 'text', 'order', 'points')
+    )
+    by_question = {q['id']: q for q in questions}
+    for q in questions:
+        q['choices'] = []
+    rows = (
+        EvaluationChoice.objects.filter(question__evaluation_id=evaluation_id)
+        .order_by('id')
+        .values('id', 'question_id', 'text', 'is_correct')
+    )
+    for row in rows:
+        by_question[row.pop('question_id')]['choices'].append(row)
+    return questions
+
+
+def get_question_set(evaluation_id: int) -> list:
+    return get_snapshot(NAMESPACE, evaluation_id, build_question_set)
+
+
+def bump_question_set(evaluation_id: int) -> None:
+    """Invalide l'instantané une fois la transaction courante validée."""
+    transaction.on_commit(lambda: bump_version(NAMESPACE, evaluation_id))
@@ -0,0 +1,33 @@
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .item_analysis import SETTLE_DELAY, refresh_item_analysis
+
+ITEM_ANALYSIS_SCHEDULED_KEY = "evaluations:item_analysis:scheduled:{evaluation_id}"
+ITEM_ANALYSIS_INTERVAL = 5 * 60
+
+
+@shared_task
+def refresh_item_analysis_task(evaluation_id: int, full: bool = False):
+    refresh_item_analysis(evaluation_id, full=full)
+
+
+def schedule_item_analysis(evaluation_id: int) -> None:
+    """
+    Planifie au plus une mise à jour de l'analyse d'items par intervalle et
+    par évaluation, quel que soit le nombre de tentatives soumises.
+
+    Sans broker (tâches exécutées de façon synchrone), rien n'est planifié :
+    la tâche tournerait dans la requête de soumission. Le rapport est alors
+    mis à jour à sa consultation (voir ``item_analysis_report``).
+    """
+    if getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+        return
+    key = ITEM_ANALYSIS_SCHEDULED_KEY.format(evaluation_id=evaluation_id)
+    if cache.add(key, 1, ITEM_ANALYSIS_INTERVAL):
+        countdown = ITEM_ANALYSIS_INTERVAL + SETTLE_DELAY.total_seconds()
+        transaction.on_commit(
+            lambda: refresh_item_analysis_task.apply_async((evaluation_id,), countdown=countdown)
+        )
@@ -1,3 +1,122 @@
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from courses.models import Course
+from .grading import get_answer_key, grade_submission, record_attempt
+from .item_analysis import refresh_item_analysis
+from .models import (
+    Attempt, AttemptAnswer, EvaluationChoice, EvaluationLevel, EvaluationQuestion, ItemAnalysis,
+)
+from .snapshots import get_question_set
+
+
+class GradingTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.trainer = User.objects.create(username='trainer', role='trainer')
+        self.learner = User.objects.create(username='learner')
+        course = Course.objects.create(title='Cours', description='d', created_by=self.trainer)
+        self.evaluation = EvaluationLevel.objects.create(
+            course=course, level='beginner', title='Quiz', threshold=50
+        )
+        self.q1 = EvaluationQuestion.objects.create(evaluation=self.evaluation, text='Q1', order=1, points=1)
+        self.q2 = EvaluationQuestion.objects.create(evaluation=self.evaluation, text='Q2', order=2, points=3)
+        self.q1_ok = EvaluationChoice.objects.create(question=self.q1, text='a', is_correct=True)
+        self.q1_ko = EvaluationChoice.objects.create(question=self.q1, text='b')
+        self.q2_ok = EvaluationChoice.objects.create(question=self.q2, text='c', is_correct=True)
+        self.q2_ko = EvaluationChoice.objects.create(question=self.q2, text='d')
+
+    def test_grade_submission(self):
+        answer_key = get_answer_key(self.evaluation.id)
+        result = grade_submission(answer_key, {
+            f'q_{self.q1.id}': str(self.q1_ko.id),
+            f'q_{self.q2.id}': str(self.q2_ok.id),
+        })
+        self.assertEqual(result['earned'], 3)
+        self.assertEqual(result['percent'], 75.0)
+
+    def test_choice_from_other_question_is_ignored(self):
+        answer_key = get_answer_key(self.evaluation.id)
+        result = grade_submission(answer_key, {
+            f'q_{self.q1.id}': str(self.q2_ok.id),
+            f'q_{self.q2.id}': 'abc',
+        })
+        self.assertEqual(result['earned'], 0)
+        self.assertEqual(result['selections'], {self.q1.id: None, self.q2.id: None})
+
+    def test_record_attempt_queries(self):
+        get_answer_key(self.evaluation.id)
+        data = {f'q_{self.q1.id}': str(self.q1_ok.id)}
+        # savepoint + insert tentative + bulk insert réponses + release
+        with self.assertNumQueries(4):
+            attempt = record_attempt(self.learner, self.evaluation, data)
+        self.assertEqual(attempt.score, 25.0)
+        self.assertFalse(attempt.passed)
+        self.assertEqual(AttemptAnswer.objects.filter(attempt=attempt).count(), 2)
+
+    def test_question_set_version_bumped_on_edit(self):
+        get_answer_key(self.evaluation.id)
+        self.q1_ko.is_correct = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.q1_ko.save()
+        answer_key = get_answer_key(self.evaluation.id)
+        self.assertIn(self.q1_ko.id, answer_key[0].correct_choice_ids)
+
+    def test_question_set_served_from_cache(self):
+        get_question_set(self.evaluation.id)
+        with self.assertNumQueries(0):
+            questions = get_question_set(self.evaluation.id)
+        self.assertEqual([q['id'] for q in questions], [self.q1.id, self.q2.id])
+        self.assertEqual(len(questions[1]['choices']), 2)
+
+    def test_item_analysis_incremental(self):
+        learners = [get_user_model().objects.create(username=f'l{i}') for i in range(4)]
+        answers = [
+            (self.q1_ok, self.q2_ok),
+            (self.q1_ok, self.q2_ko),
+            (self.q1_ko, self.q2_ok),
+        ]
+        for learner, (c1, c2) in zip(learners, answers):
+            record_attempt(learner, self.evaluation, {f'q_{self.q1.id}': c1.id, f'q_{self.q2.id}': c2.id})
+        Attempt.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+
+        analysis = refresh_item_analysis(self.evaluation.id)
+        self.assertEqual(analysis.attempts_count, 3)
+        q1 = analysis.results[0]
+        self.assertAlmostEqual(q1['difficulty'], 2 / 3, places=3)
+        scores = [100.0, 25.0, 75.0]
+        expected = np.corrcoef([1, 1, 0], scores)[0, 1]
+        self.assertAlmostEqual(q1['discrimination'], expected, places=3)
+
+        record_attempt(learners[3], self.evaluation, {f'q_{self.q1.id}': self.q1_ko.id})
+        Attempt.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        analysis = refresh_item_analysis(self.evaluation.id)
+        self.assertEqual(analysis.attempts_count, 4)
+        self.assertEqual(analysis.results[0]['responses'], 4)
+        self.assertEqual(analysis.results[1]['skipped_rate'], 0.25)
+        self.assertAlmostEqual(analysis.results[0]['choices'][1]['rate'], 0.5)
+
+    def test_item_analysis_not_computed_in_submission_request(self):
+        data = {f'q_{self.q1.id}': str(self.q1_ok.id)}
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            record_attempt(self.learner, self.evaluation, data)
+        self.assertEqual(callbacks, [])
+        self.assertFalse(ItemAnalysis.objects.exists())
 
-# Create your tests here.
+        refresh_item_analysis(self.evaluation.id)
+        record_attempt(self.learner, self.evaluation, data)
+        Attempt.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        self.client.force_login(self.trainer)
+        with mock.patch('evaluations.views.render', return_value=HttpResponse()) as render:
+            self.client.get(reverse('evaluations:item_analysis', args=[self.evaluation.id]))
+        self.assertEqual(render.call_args.args[2]['analysis'].attempts_count, 2)
@@ -5,4 +5,5 @@ app_name = 'evaluations'
 
 urlpatterns = [
     path('courses/<int:course_id>/levels/<str:level>/evaluation/', views.start_evaluation, name='start_level_evaluation'),
+    path('<int:evaluation_id>/item-analysis/', views.item_analysis_report, name='item_analysis'),
 ]
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ExercicesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'exercices'
+
+    def ready(self):
+        # Import des signaux
+        import exercices.signals
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Choice, Exercise
+from .snapshots import bump_exercise_set
+
+
+@receiver([post_save, post_delete], sender=Exercise)
+def bump_exercise_set_on_exercise_change(sender, instance, **kwargs):
+    """
+    Incrémente la version des exercices de la leçon lorsqu'un exercice est modifié
+    """
+    bump_exercise_set(instance.lesson_id)
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def bump_exercise_set_on_choice_change(sender, instance, **kwargs):
+    """
+    Incrémente la version des exercices de la leçon lorsqu'un choix est modifié
+    """
+    lesson_id = (
+        Exercise.objects.filter(pk=instance.exercise_id)
+        .values_list('lesson_id', flat=True)
+        .first()
+    )
+    # Si l'exercice a été supprimé, son propre signal a déjà incrémenté la version
+    if lesson_id is not None:
+        bump_exercise_set(lesson_id)
@@ -0,0 +1,42 @@
+"""
+Instantané sérialisé des exercices d'une leçon.
+
+``lesson_detail`` lit cet instantané au lieu de parcourir ``lesson.exercises``
+et leurs choix à chaque affichage. La version est incrémentée par les signaux
+lors de toute modification d'un ``Exercise`` ou d'un ``Choice``.
+"""
+from django.db import transaction
+
+from core.snapshots import bump_version, get_snapshot
+
+from .models import Choice, Exercise
+
+NAMESPACE = "lesson_exercises"
+
+
+def build_exercise_set(lesson_id: int) -> list:
+    exercises = list(
+        Exercise.objects.filter(lesson_id=lesson_id)
+        .order_by('order', 'id')
+        .values('id', 'question', 'order')
+    )
+    by_exercise = {e['id']: e for e in exercises}
+    for e in exercises:
+        e['choices'] = []
+    rows = (
+        Choice.objects.filter(exercise__lesson_id=lesson_id)
+        .order_by('order', 'id')
+        .values('id', 'exercise_id', 'text', 'is_correct', 'explanation')
+    )
+    for row in rows:
+        by_exercise[row.pop('exercise_id')]['choices'].append(row)
+    return exercises
+
+
+def get_exercise_set(lesson_id: int) -> list:
+    return get_snapshot(NAMESPACE, lesson_id, build_exercise_set)
+
+
+def bump_exercise_set(lesson_id: int) -> None:
+    """Invalide l'instantané une fois la transaction courante validée."""
+    transaction.on_commit(lambda: bump_version(NAMESPACE, lesson_id))
@@ -0,0 +1,49 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from courses.models import Course, Lesson, Module
+from .models import Choice, Exercise, UserExerciseAttempt
+
+
+class LessonSubmissionTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create(username='learner')
+        self.user.set_password('pass')
+        self.user.save()
+        trainer = User.objects.create(username='trainer', role='trainer')
+        course = Course.objects.create(title='Cours', description='d', created_by=trainer)
+        module = Module.objects.create(course=course, title='M1')
+        self.lesson = Lesson.objects.create(module=module, title='L1')
+        self.e1 = Exercise.objects.create(lesson=self.lesson, question='Q1', order=1)
+        self.e2 = Exercise.objects.create(lesson=self.lesson, question='Q2', order=2)
+        self.e1_ok = Choice.objects.create(exercise=self.e1, text='a', is_correct=True, explanation='Parce que')
+        self.e1_ko = Choice.objects.create(exercise=self.e1, text='b')
+        self.e2_ok = Choice.objects.create(exercise=self.e2, text='c', is_correct=True)
+        self.client.login(username='learner', password='pass')
+        self.url = reverse('exercises:lesson_submit', args=[self.lesson.id])
+
+    def post(self, answers):
+        return self.client.post(self.url, data=json.dumps({'answers': answers}), content_type='application/json')
+
+    def test_submit_all_answers(self):
+        response = self.post({self.e1.id: self.e1_ok.id, self.e2.id: self.e1_ko.id})
+        data = response.json()
+        self.assertEqual(data['results'][str(self.e1.id)], {'correct': True, 'explanation': 'Parce que'})
+        self.assertEqual(data['results'][str(self.e2.id)], {'error': 'Choix invalide'})
+        self.assertEqual(data['correct'], 1)
+        self.assertEqual(UserExerciseAttempt.objects.filter(user=self.user).count(), 1)
+
+    def test_resubmission_updates_attempts(self):
+        self.post({self.e1.id: self.e1_ko.id, self.e2.id: self.e2_ok.id})
+        self.post({self.e1.id: self.e1_ok.id})
+        attempt = UserExerciseAttempt.objects.get(user=self.user, exercise=self.e1)
+        self.assertEqual(attempt.selected_choice_id, self.e1_ok.id)
+        self.assertTrue(attempt.is_correct)
+        self.assertEqual(UserExerciseAttempt.objects.filter(user=self.user).count(), 2)
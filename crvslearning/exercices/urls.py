@@ -6,4 +6,5 @@ app_name = 'exercises'
 urlpatterns = [
     path('lesson/<int:lesson_id>/exercise/new/', views.ExerciseCreateView.as_view(), name='exercise_create'),
     path('exercise/<int:exercise_id>/submit/', views.submit_attempt, name='exercise_submit'),
+    path('lesson/<int:lesson_id>/submit/', views.submit_lesson_attempts, name='lesson_submit'),
 ]
\ No newline at end of file
@@ -6,7 +6,9 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
+import json
 from .models import Exercise, Choice, UserExerciseAttempt
+from .snapshots import get_exercise_set
 from courses.models import Lesson
 
 class ExerciseCreateView(LoginRequiredMixin, CreateView):
@@ -53,4 +55,78 @@ def submit_attempt(request, exercise_id):
     return JsonResponse({
         'correct': selected_choice.is_correct,
         'explanation': selected_choice.explanation or ''
-    })
\ No newline at end of file
+    })
+
+
+def _parse_lesson_answers(request):
+    """
+    Réponses soumises sous la forme ``{exercise_id: choice_id}``.
+    Accepte un corps JSON ``{"answers": {...}}`` ou des champs ``exercise_<id>``.
+    """
+    if request.content_type == 'application/json':
+        payload = json.loads(request.body or b'{}')
+        raw = payload.get('answers') or {}
+        if not isinstance(raw, dict):
+            raise ValueError
+    else:
+        raw = {
+            key[len('exercise_'):]: value
+            for key, value in request.POST.items()
+            if key.startswith('exercise_')
+        }
+    return {int(exercise_id): int(choice_id) for exercise_id, choice_id in raw.items()}
+
+
+@login_required
+@require_POST
+def submit_lesson_attempts(request, lesson_id):
+    """
+    Corrige en une fois toutes les réponses aux exercices d'une leçon à partir
+    de l'instantané en cache, puis enregistre les tentatives en un seul upsert.
+    """
+    try:
+        answers = _parse_lesson_answers(request)
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Réponses invalides'}, status=400)
+    if not answers:
+        return JsonResponse({'error': 'Veuillez sélectionner au moins une réponse'}, status=400)
+
+    exercises = {e['id']: e for e in get_exercise_set(lesson_id)}
+    if not exercises:
+        get_object_or_404(Lesson, id=lesson_id)
+
+    results = {}
+    attempts = []
+    for exercise_id, choice_id in answers.items():
+        exercise = exercises.get(exercise_id)
+        choice = None
+        if exercise is not None:
+            choice = next((c for c in exercise['choices'] if c['id'] == choice_id), None)
+        if choice is None:
+            results[exercise_id] = {'error': 'Choix invalide'}
+            continue
+        results[exercise_id] = {
+            'correct': choice['is_correct'],
+            'explanation': choice['explanation'] or '',
+        }
+        attempts.append(UserExerciseAttempt(
+            user=request.user,
+            exercise_id=exercise_id,
+            selected_choice_id=choice_id,
+            is_correct=choice['is_correct'],
+        ))
+
+    if attempts:
+        UserExerciseAttempt.objects.bulk_create(
+            attempts,
+            update_conflicts=True,
+            unique_fields=['user', 'exercise'],
+            update_fields=['selected_choice', 'is_correct'],
+        )
+
+    return JsonResponse({
+        'results': results,
+        'correct': sum(1 for r in results.values() if r.get('correct')),
+        'total': len(exercises),
+    })
+
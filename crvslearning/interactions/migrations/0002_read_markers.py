@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def build_markers(apps, schema_editor):
+    """
+    Filigrane initial : dernier message de chaque salle marqué comme lu
+    (``read_by``) par l'utilisateur.
+    """
+    ChatMessage = apps.get_model('interactions', 'ChatMessage')
+    ChatReadMarker = apps.get_model('interactions', 'ChatReadMarker')
+    rows = (
+        ChatMessage.read_by.through.objects
+        .values('customuser_id', 'chatmessage__chat_id')
+        .annotate(last_read_id=Max('chatmessage_id'))
+        .order_by()
+    )
+    ChatReadMarker.objects.bulk_create(
+        [
+            ChatReadMarker(
+                user_id=row['customuser_id'],
+                chat_id=row['chatmessage__chat_id'],
+                last_read_id=row['last_read_id'],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatReadMarker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_id', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('chat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_markers', to='interactions.chatroom')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_read_markers', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='chatreadmarker',
+            constraint=models.UniqueConstraint(fields=('user', 'chat'), name='interactions_read_marker_user_chat'),
+        ),
+        migrations.RunPython(build_markers, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='chatmessage',
+            name='read_by',
+        ),
+    ]
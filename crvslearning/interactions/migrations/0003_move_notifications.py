@@ -0,0 +1,54 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def copy_notifications(apps, schema_editor):
+    """
+    Reprend les notifications de l'ancien modèle ``interactions.Notification``
+    dans ``notifications.Notification`` (même date de création).
+    """
+    OldNotification = apps.get_model('interactions', 'Notification')
+    Notification = apps.get_model('notifications', 'Notification')
+    rows = OldNotification.objects.order_by('pk').values_list(
+        'recipient_id', 'sender_id', 'message', 'notification_type', 'read', 'url', 'created_at'
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        recipient_id, sender_id, message, notification_type, read, url, created_at = row
+        batch.append((Notification(
+            user_id=recipient_id,
+            sender_id=sender_id,
+            message=message,
+            notification_type=notification_type,
+            is_read=read,
+            url=url,
+        ), created_at))
+        if len(batch) >= BATCH_SIZE:
+            _save(Notification, batch)
+            batch = []
+    if batch:
+        _save(Notification, batch)
+
+
+def _save(Notification, batch):
+    # created_at est en auto_now_add : la date d'origine est reportée ensuite
+    created = Notification.objects.bulk_create([n for n, _ in batch])
+    for notification, (_, created_at) in zip(created, batch):
+        notification.created_at = created_at
+    Notification.objects.bulk_update(created, ['created_at'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0002_read_markers'),
+        ('notifications', '0003_notification_digest'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_notifications, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='Notification',
+        ),
+    ]
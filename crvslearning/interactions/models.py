@@ -1,5 +1,6 @@
 from django.db import models
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.db.models import Q
 from shortuuidfield import ShortUUIDField
 from django.contrib.auth import get_user_model
@@ -31,10 +32,18 @@ class ChatRoom(models.Model):
         return self.messages.order_by('-timestamp').first()
     
     def get_unread_count(self, user):
-        return self.messages.filter(
-            ~Q(sender=user),
-            read_by__id__contains=user.id
-        ).count()
+        """Messages des autres membres postérieurs au filigrane de lecture de ``user``."""
+        last_read_id = (
+            ChatReadMarker.objects.filter(user=user, chat=self)
+            .values_list('last_read_id', flat=True)
+            .first()
+        ) or 0
+        return self.messages.filter(~Q(sender=user), id__gt=last_read_id).count()
+
+    @cached_property
+    def read_watermarks(self):
+        """Filigranes de lecture des membres, ``{user_id: last_read_id}``."""
+        return ChatReadMarker.watermarks(self.pk)
         
     def get_other_member(self):
         """
@@ -56,9 +65,9 @@ class ChatMessage(models.Model):
     recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_messages', null=True, blank=True)
     message = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
+    # Hérités : l'état de lecture est porté par ChatReadMarker
     read = models.BooleanField(default=False)
     read_at = models.DateTimeField(null=True, blank=True)
-    read_by = models.ManyToManyField(User, related_name='interactions_read_messages', blank=True)
 
     class Meta:
         ordering = ['timestamp']
@@ -67,58 +76,57 @@ class ChatMessage(models.Model):
         return f"{self.sender.username}: {self.message[:50]}"
     
     def mark_as_read(self, user):
-        if not self.read:
-            self.read = True
-            self.read_at = timezone.now()
-            self.read_by.add(user)
-            self.save()
-            return True
-        return False
+        """Marque la salle comme lue par ``user`` jusqu'à ce message inclus."""
+        return ChatReadMarker.advance(user, self.chat_id, self.id)
+
+    def seen_in(self, watermarks):
+        """
+        Lu d'après ``watermarks`` : par le destinataire, ou, sans
+        destinataire (groupe), par au moins un autre membre.
+        """
+        if self.recipient_id:
+            return watermarks.get(self.recipient_id, 0) >= self.id
+        return any(last_read_id >= self.id for user_id, last_read_id in watermarks.items()
+                   if user_id != self.sender_id)
+
+    @property
+    def is_seen(self):
+        return self.seen_in(self.chat.read_watermarks)
+
+
+class ChatReadMarker(models.Model):
+    """
+    Filigrane de lecture d'un utilisateur dans une salle : tous les messages
+    dont l'id est inférieur ou égal à ``last_read_id`` sont lus.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_read_markers')
+    chat = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='read_markers')
+    last_read_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
-class Notification(models.Model):
-    NOTIFICATION_TYPES = (
-        ('MESSAGE', 'Nouveau message'),
-        ('MENTION', 'Mention'),
-        ('SYSTEM', 'Système'),
-    )
-    
-    recipient = models.ForeignKey(
-        User, 
-        on_delete=models.CASCADE, 
-        related_name='interactions_notifications'
-    )
-    sender = models.ForeignKey(
-        User, 
-        on_delete=models.CASCADE, 
-        related_name='interactions_sent_notifications', 
-        null=True, 
-        blank=True
-    )
-    message = models.TextField()
-    notification_type = models.CharField(max_length=10, choices=NOTIFICATION_TYPES, default='MESSAGE')
-    read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
-    url = models.URLField(max_length=255, null=True, blank=True)
-    
     class Meta:
-        ordering = ['-created_at']
-    
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'chat'], name='interactions_read_marker_user_chat'),
+        ]
+
     def __str__(self):
-        return f"{self.get_notification_type_display()} - {self.recipient.username}"
-    
-    def mark_as_read(self):
-        if not self.read:
-            self.read = True
-            self.save()
-            return True
-        return False
-    
+        return f"{self.user_id} @ {self.chat_id}: {self.last_read_id}"
+
+    @classmethod
+    def watermarks(cls, chat_id):
+        return dict(cls.objects.filter(chat_id=chat_id).values_list('user_id', 'last_read_id'))
+
     @classmethod
-    def create_notification(cls, recipient, message, notification_type='MESSAGE', sender=None, url=None):
-        return cls.objects.create(
-            recipient=recipient,
-            sender=sender,
-            message=message,
-            notification_type=notification_type,
-            url=url
+    def advance(cls, user, chat_id, message_id):
+        """
+        Avance le filigrane en une seule écriture ; retourne ``False`` s'il
+        était déjà au-delà de ``message_id``.
+        """
+        behind = cls.objects.filter(user=user, chat_id=chat_id, last_read_id__lt=message_id)
+        if behind.update(last_read_id=message_id, updated_at=timezone.now()):
+            return True
+        _, created = cls.objects.get_or_create(
+            user=user, chat_id=chat_id, defaults={'last_read_id': message_id}
         )
+        # Créé entre-temps par une écriture concurrente
+        return created or bool(behind.update(last_read_id=message_id, updated_at=timezone.now()))
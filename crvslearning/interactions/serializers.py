@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import ChatRoom, ChatMessage, Notification
+from notifications.models import Notification
+
+from .models import ChatRoom, ChatMessage, ChatReadMarker
 
 User = get_user_model()
 
@@ -55,10 +57,7 @@ class ChatRoomSerializer(serializers.ModelSerializer):
     def get_unread_count(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.messages.filter(
-                ~Q(sender=request.user),
-                read=False
-            ).count()
+            return obj.get_unread_count(request.user)
         return 0
     
     def create(self, validated_data):
@@ -72,14 +71,22 @@ class ChatMessageSerializer(serializers.ModelSerializer):
     sender = UserProfileSerializer(read_only=True)
     recipient = UserProfileSerializer(read_only=True)
     is_own = serializers.SerializerMethodField()
+    read = serializers.SerializerMethodField()
     
     class Meta:
         model = ChatMessage
         fields = [
             'id', 'chat', 'sender', 'recipient', 'message', 
-            'timestamp', 'read', 'read_at', 'is_own'
+            'timestamp', 'read', 'is_own'
         ]
-        read_only_fields = ['id', 'timestamp', 'read', 'read_at', 'is_own']
+        read_only_fields = ['id', 'timestamp', 'read', 'is_own']
+    
+    def get_read(self, obj):
+        # Filigranes lus une fois par salle pour toute la liste
+        watermarks = self.context.setdefault('read_watermarks', {})
+        if obj.chat_id not in watermarks:
+            watermarks[obj.chat_id] = ChatReadMarker.watermarks(obj.chat_id)
+        return obj.seen_in(watermarks[obj.chat_id])
     
     def get_is_own(self, obj):
         request = self.context.get('request')
@@ -112,7 +119,8 @@ class ChatMessageSerializer(serializers.ModelSerializer):
 class NotificationSerializer(serializers.ModelSerializer):
     """Sérialiseur pour les notifications"""
     sender = UserProfileSerializer(read_only=True)
-    recipient = UserProfileSerializer(read_only=True)
+    recipient = UserProfileSerializer(source='user', read_only=True)
+    read = serializers.BooleanField(source='is_read', required=False)
     time_since = serializers.SerializerMethodField()
     
     class Meta:
@@ -130,6 +138,6 @@ class NotificationSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         # Ajouter des données supplémentaires en fonction du type de notification
-        if instance.notification_type == 'MESSAGE' and hasattr(instance, 'message'):
-            representation['preview'] = instance.message.message[:100]  # Afficher un aperçu du message
+        if instance.notification_type == 'MESSAGE':
+            representation['preview'] = instance.message[:100]  # Afficher un aperçu du message
         return representation
@@ -1,5 +1,6 @@
 from django import template
 from notifications.models import Notification
+from notifications.service import unread_count as cached_unread_count
 
 register = template.Library()
 
@@ -11,4 +12,4 @@ def unread_notifications(user):
 @register.filter
 def unread_count(user):
     """Retourne le nombre de notifications non lues de l'utilisateur"""
-    return user.notifications.filter(is_read=False).count()
+    return cached_unread_count(user.pk)
@@ -1,3 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from notifications import service as notification_service
+from notifications.models import Notification
+from users import presence
+
+from .models import ChatMessage, ChatReadMarker, ChatRoom
+from .serializers import ChatMessageSerializer
+
+
+class ReadMarkerTestCase(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.alice = User.objects.create(username='alice')
+        self.bob = User.objects.create(username='bob')
+        self.room = ChatRoom.objects.create()
+        self.room.members.add(self.alice, self.bob)
+        self.messages = [
+            ChatMessage.objects.create(chat=self.room, sender=self.alice, recipient=self.bob, message=str(i))
+            for i in range(5)
+        ]
+
+    def test_watermark_unread_count(self):
+        self.assertEqual(self.room.get_unread_count(self.bob), 5)
+        self.assertTrue(self.messages[2].mark_as_read(self.bob))
+        self.assertEqual(self.room.get_unread_count(self.bob), 2)
+        with self.assertNumQueries(1):
+            self.assertTrue(self.messages[4].mark_as_read(self.bob))
+        self.assertFalse(self.messages[1].mark_as_read(self.bob))
+        self.assertEqual(self.room.get_unread_count(self.bob), 0)
+        self.assertEqual(ChatReadMarker.objects.get(user=self.bob).last_read_id, self.messages[4].id)
+
+    def test_read_state_derived_from_watermark(self):
+        self.messages[2].mark_as_read(self.bob)
+        self.assertEqual(self.bob.get_unread_messages_count(), 2)
+        messages = self.room.messages.select_related('sender', 'recipient')
+        with self.assertNumQueries(2):
+            data = ChatMessageSerializer(messages, many=True).data
+        self.assertEqual([m['read'] for m in data], [True, True, True, False, False])
+
+
+class ContactDirectoryTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.me = User.objects.create(username='me')
+        for name in ('anna', 'annie', 'bruno', 'carla', 'anouk'):
+            User.objects.create(username=name)
+        self.client.force_login(self.me)
+        self.url = reverse('interactions:contact_directory')
+
+    def test_prefix_search_with_cursor(self):
+        page = self.client.get(self.url, {'q': 'AN', 'limit': 2}).json()
+        self.assertEqual([u['username'] for u in page['results']], ['anna', 'annie'])
+        page = self.client.get(self.url, {'q': 'an', 'limit': 2, 'after': page['next']}).json()
+        self.assertEqual([u['username'] for u in page['results']], ['anouk'])
+        self.assertIsNone(page['next'])
+
+    def test_online_filter(self):
+        # Configuration par défaut : last_seen n'est écrit que par mark_seen
+        User = get_user_model()
+        presence.mark_seen(User.objects.get(username='carla').pk)
+        page = self.client.get(self.url, {'online': 1, 'limit': 1}).json()
+        self.assertEqual([u['username'] for u in page['results']], ['carla'])
+        self.assertTrue(page['results'][0]['is_online'])
+
+    def test_chat_page_does_not_embed_users(self):
+        response = self.client.get(reverse('interactions:chat_global'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('users_data', response.context)
+
+
+class NotificationDetailTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='alice')
+        self.notification = Notification.objects.create(
+            user=self.user, message='Nouveau message de bob', notification_type='MESSAGE'
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('interactions:notification_detail', args=[self.notification.pk])
+
+    def test_update_honours_read_state(self):
+        response = self.client.patch(self.url, {'url': 'https://example.com/'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['read'])
+        self.assertEqual(response.json()['preview'], 'Nouveau message de bob')
+        self.assertEqual(notification_service.unread_count(self.user.id), 0)
+
+        response = self.client.patch(self.url, {'read': False}, content_type='application/json')
+        self.assertFalse(response.json()['read'])
+        self.notification.refresh_from_db()
+        self.assertFalse(self.notification.is_read)
+        self.assertEqual(self.notification.url, 'https://example.com/')
+        self.assertEqual(notification_service.unread_count(self.user.id), 1)
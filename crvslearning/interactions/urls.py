@@ -24,6 +24,7 @@ urlpatterns = [
     path('api/chats/<int:pk>/', views.ChatRoomDetailView.as_view(), name='chat_room_detail'),
     path('api/messages/', views.MessageListCreateView.as_view(), name='message_list_create'),
     path('api/messages/<int:pk>/', views.MessageDetailView.as_view(), name='message_detail'),
+    path('api/contacts/', views.ContactDirectoryView.as_view(), name='contact_directory'),
     path('api/notifications/', views.NotificationListView.as_view(), name='notification_list'),
     path('api/notifications/<int:pk>/', views.NotificationDetailView.as_view(), name='notification_detail'),
 ]
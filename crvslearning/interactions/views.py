@@ -1,5 +1,6 @@
 # Vue pour le chat global
 import json
+from datetime import timedelta
 from django.utils import timezone
 from django.utils.dateformat import format
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -9,13 +10,19 @@ from rest_framework import generics, permissions
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from .serializers import ChatRoomSerializer, ChatMessageSerializer, NotificationSerializer
-from .models import ChatRoom, ChatMessage, Notification
+from .models import ChatRoom, ChatMessage, ChatReadMarker
+from notifications import service as notification_service
+from notifications.models import Notification
+from users import presence
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.exceptions import NotFound
 from django.shortcuts import get_object_or_404, render, redirect
-from django.db.models import Q
+from django.http import JsonResponse
+from django.urls import reverse
+from django.db.models import Count, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce, Lower
 import logging
 logger = logging.getLogger(__name__)
 
@@ -155,7 +162,7 @@ def send_message(request, recipient_id):
 def notifications(request):
     """Affiche les notifications de l'utilisateur"""
     user = request.user
-    notifications = Notification.objects.filter(recipient=user).order_by('-timestamp')
+    notifications = Notification.objects.filter(user=user).select_related('sender').order_by('-created_at')
     
     return render(request, 'interactions/notifications.html', {
         'notifications': notifications
@@ -163,18 +170,17 @@ def notifications(request):
 
 def mark_notification_read(request, notification_id):
     """Marque une notification comme lue"""
-    notification = get_object_or_404(Notification, id=notification_id, recipient=request.user)
-    notification.is_read = True
-    notification.save()
+    notification = get_object_or_404(Notification, id=notification_id, user=request.user)
+    notification_service.mark_read(request.user.id, [notification.id])
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'status': 'success'})
     
-    return redirect(notification.get_absolute_url())
+    return redirect(notification.url or 'interactions:notifications')
 
 def mark_all_notifications_read(request):
     """Marque toutes les notifications comme lues"""
-    Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+    notification_service.mark_read(request.user.id)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'status': 'success'})
@@ -183,6 +189,49 @@ def mark_all_notifications_read(request):
 
 User = get_user_model()
 
+CONTACT_FIELDS = ('id', 'username', 'first_name', 'last_name', 'avatar', 'last_seen')
+CONVERSATIONS_LIMIT = 50
+CONTACTS_PAGE_SIZE = 30
+CONTACTS_MAX_PAGE_SIZE = 100
+# Lots lus au plus par requête avec ``online=1`` ; au-delà, la page est
+# renvoyée incomplète avec son curseur
+CONTACTS_MAX_BATCHES = 5
+CONTACT_SEARCH_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def _prefix_search(queryset, search: str):
+    """
+    Recherche par préfixe insensible à la casse sur les index ``Lower(...)``
+    de l'utilisateur : l'intervalle ``[préfixe, préfixe suivant[`` est
+    utilisable par l'index, ``startswith`` écarte les faux positifs.
+    """
+    prefix = search.lower()
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    queryset = queryset.annotate(**{f'{f}_lower': Lower(f) for f in CONTACT_SEARCH_FIELDS})
+    condition = Q()
+    for f in CONTACT_SEARCH_FIELDS:
+        condition |= Q(**{
+            f'{f}_lower__gte': prefix,
+            f'{f}_lower__lt': upper,
+            f'{f}_lower__startswith': prefix,
+        })
+    return queryset.filter(condition)
+
+
+def _avatar_url(user):
+    return f'/media/{user.avatar}' if user.avatar else '/static/img/default-avatar.png'
+
+
+def _contact_data(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'name': user.get_full_name() or user.username,
+        'avatar': _avatar_url(user),
+        'is_online': user.is_online,
+    }
+
+
 class GlobalChatView(LoginRequiredMixin, TemplateView):
     template_name = 'interactions/chatgobal.html'
     login_url = '/users/login/'
@@ -202,55 +251,60 @@ class GlobalChatView(LoginRequiredMixin, TemplateView):
         # Récupérer les informations de l'utilisateur actuel
         context['current_user'] = user
         
-        # Récupérer les utilisateurs disponibles pour le chat
-        users = User.objects.exclude(id=user.id).all()
-        
-        # Préparer les données des utilisateurs
-        users_data = []
-        for u in users:
-            users_data.append({
-                'id': u.id,
-                'username': u.username,
-                'name': u.get_full_name() or u.username,
-                'avatar': f'/media/{u.avatar}' if u.avatar else '/static/img/default-avatar.png',
-                'is_online': u.is_online,
-                'unread': 0
-            })
-        
-        # Récupérer les conversations existantes
-        conversations = ChatRoom.objects.filter(members=user).prefetch_related('members', 'messages')
+        # Les contacts sont chargés à la demande via l'annuaire (ContactDirectoryView)
+        # Conversations récentes : une requête annotée + un prefetch des membres
+        last_message = ChatMessage.objects.filter(chat=OuterRef('pk')).order_by('-timestamp', '-id')
+        last_read = ChatReadMarker.objects.filter(user=user, chat=OuterRef(OuterRef('pk'))).values('last_read_id')[:1]
+        unread = (
+            ChatMessage.objects.filter(chat=OuterRef('pk'), id__gt=Coalesce(Subquery(last_read), 0))
+            .exclude(sender=user)
+            .order_by()
+            .values('chat')
+            .annotate(n=Count('id'))
+            .values('n')
+        )
+        conversations = (
+            ChatRoom.objects.filter(members=user)
+            .annotate(
+                last_text=Subquery(last_message.values('message')[:1]),
+                last_at=Subquery(last_message.values('timestamp')[:1]),
+                unread=Coalesce(Subquery(unread), 0),
+            )
+            .prefetch_related(Prefetch('members', queryset=User.objects.only(*CONTACT_FIELDS)))
+            .order_by('-updated_at')[:CONVERSATIONS_LIMIT]
+        )
+        others = []
+        for conv in conversations:
+            conv.other_member = next((m for m in conv.members.all() if m.id != user.id), None)
+            if conv.other_member:
+                others.append(conv.other_member)
+        presence.prime(others)
+
         conversations_data = []
-        
         for conv in conversations:
-            other_member = conv.members.exclude(id=user.id).first()
+            other_member = conv.other_member
             if other_member:
-                last_message = conv.messages.order_by('-timestamp').first()
+                contact = _contact_data(other_member)
                 conversations_data.append({
                     'id': conv.id,
-                    'other_user': {
-                        'id': other_member.id,
-                        'username': other_member.username,
-                        'name': other_member.get_full_name() or other_member.username,
-                        'avatar': f'/media/{other_member.avatar}' if other_member.avatar else '/static/img/default-avatar.png',
-                        'is_online': other_member.is_online
-                    },
-                    'last_message': {
-                        'content': last_message.content if last_message else '',
-                        'timestamp': format(last_message.timestamp, 'd/m/Y H:i') if last_message else '',
-                        'is_read': last_message.is_read if last_message else True
-                    } if last_message else None,
-                    'unread_count': conv.messages.filter(recipient=user, is_read=False).count()
+                    'room_id': conv.roomId,
+                    'user_id': other_member.id,
+                    'name': contact['name'],
+                    'avatar': contact['avatar'],
+                    'other_user': contact,
+                    'last_message': conv.last_text or '',
+                    'timestamp': format(conv.last_at, 'd/m/Y H:i') if conv.last_at else '',
+                    'unread': conv.unread,
                 })
         
         # Mettre à jour le contexte
         context.update({
-            'users_data': json.dumps(users_data, default=str),
-            'conversations_data': json.dumps(conversations_data, default=str),
+            'conversations_json': json.dumps(conversations_data, default=str),
             'current_user_data': json.dumps({
                 'id': user.id,
                 'username': user.username,
                 'name': user.get_full_name() or user.username,
-                'avatar': f'/media/{user.avatar}' if user.avatar else '/static/img/default-avatar.png',
+                'avatar': _avatar_url(user),
                 'first_name': user.first_name,
                 'last_name': user.last_name
             }, default=str),
@@ -314,8 +368,8 @@ class NotificationListView(generics.ListAPIView):
     
     def get_queryset(self):
         return Notification.objects.filter(
-            recipient=self.request.user
-        ).order_by('-created_at')
+            user=self.request.user
+        ).select_related('sender', 'user').order_by('-created_at')
 
 class NotificationDetailView(generics.RetrieveUpdateDestroyAPIView):
     """API pour récupérer, mettre à jour et supprimer une notification"""
@@ -323,11 +377,18 @@ class NotificationDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Notification.objects.filter(recipient=self.request.user)
+        return Notification.objects.filter(user=self.request.user)
     
     def perform_update(self, serializer):
-        # Marquer comme lu lors de la mise à jour
-        serializer.save(read=True, read_at=timezone.now())
+        # Marquer comme lu lors de la mise à jour, sauf si « read » est fourni ;
+        # l'état de lecture passe par le service pour tenir le compteur à jour
+        is_read = serializer.validated_data.pop('is_read', True)
+        notification = serializer.save()
+        if is_read:
+            notification_service.mark_read(self.request.user.id, [notification.pk])
+        else:
+            notification_service.mark_unread(self.request.user.id, [notification.pk])
+        notification.is_read = is_read
 
 class MessageAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -355,14 +416,13 @@ class MessageAPIView(APIView):
             chat_room.save()
             
             # Créer des notifications pour les destinataires
-            for recipient in chat_room.members.exclude(id=request.user.id):
-                Notification.create_notification(
-                    recipient=recipient,
-                    sender=request.user,
-                    message=f"Nouveau message de {request.user.get_full_name() or request.user.username}",
-                    notification_type='MESSAGE',
-                    url=reverse('interactions:conversation', args=[chat_room.roomId])
-                )
+            notification_service.notify_users(
+                chat_room.members.exclude(id=request.user.id).values_list('id', flat=True),
+                f"Nouveau message de {request.user.get_full_name() or request.user.username}",
+                sender=request.user,
+                notification_type='MESSAGE',
+                url=reverse('interactions:conversation', args=[chat_room.roomId])
+            )
             
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         
@@ -372,17 +432,72 @@ class NotificationAPIView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        notifications = Notification.objects.filter(recipient=request.user).order_by('-created_at')
+        notifications = Notification.objects.filter(user=request.user).select_related('sender', 'user')
         serializer = NotificationSerializer(notifications, many=True)
         return Response(serializer.data)
     
     def post(self, request, notification_id=None):
         if notification_id:
             # Marquer une notification spécifique comme lue
-            notification = get_object_or_404(Notification, id=notification_id, recipient=request.user)
-            notification.mark_as_read()
+            notification = get_object_or_404(Notification, id=notification_id, user=request.user)
+            notification_service.mark_read(request.user.id, [notification.id])
             return Response({'status': 'success'})
         
         # Marquer toutes les notifications comme lues
-        Notification.objects.filter(recipient=request.user, read=False).update(read=True)
+        notification_service.mark_read(request.user.id)
         return Response({'status': 'success'})
+
+
+class ContactDirectoryView(APIView):
+    """
+    Annuaire des contacts du chat, paginé par clé sur le nom d'utilisateur.
+
+    Paramètres : ``q`` (recherche par préfixe sur l'identifiant, le prénom
+    ou le nom), ``online=1`` (utilisateurs en ligne uniquement), ``after``
+    (curseur renvoyé dans ``next``) et ``limit``. Avec ``online=1``, une
+    page peut compter moins de ``limit`` résultats sans être la dernière.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', CONTACTS_PAGE_SIZE))
+        except (TypeError, ValueError):
+            limit = CONTACTS_PAGE_SIZE
+        limit = max(1, min(limit, CONTACTS_MAX_PAGE_SIZE))
+
+        queryset = User.objects.filter(is_active=True).exclude(id=request.user.id).only(*CONTACT_FIELDS)
+        search = (request.query_params.get('q') or '').strip()
+        if search:
+            queryset = _prefix_search(queryset, search)
+        online_only = request.query_params.get('online') in ('1', 'true')
+        if online_only:
+            # Présélection en base (last_seen est reporté au plus tous les
+            # FLUSH_INTERVAL), confirmée ensuite par le service de présence
+            recent = timezone.now() - timedelta(seconds=presence.ONLINE_WINDOW + presence.FLUSH_INTERVAL)
+            queryset = queryset.filter(last_seen__gte=recent)
+        queryset = queryset.order_by('username')
+
+        cursor = request.query_params.get('after')
+        contacts = []
+        has_more = True
+        batches = 0
+        while has_more and len(contacts) < limit and batches < CONTACTS_MAX_BATCHES:
+            batches += 1
+            batch = list((queryset.filter(username__gt=cursor) if cursor else queryset)[:limit + 1])
+            has_more = len(batch) > limit
+            batch = batch[:limit]
+            presence.prime(batch)
+            for u in batch:
+                if len(contacts) == limit:
+                    has_more = True
+                    break
+                cursor = u.username
+                if online_only and not u.is_online:
+                    continue
+                contacts.append(u)
+
+        return Response({
+            'results': [_contact_data(u) for u in contacts],
+            'next': cursor if has_more else None,
+        })
@@ -1,13 +1,12 @@
 from django.contrib import admin
 
-from .models import Notification
+from core.admin_lists import ScalableAdminMixin
 
 from .models import Notification
 
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
-    list_display = ('user', 'message', 'is_read', 'created_at')
-    list_filter = ('is_read', 'created_at')
+class NotificationAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'message', 'notification_type', 'event_count', 'is_read', 'created_at')
+    list_filter = ('is_read', 'notification_type', 'created_at')
     search_fields = ('user__username', 'message')
-
-
+    raw_id_fields = ('user', 'sender')
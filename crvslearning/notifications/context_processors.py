@@ -0,0 +1,14 @@
+from functools import partial
+
+from .service import unread_count
+
+
+def unread_notifications(request):
+    """
+    Nombre de notifications non lues, lu dans le cache uniquement si le
+    gabarit l'utilise.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'unread_notifications_count': partial(unread_count, user.pk)}
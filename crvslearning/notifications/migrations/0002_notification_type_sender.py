@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('MESSAGE', 'Nouveau message'), ('MENTION', 'Mention'), ('SYSTEM', 'Système'), ('SUBSCRIPTION', 'Nouvel abonné'), ('COURSE', 'Nouveau cours'), ('LIVE_SESSION', 'Session en direct')], default='SYSTEM', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sent_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read'], name='notification_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at'], name='notification_recent_idx'),
+        ),
+    ]
@@ -5,14 +5,38 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 class Notification(models.Model):
+    NOTIFICATION_TYPES = (
+        ('MESSAGE', 'Nouveau message'),
+        ('MENTION', 'Mention'),
+        ('SYSTEM', 'Système'),
+        ('SUBSCRIPTION', 'Nouvel abonné'),
+        ('COURSE', 'Nouveau cours'),
+        ('LIVE_SESSION', 'Session en direct'),
+    )
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    sender = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='sent_notifications',
+        null=True,
+        blank=True
+    )
     message = models.TextField()
+    notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES, default='SYSTEM')
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     url = models.URLField(blank=True, null=True)
+    # Notifications regroupées : clé du regroupement et nombre d'événements
+    digest_key = models.CharField(max_length=100, blank=True)
+    event_count = models.PositiveIntegerField(default=1)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read'], name='notification_unread_idx'),
+            models.Index(fields=['user', '-created_at'], name='notification_recent_idx'),
+        ]
 
     def __str__(self):
-        return f"Notification pour {self.user.username}: {self.message[:50]}..."
\ No newline at end of file
+        return f"Notification pour {self.user.username}: {self.message[:50]}..."
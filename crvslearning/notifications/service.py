@@ -0,0 +1,278 @@
+"""
+Service de notifications.
+
+Toutes les notifications passent par ``notify`` : l'envoi est planifié
+après validation de la transaction et exécuté hors de la requête par une
+tâche Celery (voir ``core.background`` sans broker), qui
+résout les destinataires par lots, insère les notifications avec
+``bulk_create`` et pousse le nouveau nombre de non lues sur le groupe
+WebSocket personnel de chaque destinataire.
+
+Le nombre de notifications non lues est gardé en cache par utilisateur ;
+il est recalculé en base uniquement en cas d'absence du cache.
+
+Les événements similaires (même clé de regroupement, voir ``Digest``) sont
+mis en tampon pendant une fenêtre puis envoyés en une seule notification
+(« 5 nouvelles leçons… ») : une ligne et un envoi par destinataire au lieu
+d'un par événement.
+"""
+import json
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from core.background import enqueue
+from core.delivery import send_frames, user_group
+
+from .models import Notification
+
+CHUNK_SIZE = 1000
+UNREAD_TTL = 24 * 60 * 60
+UNREAD_KEY = "notifications:unread:{user_id}"
+
+DIGEST_WINDOW = 10 * 60
+DIGEST_COUNT_KEY = "notifications:digest:{key}:count"
+DIGEST_PAYLOAD_KEY = "notifications:digest:{key}:payload"
+DIGEST_SCHEDULED_KEY = "notifications:digest:{key}:scheduled"
+
+# Audiences : ('users', [ids]), ('followers', trainer_id), ('classroom', classroom_id)
+USERS = 'users'
+FOLLOWERS = 'followers'
+CLASSROOM = 'classroom'
+COURSE = 'course'
+
+
+def _unread_key(user_id) -> str:
+    return UNREAD_KEY.format(user_id=user_id)
+
+
+def unread_count(user_id: int) -> int:
+    """Nombre de notifications non lues, depuis le cache si possible."""
+    key = _unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(key, count, UNREAD_TTL)
+    return count
+
+
+def refresh_unread_counts(user_ids) -> dict:
+    """Recalcule en une requête les compteurs de plusieurs utilisateurs."""
+    user_ids = list(user_ids)
+    counts = dict.fromkeys(user_ids, 0)
+    counts.update(
+        Notification.objects.filter(user_id__in=user_ids, is_read=False)
+        .values_list('user_id')
+        .annotate(n=Count('id'))
+    )
+    cache.set_many({_unread_key(uid): n for uid, n in counts.items()}, UNREAD_TTL)
+    return counts
+
+
+def push_badges(counts: dict, notification: dict = None) -> None:
+    """Envoie le nombre de non lues (et la notification) aux connexions des utilisateurs."""
+    frames = {}
+    for user_id, count in counts.items():
+        frame = {'type': 'notification', 'unread_count': count}
+        if notification:
+            frame['notification'] = notification
+        frames[user_group(user_id)] = [json.dumps(frame)]
+    if frames:
+        send_frames(frames)
+
+
+def _recipient_ids(audience):
+    kind, value = audience
+    if kind == USERS:
+        return iter(value)
+    if kind == FOLLOWERS:
+        from subscriptions.models import Subscription
+        return (
+            Subscription.objects.filter(trainer_id=value, is_active=True)
+            .values_list('subscriber_id', flat=True)
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+    if kind == COURSE:
+        from courses.models import Enrollment
+        return (
+            Enrollment.objects.filter(course_id=value)
+            .values_list('user_id', flat=True)
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+    if kind == CLASSROOM:
+        from classrooms.models import ClassroomMembership
+        return (
+            ClassroomMembership.objects.filter(classroom_id=value)
+            .values_list('user_id', flat=True)
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+    raise ValueError(f"Audience inconnue: {kind}")
+
+
+@dataclass(frozen=True)
+class Digest:
+    """
+    Regroupement d'événements similaires : ``plural`` est le message
+    envoyé quand plusieurs événements tombent dans la même fenêtre
+    (``{count}`` y est remplacé par le nombre d'événements).
+    """
+    key: str
+    plural: str
+    window: int = DIGEST_WINDOW
+
+
+def deliver(audiences, message, url=None, sender_id=None, notification_type='SYSTEM',
+            digest_key='', event_count=1) -> int:
+    """
+    Crée les notifications pour toutes les audiences (sans doublon ni
+    notification à l'expéditeur), par lots de ``CHUNK_SIZE``.
+    Retourne le nombre de notifications créées.
+    """
+    seen = {sender_id} if sender_id else set()
+    created = 0
+    chunk = []
+
+    def flush():
+        nonlocal created
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user_id=uid,
+                    sender_id=sender_id,
+                    message=message,
+                    url=url,
+                    notification_type=notification_type,
+                    digest_key=digest_key,
+                    event_count=event_count,
+                )
+                for uid in chunk
+            ],
+            batch_size=CHUNK_SIZE,
+        )
+        created += len(chunk)
+        push_badges(
+            refresh_unread_counts(chunk),
+            {'message': message, 'url': url, 'notification_type': notification_type},
+        )
+        chunk.clear()
+
+    for audience in audiences:
+        for uid in _recipient_ids(audience):
+            if uid in seen:
+                continue
+            seen.add(uid)
+            chunk.append(uid)
+            if len(chunk) >= CHUNK_SIZE:
+                flush()
+    if chunk:
+        flush()
+    return created
+
+
+def notify(audiences, message, url=None, sender=None, notification_type='SYSTEM', digest=None) -> None:
+    """
+    Planifie l'envoi d'une notification, après validation de la
+    transaction. ``audiences`` est une liste de couples (type, valeur).
+    Avec ``digest``, l'événement est regroupé avec les suivants de même clé.
+    """
+    from .tasks import fan_out_notification
+
+    sender_id = getattr(sender, 'pk', sender)
+    audiences = [(kind, list(value) if kind == USERS else value) for kind, value in audiences]
+    if digest is not None:
+        payload = {
+            'audiences': audiences,
+            'message': message,
+            'plural': digest.plural,
+            'url': url,
+            'sender_id': sender_id,
+            'notification_type': notification_type,
+        }
+        transaction.on_commit(lambda: _buffer_event(digest, payload))
+        return
+    transaction.on_commit(lambda: enqueue(
+        fan_out_notification,
+        (audiences, message),
+        {'url': url, 'sender_id': sender_id, 'notification_type': notification_type},
+    ))
+
+
+def _buffer_event(digest: Digest, payload: dict) -> None:
+    """
+    Compte l'événement ; le premier de la fenêtre planifie l'envoi groupé.
+    Le dernier message est conservé et les audiences de la fenêtre sont
+    cumulées, pour ne perdre aucun destinataire.
+    """
+    from .tasks import flush_notification_digest
+
+    ttl = digest.window * 10
+    count_key = DIGEST_COUNT_KEY.format(key=digest.key)
+    payload_key = DIGEST_PAYLOAD_KEY.format(key=digest.key)
+    previous = cache.get(payload_key)
+    if previous is not None:
+        payload['audiences'] = previous['audiences'] + [
+            audience for audience in payload['audiences'] if audience not in previous['audiences']
+        ]
+    cache.set(payload_key, payload, ttl)
+    cache.add(count_key, 0, ttl)
+    cache.incr(count_key)
+    if cache.add(DIGEST_SCHEDULED_KEY.format(key=digest.key), 1, digest.window * 2):
+        enqueue(flush_notification_digest, (digest.key,), countdown=digest.window)
+
+
+def flush_digest(key: str) -> int:
+    """
+    Envoie en une notification les événements accumulés sous ``key``.
+    Les événements arrivés pendant l'envoi restent comptés pour la fenêtre
+    suivante.
+    """
+    # Libéré avant la lecture : un nouvel événement replanifie un envoi
+    cache.delete(DIGEST_SCHEDULED_KEY.format(key=key))
+    count_key = DIGEST_COUNT_KEY.format(key=key)
+    payload_key = DIGEST_PAYLOAD_KEY.format(key=key)
+    count = cache.get(count_key) or 0
+    payload = cache.get(payload_key)
+    if not count or payload is None:
+        return 0
+    cache.decr(count_key, count)
+    cache.delete(payload_key)
+    message = payload['message'] if count == 1 else payload['plural'].replace('{count}', str(count))
+    return deliver(
+        payload['audiences'],
+        message,
+        url=payload['url'],
+        sender_id=payload['sender_id'],
+        notification_type=payload['notification_type'],
+        digest_key=key,
+        event_count=count,
+    )
+
+
+def notify_users(user_ids, message, **kwargs) -> None:
+    notify([(USERS, user_ids)], message, **kwargs)
+
+
+def mark_read(user_id: int, notification_ids=None) -> int:
+    """
+    Marque comme lues les notifications données (toutes si ``None``),
+    met à jour le compteur et le pousse aux connexions de l'utilisateur.
+    """
+    queryset = Notification.objects.filter(user_id=user_id, is_read=False)
+    if notification_ids is not None:
+        queryset = queryset.filter(id__in=notification_ids)
+    updated = queryset.update(is_read=True)
+    if updated:
+        push_badges(refresh_unread_counts([user_id]))
+    return updated
+
+
+def mark_unread(user_id: int, notification_ids) -> int:
+    """Remet les notifications données à l'état non lu (voir ``mark_read``)."""
+    updated = Notification.objects.filter(
+        user_id=user_id, is_read=True, id__in=notification_ids
+    ).update(is_read=False)
+    if updated:
+        push_badges(refresh_unread_counts([user_id]))
+    return updated
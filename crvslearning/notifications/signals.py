@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+
+from classrooms.models import LiveSession
+from courses.models import Course, Lesson
+
+from . import service
+from .models import Notification
+
+
+@receiver([post_save, post_delete], sender=Notification)
+def invalidate_unread_count(sender, instance, **kwargs):
+    """Les écritures unitaires (admin, API) invalident le compteur en cache."""
+    key = service.UNREAD_KEY.format(user_id=instance.user_id)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+@receiver(post_save, sender=Course)
+def notify_new_course(sender, instance, created, **kwargs):
+    """Prévient les abonnés du formateur de la publication d'un cours."""
+    if not created:
+        return
+    trainer = instance.created_by
+    service.notify(
+        [(service.FOLLOWERS, trainer.pk)],
+        f"{trainer.get_full_name() or trainer.username} a publié un nouveau cours : {instance.title}",
+        url=reverse('courses:course_detail', args=[instance.pk]),
+        sender=trainer,
+        notification_type='COURSE',
+    )
+
+
+@receiver(post_save, sender=Lesson)
+def notify_new_lesson(sender, instance, created, **kwargs):
+    """
+    Prévient les inscrits et les abonnés d'une nouvelle leçon ; les leçons
+    ajoutées en rafale au même cours sont regroupées en une notification.
+    """
+    if not created:
+        return
+    course = instance.module.course
+    service.notify(
+        [(service.COURSE, course.pk), (service.FOLLOWERS, course.created_by_id)],
+        f"Nouvelle leçon dans « {course.title} » : {instance.title}",
+        url=reverse('courses:course_detail', args=[course.pk]),
+        sender=course.created_by_id,
+        notification_type='COURSE',
+        digest=service.Digest(
+            key=f'lessons:{course.pk}',
+            plural=f"{{count}} nouvelles leçons dans « {course.title} »",
+        ),
+    )
+
+
+@receiver(post_save, sender=LiveSession)
+def notify_live_session(sender, instance, created, **kwargs):
+    """Prévient les membres de la classe et les abonnés du formateur."""
+    if not created:
+        return
+    classroom = instance.classroom
+    service.notify(
+        [(service.CLASSROOM, classroom.pk), (service.FOLLOWERS, classroom.created_by_id)],
+        f"Session en direct « {instance.title} » prévue le {instance.start_at:%d/%m/%Y à %H:%M} ({classroom.name})",
+        url=reverse('classrooms:detail', args=[classroom.pk]),
+        sender=classroom.created_by_id,
+        notification_type='LIVE_SESSION',
+    )
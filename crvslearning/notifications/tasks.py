@@ -0,0 +1,25 @@
+import logging
+
+from celery import shared_task
+
+from .service import deliver, flush_digest
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def fan_out_notification(self, audiences, message, url=None, sender_id=None, notification_type='SYSTEM'):
+    try:
+        return deliver(audiences, message, url=url, sender_id=sender_id, notification_type=notification_type)
+    except Exception as exc:
+        logger.exception("Échec de l'envoi de la notification « %s »", message[:50])
+        raise self.retry(exc=exc)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def flush_notification_digest(self, key):
+    try:
+        return flush_digest(key)
+    except Exception as exc:
+        logger.exception("Échec de l'envoi du regroupement %s", key)
+        raise self.retry(exc=exc)
@@ -1,3 +1,113 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+
+from classrooms.models import Classroom, ClassroomMembership, LiveSession
+from core import background
+from courses.models import Course, Enrollment, Lesson, Module
+from subscriptions.models import Subscription
+
+from . import service
+from .models import Notification
+
+
+class NotificationServiceTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.trainer = User.objects.create(username='formateur', role='trainer')
+        self.learners = [User.objects.create(username=f'apprenant{i}') for i in range(5)]
+
+    def subscribe_all(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for learner in self.learners:
+                Subscription.objects.create(subscriber=learner, trainer=self.trainer)
+        background.run_pending(force=True)
+
+    def test_subscription_notifies_trainer(self):
+        with mock.patch('notifications.service.send_frames') as send_frames:
+            self.subscribe_all()
+        self.assertEqual(Notification.objects.filter(user=self.trainer, notification_type='SUBSCRIPTION').count(), 5)
+        frame = json.loads(send_frames.call_args.args[0][f'user_{self.trainer.id}'][0])
+        self.assertEqual(frame['unread_count'], 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(service.unread_count(self.trainer.id), 5)
+
+    def test_new_course_fans_out_in_chunks(self):
+        self.subscribe_all()
+        with mock.patch.object(service, 'CHUNK_SIZE', 2), \
+                mock.patch('notifications.service.send_frames') as send_frames:
+            with self.captureOnCommitCallbacks(execute=True):
+                Course.objects.create(title='Python', description='d', created_by=self.trainer)
+            background.run_pending(force=True)
+        self.assertEqual(send_frames.call_count, 3)
+        self.assertEqual(Notification.objects.filter(notification_type='COURSE').count(), 5)
+        self.assertEqual(service.unread_count(self.learners[0].id), 1)
+
+    def test_live_session_audiences_deduplicated(self):
+        self.subscribe_all()
+        classroom = Classroom.objects.create(name='Classe', created_by=self.trainer)
+        ClassroomMembership.objects.create(classroom=classroom, user=self.learners[0], role='student')
+        ClassroomMembership.objects.create(classroom=classroom, user=self.trainer, role='teacher')
+        with self.captureOnCommitCallbacks(execute=True):
+            LiveSession.objects.create(classroom=classroom, title='Direct', start_at=timezone.now() + timedelta(days=1))
+        background.run_pending(force=True)
+        notified = Notification.objects.filter(notification_type='LIVE_SESSION').values_list('user_id', flat=True)
+        self.assertCountEqual(notified, [u.id for u in self.learners])
+
+    def test_mark_read_updates_counter(self):
+        learner = self.learners[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            service.notify_users([learner.id], 'Un')
+            service.notify_users([learner.id], 'Deux')
+        # L'envoi n'a pas lieu dans la requête qui l'a déclenché
+        self.assertFalse(Notification.objects.exists())
+        background.run_pending(force=True)
+        self.assertEqual(service.unread_count(learner.id), 2)
+        first = Notification.objects.filter(user=learner).first()
+        service.mark_read(learner.id, [first.id])
+        self.assertEqual(service.unread_count(learner.id), 1)
+        service.mark_read(learner.id)
+        self.assertEqual(service.unread_count(learner.id), 0)
+
+    def test_lessons_digested_within_window(self):
+        self.subscribe_all()
+        course = Course.objects.create(title='Python', description='d', created_by=self.trainer)
+        module = Module.objects.create(course=course, title='Bases')
+        outsider = get_user_model().objects.create(username='inscrit')
+        Enrollment.objects.create(user=outsider, course=course)
+        Notification.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                Lesson.objects.create(module=module, title=f'Leçon {i}')
+        # Rien n'est envoyé avant la fin de la fenêtre
+        background.run_pending()
+        self.assertFalse(Notification.objects.exists())
+
+        # Un seul envoi pour la rafale
+        with mock.patch('notifications.service.send_frames') as send_frames:
+            background.run_pending(force=True)
+        send_frames.assert_called_once()
+        notifications = Notification.objects.filter(digest_key=f'lessons:{course.pk}')
+        self.assertEqual(notifications.count(), 6)
+        self.assertEqual({n.event_count for n in notifications}, {5})
+        self.assertEqual(notifications.first().message, "5 nouvelles leçons dans « Python »")
+        # La fenêtre suivante repart de zéro
+        self.assertEqual(service.flush_digest(f'lessons:{course.pk}'), 0)
 
-# Create your tests here.
+    def test_digest_keeps_every_audience(self):
+        digest = service.Digest(key='annonce', plural="{count} annonces")
+        first, second = self.learners[:2]
+        with self.captureOnCommitCallbacks(execute=True):
+            service.notify_users([first.id], 'Annonce 1', digest=digest)
+            service.notify_users([second.id], 'Annonce 2', digest=digest)
+        background.run_pending(force=True)
+        notified = Notification.objects.filter(digest_key='annonce').values_list('user_id', 'event_count')
+        self.assertCountEqual(notified, [(first.id, 2), (second.id, 2)])
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SmsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sms'
+
+    def ready(self):
+        # Import des signaux
+        import sms.signals
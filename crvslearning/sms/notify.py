@@ -0,0 +1,68 @@
+"""
+Notification des nouveaux messages SMS aux requêtes en attente (long-poll).
+
+Chaque conversation (paire d'utilisateurs) a un groupe de la couche de
+canaux. Une requête en attente s'abonne au groupe avec un canal éphémère et
+attend un signal ou l'expiration du délai : aucune requête en base tant
+qu'aucun message n'arrive. La couche de canaux (Redis en production) relaie
+le signal entre les workers uvicorn.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+
+def pair_group(user_a: int, user_b: int) -> str:
+    low, high = sorted((int(user_a), int(user_b)))
+    return f"sms_{low}_{high}"
+
+
+def notify_new_message(message) -> None:
+    """Réveille les requêtes en attente sur la conversation du message."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(
+            pair_group(message.sender_id, message.receiver_id),
+            {'type': 'sms.new_message', 'id': message.id},
+        )
+    except Exception as e:
+        logger.error(f"Notification SMS impossible: {str(e)}", exc_info=True)
+
+
+@asynccontextmanager
+async def subscription(user_a: int, user_b: int):
+    """
+    Abonne la requête à la conversation et fournit ``wait(timeout)``, qui
+    retourne ``False`` à l'expiration du délai. S'abonner avant de consulter
+    la base évite de manquer un message arrivé entre-temps.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        async def wait(timeout):
+            await asyncio.sleep(timeout)
+            return False
+        yield wait
+        return
+
+    group = pair_group(user_a, user_b)
+    channel = await channel_layer.new_channel()
+    await channel_layer.group_add(group, channel)
+
+    async def wait(timeout):
+        try:
+            await asyncio.wait_for(channel_layer.receive(channel), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    try:
+        yield wait
+    finally:
+        await channel_layer.group_discard(group, channel)
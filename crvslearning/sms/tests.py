@@ -1,3 +1,49 @@
+import asyncio
+import time
+from unittest import mock
+
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import Message
+from .notify import pair_group
+
+
+class LongPollTestCase(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.alice = User.objects.create(username='alice')
+        self.bob = User.objects.create(username='bob')
+
+    def url(self, last_id=0):
+        return reverse('sms:wait_for_messages', args=[self.alice.id, last_id])
+
+    async def test_returns_existing_messages_immediately(self):
+        message = await Message.objects.acreate(sender=self.alice, receiver=self.bob, content='salut')
+        await self.async_client.aforce_login(self.bob)
+        response = await self.async_client.get(self.url())
+        self.assertEqual([m['id'] for m in response.json()], [message.id])
+        self.assertTrue((await Message.objects.aget(pk=message.id)).is_read)
+
+    async def test_parked_request_woken_by_notification(self):
+        await self.async_client.aforce_login(self.bob)
+        started = time.monotonic()
+        request = asyncio.ensure_future(self.async_client.get(self.url()))
+        await asyncio.sleep(0.2)
+        self.assertFalse(request.done())
+
+        await get_channel_layer().group_send(
+            pair_group(self.alice.id, self.bob.id), {'type': 'sms.new_message', 'id': 0}
+        )
+        response = await asyncio.wait_for(request, 5)
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(time.monotonic() - started, 5)
 
-# Create your tests here.
+    async def test_timeout_returns_empty_list(self):
+        await self.async_client.aforce_login(self.bob)
+        with mock.patch('sms.views.LONG_POLL_TIMEOUT', 0.1):
+            response = await self.async_client.get(self.url())
+        self.assertEqual(response.json(), [])
@@ -9,4 +9,6 @@ urlpatterns = [
     path('send/<int:user_id>/', views.send_message, name='send_message'),
     path('get-new-messages/<int:user_id>/<int:last_message_id>/', 
          views.get_new_messages, name='get_new_messages'),
+    path('wait/<int:user_id>/<int:last_message_id>/',
+         views.wait_for_messages, name='wait_for_messages'),
 ]
@@ -1,12 +1,17 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from django.db.models import Q
 from django.http import JsonResponse
+from . import notify
 from .models import Message
 
 User = get_user_model()
 
+# Durée maximale d'attente d'une requête long-poll (secondes)
+LONG_POLL_TIMEOUT = 25
+
 @login_required
 def inbox(request):
     # Récupérer tous les utilisateurs sauf l'utilisateur actuel
@@ -18,9 +23,6 @@ def inbox(request):
         Q(sms_received_messages__sender=request.user)
     ).distinct()
     
-    # Marquer les messages non lus comme lus
-    Message.objects.filter(receiver=request.user, is_read=False).update(is_read=True)
-    
     # Vérifier s'il y a une recherche
     query = request.GET.get('q')
     if query:
@@ -79,24 +81,46 @@ def send_message(request, user_id):
     
     return JsonResponse({'success': False})
 
+def _messages_after(user, other_user_id, last_message_id):
+    """
+    Messages de la conversation postérieurs à ``last_message_id`` ; les
+    messages reçus sont marqués comme lus (UPDATE uniquement s'il y en a).
+    """
+    messages = list(
+        Message.objects.filter(
+            Q(id__gt=last_message_id) &
+            (Q(sender_id=other_user_id, receiver=user) |
+             Q(sender=user, receiver_id=other_user_id))
+        ).order_by('timestamp', 'id').values('id', 'content', 'timestamp', 'sender_id', 'receiver_id', 'is_read')
+    )
+    unread = [m['id'] for m in messages if m['receiver_id'] == user.id and not m['is_read']]
+    if unread:
+        Message.objects.filter(id__in=unread).update(is_read=True)
+    return [{
+        'id': m['id'],
+        'content': m['content'],
+        'timestamp': m['timestamp'].isoformat(),
+        'sender': m['sender_id'],
+    } for m in messages]
+
+
 @login_required
 def get_new_messages(request, user_id, last_message_id):
     other_user = get_object_or_404(User, id=user_id)
-    
-    messages = Message.objects.filter(
-        Q(id__gt=last_message_id) &
-        (Q(sender=other_user, receiver=request.user) | 
-         Q(sender=request.user, receiver=other_user))
-    ).order_by('timestamp')
-    
-    # Marquer uniquement les messages reçus comme lus
-    messages.filter(receiver=request.user, is_read=False).update(is_read=True)
-    
-    messages_data = [{
-        'id': msg.id,
-        'content': msg.content,
-        'timestamp': msg.timestamp.isoformat(),
-        'sender': msg.sender.id
-    } for msg in messages]
-    
-    return JsonResponse(messages_data, safe=False)
+    return JsonResponse(_messages_after(request.user, other_user.id, last_message_id), safe=False)
+
+
+@login_required
+async def wait_for_messages(request, user_id, last_message_id):
+    """
+    Long-poll : répond immédiatement s'il y a de nouveaux messages, sinon
+    attend (sans requête en base) qu'un message arrive dans la conversation
+    ou que ``LONG_POLL_TIMEOUT`` expire, puis répond (éventuellement vide).
+    """
+    user = await request.auser()
+    other_user = await aget_object_or_404(User, id=user_id)
+    async with notify.subscription(user.id, other_user.id) as wait:
+        messages = await sync_to_async(_messages_after)(user, other_user.id, last_message_id)
+        if not messages and await wait(LONG_POLL_TIMEOUT):
+            messages = await sync_to_async(_messages_after)(user, other_user.id, last_message_id)
+    return JsonResponse(messages, safe=False)
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
-from .models import Subscription
+from .models import Publication, Subscription
 
 from django.utils.translation import gettext_lazy as _
 from .models import Subscription
@@ -30,3 +30,11 @@ class SubscriptionAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at',)
 
 
+
+
+@admin.register(Publication)
+class PublicationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'title', 'trainer', 'created_at')
+    list_filter = ('kind', 'created_at')
+    search_fields = ('title', 'trainer__username')
+    raw_id_fields = ('trainer',)
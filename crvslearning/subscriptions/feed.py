@@ -0,0 +1,153 @@
+"""
+Fil des contenus publiés par les formateurs suivis.
+
+Chaque publication est enregistrée une fois (``Publication``) puis copiée
+hors de la requête (``core.background``) dans le fil de chaque abonné
+actif (``FeedEntry``), ce qui rend la lecture du fil indépendante du
+nombre de formateurs suivis. Le fil est borné à ``FEED_SIZE`` entrées par utilisateur.
+
+Au-delà de ``FANOUT_LIMIT`` abonnés, un formateur n'est plus copié à
+l'écriture : ses publications sont lues directement et fusionnées au
+moment de l'affichage, pour que le coût d'une publication reste borné.
+
+La pagination se fait par curseur (``before`` : identifiant de la
+dernière publication affichée), sans OFFSET.
+"""
+from django.db import transaction
+from django.db.models import Count
+
+from core.background import enqueue
+
+from .models import FeedEntry, Publication, Subscription
+
+CHUNK_SIZE = 1000
+FANOUT_LIMIT = 10000
+FEED_SIZE = 500
+# Le fil n'est réduit qu'une fois dépassé de cette marge
+TRIM_SLACK = 50
+BACKFILL_SIZE = 20
+PAGE_SIZE = 20
+
+
+def publish(trainer_id, kind: str, object_id: int, title: str, url: str) -> None:
+    """Enregistre une publication et planifie sa diffusion après validation."""
+    from .tasks import fan_out_publication
+
+    def create():
+        publication, created = Publication.objects.get_or_create(
+            kind=kind,
+            object_id=object_id,
+            defaults={'trainer_id': trainer_id, 'title': title[:255], 'url': url},
+        )
+        if created:
+            enqueue(fan_out_publication, (publication.pk,))
+
+    transaction.on_commit(create)
+
+
+def unpublish(kind: str, object_id: int) -> None:
+    """Retire un contenu supprimé (et ses entrées de fil)."""
+    Publication.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def uses_fanout(subscribers_count: int) -> bool:
+    return subscribers_count <= FANOUT_LIMIT
+
+
+def fan_out(publication: Publication) -> int:
+    """Copie la publication dans le fil des abonnés actifs, par lots."""
+    if not uses_fanout(publication.trainer.subscribers_count):
+        return 0
+    follower_ids = (
+        Subscription.objects.filter(trainer_id=publication.trainer_id, is_active=True)
+        .values_list('subscriber_id', flat=True)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    written = 0
+    chunk = []
+    for follower_id in follower_ids:
+        chunk.append(follower_id)
+        if len(chunk) >= CHUNK_SIZE:
+            written += _write(publication, chunk)
+            chunk = []
+    if chunk:
+        written += _write(publication, chunk)
+    return written
+
+
+def _write(publication, user_ids) -> int:
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(user_id=uid, publication=publication, trainer_id=publication.trainer_id) for uid in user_ids],
+        ignore_conflicts=True,
+    )
+    trim(user_ids)
+    return len(user_ids)
+
+
+def trim(user_ids) -> None:
+    """Ramène à ``FEED_SIZE`` les fils qui dépassent la marge."""
+    overfull = (
+        FeedEntry.objects.filter(user_id__in=user_ids)
+        .values('user_id')
+        .annotate(n=Count('id'))
+        .filter(n__gt=FEED_SIZE + TRIM_SLACK)
+        .values_list('user_id', flat=True)
+    )
+    for user_id in overfull:
+        oldest_kept = (
+            FeedEntry.objects.filter(user_id=user_id)
+            .order_by('-publication_id')
+            .values_list('publication_id', flat=True)[FEED_SIZE - 1]
+        )
+        FeedEntry.objects.filter(user_id=user_id, publication_id__lt=oldest_kept).delete()
+
+
+def backfill(user_id, trainer_id) -> int:
+    """Ajoute au fil d'un nouvel abonné les dernières publications du formateur."""
+    publications = list(
+        Publication.objects.filter(trainer_id=trainer_id).order_by('-id')[:BACKFILL_SIZE]
+    )
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(user_id=user_id, publication=p, trainer_id=trainer_id) for p in publications],
+        ignore_conflicts=True,
+    )
+    trim([user_id])
+    return len(publications)
+
+
+def forget(user_id, trainer_id) -> None:
+    """Retire du fil les publications d'un formateur dont on s'est désabonné."""
+    FeedEntry.objects.filter(user_id=user_id, trainer_id=trainer_id).delete()
+
+
+def timeline(user, before=None, limit=PAGE_SIZE):
+    """
+    Page du fil de ``user`` : publications plus récentes que ``before``
+    exclu, de la plus récente à la plus ancienne. Retourne
+    ``(publications, curseur suivant ou None)``.
+    """
+    entries = FeedEntry.objects.filter(user=user)
+    if before:
+        entries = entries.filter(publication_id__lt=before)
+    publications = [
+        entry.publication
+        for entry in entries.select_related('publication__trainer').order_by('-publication_id')[:limit + 1]
+    ]
+
+    # Formateurs non diffusés à l'écriture : lecture directe de leurs publications
+    large_trainers = list(
+        Subscription.objects.filter(
+            subscriber=user, is_active=True, trainer__subscribers_count__gt=FANOUT_LIMIT
+        ).values_list('trainer_id', flat=True)
+    )
+    if large_trainers:
+        direct = Publication.objects.filter(trainer_id__in=large_trainers)
+        if before:
+            direct = direct.filter(id__lt=before)
+        merged = {p.pk: p for p in publications}
+        # Le formateur a pu franchir le seuil : ses anciennes entrées sont dédoublonnées
+        merged.update((p.pk, p) for p in direct.select_related('trainer').order_by('-id')[:limit + 1])
+        publications = sorted(merged.values(), key=lambda p: p.pk, reverse=True)
+
+    next_cursor = publications[limit - 1].pk if len(publications) > limit else None
+    return publications[:limit], next_cursor
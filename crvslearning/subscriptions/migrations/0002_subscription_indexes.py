@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:19
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_subscribers_count(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    counts = (
+        User.objects.annotate(n=Count('subscribers', filter=Q(subscribers__is_active=True)))
+        .filter(n__gt=0)
+        .values_list('pk', 'n')
+    )
+    for pk, n in counts:
+        User.objects.filter(pk=pk).update(subscribers_count=n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0001_initial'),
+        ('users', '0004_subscribers_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_subscribers_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['trainer', 'is_active'], name='subscription_trainer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['subscriber', 'is_active'], name='subscription_subscriber_idx'),
+        ),
+    ]
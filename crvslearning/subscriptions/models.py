@@ -21,8 +21,66 @@ class Subscription(models.Model):
 
     class Meta:
         unique_together = ('subscriber', 'trainer')
+        indexes = [
+            models.Index(fields=['trainer', 'is_active'], name='subscription_trainer_idx'),
+            models.Index(fields=['subscriber', 'is_active'], name='subscription_subscriber_idx'),
+        ]
         verbose_name = _('Abonnement')
         verbose_name_plural = _('Abonnements')
 
     def __str__(self):
         return f"{self.subscriber} suit {self.trainer}"
+
+
+class Publication(models.Model):
+    """Contenu publié par un formateur (cours, leçon, vidéo, session en direct)."""
+    KIND_CHOICES = (
+        ('course', _('Cours')),
+        ('lesson', _('Leçon')),
+        ('video', _('Vidéo')),
+        ('live_session', _('Session en direct')),
+    )
+
+    trainer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='publications',
+        verbose_name=_('Formateur')
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    url = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+        indexes = [
+            models.Index(fields=['trainer', '-id'], name='publication_trainer_idx'),
+        ]
+        verbose_name = _('Publication')
+        verbose_name_plural = _('Publications')
+
+    def __str__(self):
+        return f"{self.get_kind_display()} : {self.title}"
+
+
+class FeedEntry(models.Model):
+    """Entrée du fil d'un abonné, écrite à la publication (fan-out à l'écriture)."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    publication = models.ForeignKey(Publication, on_delete=models.CASCADE, related_name='feed_entries')
+    # Dénormalisé pour retirer les entrées d'un formateur au désabonnement
+    trainer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        unique_together = ('user', 'publication')
+        indexes = [
+            models.Index(fields=['user', '-publication'], name='feed_user_timeline_idx'),
+            models.Index(fields=['user', 'trainer'], name='feed_user_trainer_idx'),
+        ]
+        verbose_name = _("Entrée du fil")
+        verbose_name_plural = _("Entrées du fil")
@@ -1,7 +1,17 @@
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.urls import reverse
 from django.utils import timezone
+
+from classrooms.models import LiveSession
+from courses.models import Course, Lesson, LessonVideo
+
+from notifications.service import notify_users
+
+from . import feed
 from .models import Subscription
 
 User = get_user_model()
@@ -16,12 +26,92 @@ def create_welcome_subscription(sender, instance, created, **kwargs):
         # à certains formateurs populaires ou administrateurs
         pass
 
+def _adjust_subscribers_count(trainer_id, delta):
+    # Mise à jour atomique en base, sans relire le formateur
+    User.objects.filter(pk=trainer_id).update(subscribers_count=F('subscribers_count') + delta)
+
+
+@receiver(post_init, sender=Subscription)
+def remember_active_state(sender, instance, **kwargs):
+    instance._was_active = instance.is_active if instance.pk else False
+
+
+@receiver(post_save, sender=Subscription)
+def update_subscribers_count(sender, instance, created, **kwargs):
+    """Répercute l'(dés)activation d'un abonnement sur le compteur du formateur."""
+    if instance.is_active != instance._was_active:
+        _adjust_subscribers_count(instance.trainer_id, 1 if instance.is_active else -1)
+        instance._was_active = instance.is_active
+        _update_feed(instance)
+
+
+def _update_feed(subscription):
+    from .tasks import backfill_feed
+
+    user_id, trainer_id = subscription.subscriber_id, subscription.trainer_id
+    if subscription.is_active:
+        transaction.on_commit(lambda: backfill_feed.delay(user_id, trainer_id))
+    else:
+        feed.forget(user_id, trainer_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def decrement_subscribers_count(sender, instance, **kwargs):
+    if instance._was_active:
+        _adjust_subscribers_count(instance.trainer_id, -1)
+    feed.forget(instance.subscriber_id, instance.trainer_id)
+
+
 @receiver(post_save, sender=Subscription)
 def send_notification_on_subscription(sender, instance, created, **kwargs):
     """
     Envoie une notification lorsqu'un utilisateur s'abonne à un formateur
     """
     if created:
-        # Vous pouvez implémenter ici l'envoi d'une notification
-        # par exemple via des webhooks, des emails, ou des notifications en temps réel
-        pass
+        subscriber = instance.subscriber
+        notify_users(
+            [instance.trainer_id],
+            f"{subscriber.get_full_name() or subscriber.username} s'est abonné(e) à vos formations",
+            sender=subscriber,
+            notification_type='SUBSCRIPTION',
+        )
+
+
+@receiver(post_save, sender=Course)
+def publish_course(sender, instance, created, **kwargs):
+    if created:
+        feed.publish(instance.created_by_id, 'course', instance.pk, instance.title,
+                     reverse('courses:course_detail', args=[instance.pk]))
+
+
+@receiver(post_save, sender=Lesson)
+def publish_lesson(sender, instance, created, **kwargs):
+    if created:
+        feed.publish(instance.module.course.created_by_id, 'lesson', instance.pk, instance.title,
+                     reverse('courses:lesson_detail', args=[instance.pk]))
+
+
+@receiver(post_save, sender=LessonVideo)
+def publish_video(sender, instance, created, **kwargs):
+    if created:
+        lesson = instance.lesson
+        feed.publish(lesson.module.course.created_by_id, 'video', instance.pk, instance.title or lesson.title,
+                     reverse('courses:lesson_detail', args=[lesson.pk]))
+
+
+@receiver(post_save, sender=LiveSession)
+def publish_live_session(sender, instance, created, **kwargs):
+    if created:
+        feed.publish(instance.classroom.created_by_id, 'live_session', instance.pk, instance.title,
+                     reverse('classrooms:detail', args=[instance.classroom_id]))
+
+
+FEED_KINDS = {Course: 'course', Lesson: 'lesson', LessonVideo: 'video', LiveSession: 'live_session'}
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=LessonVideo)
+@receiver(post_delete, sender=LiveSession)
+def unpublish_content(sender, instance, **kwargs):
+    feed.unpublish(FEED_KINDS[sender], instance.pk)
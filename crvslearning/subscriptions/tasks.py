@@ -0,0 +1,25 @@
+import logging
+
+from celery import shared_task
+
+from . import feed
+from .models import Publication
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def fan_out_publication(self, publication_id):
+    publication = Publication.objects.select_related('trainer').filter(pk=publication_id).first()
+    if publication is None:
+        return 0
+    try:
+        return feed.fan_out(publication)
+    except Exception as exc:
+        logger.exception("Échec de la diffusion de la publication %s", publication_id)
+        raise self.retry(exc=exc)
+
+
+@shared_task
+def backfill_feed(user_id, trainer_id):
+    return feed.backfill(user_id, trainer_id)
@@ -1,3 +1,93 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from core import background
+from courses.models import Course, Lesson, Module
+
+from . import feed
+from .models import FeedEntry, Subscription
+
+
+class SubscribersCountTestCase(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.trainer = User.objects.create(username='formateur', role='trainer')
+        self.learner = User.objects.create(username='apprenant')
+
+    def count(self):
+        self.trainer.refresh_from_db()
+        return self.trainer.subscribers_count
+
+    def test_toggle_maintains_counter(self):
+        self.client.force_login(self.learner)
+        url = reverse('subscriptions:toggle_subscription', args=[self.trainer.username])
+        response = self.client.post(url)
+        self.assertEqual(response.json(), {'status': 'subscribed', 'subscribers_count': 1})
+        response = self.client.post(url)
+        self.assertEqual(response.json(), {'status': 'unsubscribed', 'subscribers_count': 0})
+        self.client.post(url)
+        self.assertEqual(self.count(), 1)
+
+    def test_delete_and_inactive_subscriptions(self):
+        other = get_user_model().objects.create(username='autre')
+        active = Subscription.objects.create(subscriber=self.learner, trainer=self.trainer)
+        Subscription.objects.create(subscriber=other, trainer=self.trainer, is_active=False)
+        self.assertEqual(self.count(), 1)
+        Subscription.objects.get(pk=active.pk).delete()
+        self.assertEqual(self.count(), 0)
+
+
+class FollowingFeedTestCase(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.trainer = User.objects.create(username='formateur', role='trainer')
+        self.learners = [User.objects.create(username=f'apprenant{i}') for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for learner in self.learners:
+                Subscription.objects.create(subscriber=learner, trainer=self.trainer)
+        background.run_pending(force=True)
+
+    def publish_lessons(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(title='Python', description='d', created_by=self.trainer)
+            module = Module.objects.create(course=course, title='Bases')
+            for i in range(count):
+                Lesson.objects.create(module=module, title=f'Leçon {i}')
+        background.run_pending(force=True)
+
+    def test_fan_out_after_response(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.create(title='Python', description='d', created_by=self.trainer)
+        self.assertFalse(FeedEntry.objects.exists())
+        background.run_pending(force=True)
+        self.assertEqual(FeedEntry.objects.count(), 3)
+
+    def test_fan_out_and_keyset_pages(self):
+        self.publish_lessons(4)
+        self.assertEqual(FeedEntry.objects.filter(user=self.learners[0]).count(), 5)
+        page, cursor = feed.timeline(self.learners[0], limit=3)
+        self.assertEqual([p.title for p in page], ['Leçon 3', 'Leçon 2', 'Leçon 1'])
+        page, cursor = feed.timeline(self.learners[0], before=cursor, limit=3)
+        self.assertEqual([p.title for p in page], ['Leçon 0', 'Python'])
+        self.assertIsNone(cursor)
+
+    def test_feed_capped_and_unsubscribe_clears(self):
+        with mock.patch.object(feed, 'FEED_SIZE', 3), mock.patch.object(feed, 'TRIM_SLACK', 0):
+            self.publish_lessons(5)
+        self.assertEqual(FeedEntry.objects.filter(user=self.learners[0]).count(), 3)
+        subscription = Subscription.objects.get(subscriber=self.learners[0])
+        subscription.is_active = False
+        subscription.save()
+        self.assertFalse(FeedEntry.objects.filter(user=self.learners[0]).exists())
 
-# Create your tests here.
+    def test_large_trainer_read_on_demand(self):
+        with mock.patch.object(feed, 'FANOUT_LIMIT', 2):
+            self.publish_lessons(2)
+            self.assertFalse(FeedEntry.objects.exists())
+            page, cursor = feed.timeline(self.learners[1])
+        self.assertEqual([p.title for p in page], ['Leçon 1', 'Leçon 0', 'Python'])
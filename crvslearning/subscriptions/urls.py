@@ -19,4 +19,7 @@ urlpatterns = [
     path('my-subscribers/', 
          login_required(views.MySubscribersView.as_view()), 
          name='my_subscribers'),
+    
+    # Fil des contenus des formateurs suivis
+    path('feed/', views.following_feed, name='feed'),
 ]
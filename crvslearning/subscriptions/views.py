@@ -6,7 +6,9 @@ from django.utils.translation import gettext_lazy as _
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.contrib.auth import get_user_model
+from django.db import transaction
 
+from . import feed
 from .models import Subscription
 
 User = get_user_model()
@@ -25,17 +27,20 @@ def toggle_subscription(request, username):
         )
     
     trainer = get_object_or_404(User, username=username, role='trainer')
-    subscription, created = Subscription.objects.get_or_create(
-        subscriber=request.user,
-        trainer=trainer,
-        defaults={'is_active': True}
-    )
-    
-    if not created:
-        subscription.is_active = not subscription.is_active
-        subscription.save()
+    with transaction.atomic():
+        subscription, created = Subscription.objects.get_or_create(
+            subscriber=request.user,
+            trainer=trainer,
+            defaults={'is_active': True}
+        )
+        
+        if not created:
+            # Verrou sur la ligne : deux bascules simultanées ne se croisent pas
+            subscription = Subscription.objects.select_for_update().get(pk=subscription.pk)
+            subscription.is_active = not subscription.is_active
+            subscription.save(update_fields=['is_active'])
     
-    subscribers_count = trainer.subscribers.filter(is_active=True).count()
+    subscribers_count = User.objects.values_list('subscribers_count', flat=True).get(pk=trainer.pk)
     
     return JsonResponse({
         'status': 'subscribed' if subscription.is_active else 'unsubscribed',
@@ -79,3 +84,32 @@ class MySubscribersView(ListView):
             .filter(trainer=self.request.user, is_active=True)
             .select_related('subscriber')
         )
+
+
+@login_required
+def following_feed(request):
+    """Fil des contenus publiés par les formateurs suivis (pagination par curseur)."""
+    try:
+        before = int(request.GET.get('before', 0)) or None
+    except ValueError:
+        before = None
+    publications, next_cursor = feed.timeline(request.user, before=before)
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'items': [
+                {
+                    'id': p.pk,
+                    'kind': p.kind,
+                    'title': p.title,
+                    'url': p.url,
+                    'trainer': p.trainer.get_full_name() or p.trainer.username,
+                    'created_at': p.created_at.isoformat(),
+                }
+                for p in publications
+            ],
+            'next': next_cursor,
+        })
+    return render(request, 'subscriptions/feed.html', {
+        'publications': publications,
+        'next_cursor': next_cursor,
+    })
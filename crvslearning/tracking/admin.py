@@ -1,3 +1,12 @@
 from django.contrib import admin
 
-# Register your models here.
+from core.admin_lists import ScalableAdminMixin
+
+from .models import ActivityLog
+
+
+@admin.register(ActivityLog)
+class ActivityLogAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'user', 'action', 'course', 'lesson', 'timestamp')
+    list_filter = ('action',)
+    search_fields = ('user__username',)
@@ -6,9 +6,11 @@ from django.apps import apps
 from django.http import HttpResponseForbidden, Http404
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
-from django.forms import modelform_factory
 from django import forms
 from django.utils.text import capfirst
+from django.contrib.admin.utils import display_for_field, display_for_value, label_for_field, lookup_field
+
+from core.admin_lists import displayed_relations, estimated_count, keyset_page
 
 def admin_required(view_func):
     """
@@ -36,33 +38,57 @@ def get_model_from_string(app_label, model_name):
     except LookupError:
         raise Http404("Modèle non trouvé")
 
+def _display(name, obj, model_admin):
+    """Valeur affichée d'une colonne, comme dans la liste de l'admin."""
+    field, attr, value = lookup_field(name, obj, model_admin)
+    if field is None:
+        return display_for_value(value, '-', boolean=getattr(attr, 'boolean', False))
+    return display_for_field(value, field, '-')
+
+def _cursor(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except ValueError:
+        return None
+
 @login_required
 @admin_required
 def model_list(request, app_label, model_name):
-    """Affiche la liste des objets d'un modèle."""
+    """Affiche la liste des objets d'un modèle (pagination par curseur)."""
     model = get_model_from_string(app_label, model_name)
     model_admin = get_model_admin(model)
     
-    if not model_admin:
+    if not model_admin or not model_admin.has_view_permission(request):
         raise Http404("Modèle non trouvé dans l'admin")
     
     # Récupérer les objets avec la même logique que l'admin
     queryset = model_admin.get_queryset(request)
-    list_display = model_admin.get_list_display(request)
-    list_filter = model_admin.get_list_filter(request)
-    
-    # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(queryset, 25)  # 25 éléments par page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    list_display = [name for name in model_admin.get_list_display(request) if name != 'action_checkbox']
+    related = displayed_relations(model, list_display)
+    if related:
+        queryset = queryset.select_related(*related)
+    
+    # Curseur sur la clé primaire : pas d'OFFSET ni de COUNT(*) exact
+    objects, next_key, previous_key = keyset_page(
+        queryset,
+        after=_cursor(request.GET.get('after')),
+        before=_cursor(request.GET.get('before')),
+    )
+    headers = [label_for_field(name, model, model_admin) for name in list_display]
+    rows = [
+        (obj, [_display(name, obj, model_admin) for name in list_display])
+        for obj in objects
+    ]
     
     context = {
         'title': f'Liste des {model._meta.verbose_name_plural}',
         'model': model,
         'model_admin': model_admin,
-        'list_display': list_display,
-        'page_obj': page_obj,
+        'headers': headers,
+        'rows': rows,
+        'next_key': next_key,
+        'previous_key': previous_key,
+        'total_count': estimated_count(queryset),
         'opts': model._meta,
         'has_add_permission': model_admin.has_add_permission(request),
         'has_change_permission': model_admin.has_change_permission(request),
@@ -80,12 +106,8 @@ def model_add(request, app_label, model_name):
     if not model_admin or not model_admin.has_add_permission(request):
         raise Http404("Action non autorisée")
     
-    # Créer un formulaire dynamique basé sur le modèle
-    ModelForm = modelform_factory(
-        model,
-        fields='__all__',
-        formfield_callback=model_admin.formfield_for_dbfield
-    )
+    # Formulaire de l'admin (fields, exclude, readonly_fields, widgets)
+    ModelForm = model_admin.get_form(request, None, change=False)
     
     if request.method == 'POST':
         form = ModelForm(request.POST, request.FILES)
@@ -117,12 +139,8 @@ def model_edit(request, app_label, model_name, object_id):
     if not model_admin or not model_admin.has_change_permission(request, obj):
         raise Http404("Action non autorisée")
     
-    # Créer un formulaire dynamique basé sur le modèle
-    ModelForm = modelform_factory(
-        model,
-        fields='__all__',
-        formfield_callback=model_admin.formfield_for_dbfield
-    )
+    # Formulaire de l'admin (fields, exclude, readonly_fields, widgets)
+    ModelForm = model_admin.get_form(request, obj, change=True)
     
     if request.method == 'POST':
         form = ModelForm(request.POST, request.FILES, instance=obj)
@@ -0,0 +1,83 @@
+"""
+Données de la chaîne publique d'un formateur (cours et vidéos).
+
+Les cours et toutes les vidéos du formateur sont lus en deux requêtes
+(les vidéos en une seule requête jointe, déjà ordonnées) puis gardés en
+cache par formateur. Le cache est invalidé par les signaux de
+``users.signals`` à chaque modification d'un cours, module, leçon ou vidéo.
+"""
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+
+from courses.models import Course, LessonVideo
+
+CHANNEL_KEY = "users:channel:{trainer_id}"
+CHANNEL_TTL = 15 * 60
+VIDEOS_PER_PAGE = 24
+
+
+def channel_key(trainer_id) -> str:
+    return CHANNEL_KEY.format(trainer_id=trainer_id)
+
+
+def invalidate(trainer_id) -> None:
+    if trainer_id:
+        cache.delete(channel_key(trainer_id))
+
+
+def _url(name):
+    return default_storage.url(name) if name else None
+
+
+def build(trainer_id) -> dict:
+    """Cours (du plus récent au plus ancien) et vidéos du formateur."""
+    courses = [
+        {
+            'id': c['id'],
+            'title': c['title'],
+            'thumbnail_url': _url(c['thumbnail']),
+            'category_name': c['category__name'],
+        }
+        for c in Course.objects.filter(created_by_id=trainer_id)
+        .order_by('-created_at')
+        .values('id', 'title', 'thumbnail', 'category__name')
+    ]
+    rows = (
+        LessonVideo.objects.filter(lesson__module__course__created_by_id=trainer_id)
+        .order_by(
+            '-lesson__module__course__created_at',
+            'lesson__module__course_id',
+            'lesson__module__order',
+            'lesson__order',
+            'order',
+        )
+        .values(
+            'id', 'title', 'duration', 'lesson_id',
+            'lesson__title', 'lesson__description', 'lesson__thumbnail', 'lesson__created_at',
+            'lesson__module__course_id', 'lesson__module__course__title', 'lesson__module__course__thumbnail',
+        )
+    )
+    videos = [
+        {
+            'id': v['id'],
+            'title': v['title'] or v['lesson__title'],
+            'description': v['lesson__description'] or '',
+            'thumbnail_url': _url(v['lesson__thumbnail'] or v['lesson__module__course__thumbnail']),
+            'course_title': v['lesson__module__course__title'],
+            'course_id': v['lesson__module__course_id'],
+            'duration': v['duration'],
+            'created_at': v['lesson__created_at'],
+            'lesson_id': v['lesson_id'],
+        }
+        for v in rows
+    ]
+    return {'courses': courses, 'videos': videos}
+
+
+def get_channel(trainer_id) -> dict:
+    key = channel_key(trainer_id)
+    data = cache.get(key)
+    if data is None:
+        data = build(trainer_id)
+        cache.set(key, data, CHANNEL_TTL)
+    return data
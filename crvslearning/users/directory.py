@@ -0,0 +1,99 @@
+"""
+Annuaire des formateurs (``TrainerDirectory``).
+
+Une ligne par formateur (ou superutilisateur) avec une clé de recherche
+normalisée et le nombre de cours, recalculée à chaque modification du
+profil ou de ses cours. La recherche se fait alors en une requête
+paginée, sans comptage par formateur.
+"""
+import unicodedata
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, OuterRef, Q, Subquery
+
+from courses.models import Course
+
+from .models import TrainerDirectory
+
+BATCH_SIZE = 1000
+# Champs du profil qui entrent dans l'annuaire
+INDEXED_FIELDS = {'username', 'first_name', 'last_name', 'role', 'is_superuser'}
+
+
+def normalize(text: str) -> str:
+    """Minuscules, sans accents, espaces réduits."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+def _is_listed():
+    return Q(role='trainer') | Q(is_superuser=True)
+
+
+def _upsert(users, directory_model) -> int:
+    entries = [
+        directory_model(
+            trainer_id=user.pk,
+            search_key=normalize(f'{user.username} {user.first_name} {user.last_name}')[:500],
+            courses_count=user.n_courses,
+        )
+        for user in users
+    ]
+    directory_model.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['trainer'],
+        update_fields=['search_key', 'courses_count'],
+    )
+    return len(entries)
+
+
+def _listed_users(user_model, course_model):
+    # Sous-requête plutôt que jointure : un seul comptage par formateur
+    courses = (
+        course_model.objects.filter(created_by=OuterRef('pk'))
+        .order_by()
+        .values('created_by')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    return user_model.objects.filter(_is_listed()).annotate(n_courses=Subquery(courses)).only(
+        'pk', 'username', 'first_name', 'last_name'
+    )
+
+
+def refresh(user_ids) -> None:
+    """Recalcule les entrées des utilisateurs donnés (et retire les non-formateurs)."""
+    user_ids = list(user_ids)
+    users = list(_listed_users(get_user_model(), Course).filter(pk__in=user_ids))
+    for user in users:
+        user.n_courses = user.n_courses or 0
+    _upsert(users, TrainerDirectory)
+    TrainerDirectory.objects.filter(trainer_id__in=set(user_ids) - {u.pk for u in users}).delete()
+
+
+def rebuild_directory() -> int:
+    """Reconstruit tout l'annuaire."""
+    User = get_user_model()
+    TrainerDirectory.objects.exclude(trainer__in=User.objects.filter(_is_listed())).delete()
+    count = 0
+    batch = []
+    for user in _listed_users(User, Course).order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        user.n_courses = user.n_courses or 0
+        batch.append(user)
+        if len(batch) >= BATCH_SIZE:
+            count += _upsert(batch, TrainerDirectory)
+            batch = []
+    if batch:
+        count += _upsert(batch, TrainerDirectory)
+    return count
+
+
+def search(query: str):
+    """Entrées correspondant à ``query``, les plus suivies d'abord."""
+    return (
+        TrainerDirectory.objects.filter(search_key__contains=normalize(query))
+        .select_related('trainer')
+        .order_by('-trainer__subscribers_count', '-courses_count', 'trainer_id')
+    )
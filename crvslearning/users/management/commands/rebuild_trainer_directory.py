@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.directory import rebuild_directory
+
+
+class Command(BaseCommand):
+    help = "Rebuild the trainer directory used by the trainer search"
+
+    def handle(self, *args, **options):
+        count = rebuild_directory()
+        self.stdout.write(self.style.SUCCESS(f"{count} trainer directory entries rebuilt"))
@@ -1,7 +1,8 @@
-from django.utils import timezone
 from django.shortcuts import redirect
 from django.urls import reverse
 
+from . import presence
+
 class LastSeenMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -9,12 +10,9 @@ class LastSeenMiddleware:
     def __call__(self, request):
         response = self.get_response(request)
         if request.user.is_authenticated:
-            # Update last_seen at most every minute to reduce writes
-            user = request.user
-            now = timezone.now()
+            # L'activité est enregistrée dans le cache puis reportée en base par lots
             try:
-                if not user.last_seen or (now - user.last_seen).total_seconds() > 60:
-                    type(user).objects.filter(pk=user.pk).update(last_seen=now)
+                presence.mark_seen(request.user.pk)
             except Exception:
                 pass
         return response
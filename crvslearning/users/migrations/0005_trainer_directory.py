@@ -0,0 +1,71 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:24
+
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+
+BATCH_SIZE = 1000
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+def build_directory(apps, schema_editor):
+    """Remplit l'annuaire (logique figée ici, sans importer ``users.directory``)."""
+    CustomUser = apps.get_model('users', 'CustomUser')
+    Course = apps.get_model('courses', 'Course')
+    TrainerDirectory = apps.get_model('users', 'TrainerDirectory')
+    courses = (
+        Course.objects.filter(created_by=OuterRef('pk'))
+        .order_by()
+        .values('created_by')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    users = (
+        CustomUser.objects.filter(Q(role='trainer') | Q(is_superuser=True))
+        .annotate(n_courses=Subquery(courses))
+        .only('pk', 'username', 'first_name', 'last_name')
+        .order_by('pk')
+    )
+    batch = []
+    for user in users.iterator(chunk_size=BATCH_SIZE):
+        batch.append(TrainerDirectory(
+            trainer_id=user.pk,
+            search_key=normalize(f'{user.username} {user.first_name} {user.last_name}')[:500],
+            courses_count=user.n_courses or 0,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            TrainerDirectory.objects.bulk_create(batch)
+            batch = []
+    TrainerDirectory.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_lesson_is_active'),
+        ('users', '0004_subscribers_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainerDirectory',
+            fields=[
+                ('trainer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='directory_entry', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('search_key', models.CharField(max_length=500)),
+                ('courses_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': "Entrée de l'annuaire des formateurs",
+                'verbose_name_plural': 'Annuaire des formateurs',
+            },
+        ),
+        migrations.RunPython(build_directory, migrations.RunPython.noop),
+    ]
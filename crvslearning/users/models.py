@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce, Lower
 from django.utils.translation import gettext_lazy as _
 
 class CustomUser(AbstractUser):
@@ -14,16 +16,33 @@ class CustomUser(AbstractUser):
     cover = models.ImageField(upload_to='covers/', blank=True, null=True)
     bio = models.TextField(blank=True, null=True)
     last_seen = models.DateTimeField(blank=True, null=True)
+    # Abonnés actifs, tenu à jour par les signaux de l'application subscriptions
+    subscribers_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Recherche par préfixe de l'annuaire des contacts (interactions)
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+            models.Index(Lower('first_name'), name='user_first_name_lower_idx'),
+            models.Index(Lower('last_name'), name='user_last_name_lower_idx'),
+            models.Index(fields=['last_seen'], name='user_last_seen_idx'),
+        ]
 
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
 
     @property
     def is_online(self):
-        from django.utils import timezone
-        if not self.last_seen:
-            return False
-        return (timezone.now() - self.last_seen).total_seconds() < 300
+        # La présence est lue dans le cache ; last_seen (déjà chargé) sert de repli
+        from .presence import SEEN_KEY, is_online_at
+        from django.core.cache import cache
+        if hasattr(self, '_presence_seen'):
+            seen = self._presence_seen
+        else:
+            seen = cache.get(SEEN_KEY.format(user_id=self.pk))
+        if seen is None and self.last_seen:
+            seen = self.last_seen.timestamp()
+        return is_online_at(seen)
 
     def get_avatar_url(self):
         """
@@ -71,14 +90,34 @@ class CustomUser(AbstractUser):
 
     def get_unread_messages(self):
         """
-        Return user's unread messages
+        Return user's unread messages (after the read watermark of each room)
         """
-        if hasattr(self, 'received_messages'):
-            return self.received_messages.filter(read=False)
-        return self.receivedmessage_set.filter(read=False)
+        from interactions.models import ChatReadMarker
+        last_read = ChatReadMarker.objects.filter(user=self, chat=OuterRef('chat')).values('last_read_id')[:1]
+        return self.received_messages.filter(id__gt=Coalesce(Subquery(last_read), 0))
 
     def get_unread_messages_count(self):
         """
         Return count of unread messages
         """
         return self.get_unread_messages().count()
+
+
+class TrainerDirectory(models.Model):
+    """
+    Annuaire des formateurs pour la recherche : clé normalisée (sans
+    accents, en minuscules) et nombre de cours précalculé. Tenu à jour par
+    ``users.directory`` ; le nombre d'abonnés est celui de l'utilisateur.
+    """
+    trainer = models.OneToOneField(
+        CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='directory_entry'
+    )
+    search_key = models.CharField(max_length=500)
+    courses_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = _('Entrée de l\'annuaire des formateurs')
+        verbose_name_plural = _('Annuaire des formateurs')
+
+    def __str__(self):
+        return self.search_key
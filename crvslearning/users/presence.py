@@ -0,0 +1,110 @@
+"""
+Présence des utilisateurs (en ligne / dernière activité).
+
+L'activité est enregistrée uniquement dans le cache : une clé par
+utilisateur contenant l'horodatage de la dernière activité. Un utilisateur
+est en ligne si cette activité date de moins de ``ONLINE_WINDOW`` secondes.
+
+Les utilisateurs actifs sont inscrits au plus une fois par intervalle de
+synchronisation dans un journal en cache (un numéro de séquence par
+inscription). ``flush_last_seen`` relit ce journal et reporte les
+horodatages dans ``CustomUser.last_seen`` par lots.
+
+Sans broker (``CELERY_TASK_ALWAYS_EAGER``), la tâche périodique ne tourne
+pas et le cache est propre à chaque processus : ``last_seen`` est alors mis
+à jour directement, au plus une fois par utilisateur et par intervalle de
+synchronisation (et par processus).
+"""
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+ONLINE_WINDOW = 300
+FLUSH_INTERVAL = 120
+FLUSH_BATCH_SIZE = 500
+# Conservé au-delà de la fenêtre en ligne pour survivre à une synchro manquée
+SEEN_TTL = 24 * 60 * 60
+
+SEEN_KEY = "presence:seen:{user_id}"
+QUEUED_KEY = "presence:queued:{user_id}"
+SEQ_KEY = "presence:journal:seq"
+CURSOR_KEY = "presence:journal:cursor"
+SLOT_KEY = "presence:journal:{slot}"
+
+
+def _writes_through() -> bool:
+    return getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False)
+
+
+def mark_seen(user_id: int, at: float = None) -> None:
+    """
+    Enregistre une activité de l'utilisateur dans le cache ; l'écriture en
+    base est différée, sauf sans broker où elle est seulement espacée.
+    """
+    at = time.time() if at is None else at
+    cache.set(SEEN_KEY.format(user_id=user_id), at, SEEN_TTL)
+    if cache.add(QUEUED_KEY.format(user_id=user_id), 1, FLUSH_INTERVAL):
+        if _writes_through():
+            get_user_model().objects.filter(pk=user_id).update(
+                last_seen=datetime.fromtimestamp(at, tz=timezone.utc)
+            )
+            return
+        cache.add(SEQ_KEY, 0, None)
+        slot = cache.incr(SEQ_KEY)
+        cache.set(SLOT_KEY.format(slot=slot), user_id, SEEN_TTL)
+
+
+def last_seen_many(user_ids) -> dict:
+    """Retourne ``{user_id: timestamp}`` pour les utilisateurs connus du cache."""
+    keys = {SEEN_KEY.format(user_id=uid): uid for uid in user_ids}
+    return {keys[k]: v for k, v in cache.get_many(list(keys)).items()}
+
+
+def is_online_at(timestamp, now: float = None) -> bool:
+    if timestamp is None:
+        return False
+    now = time.time() if now is None else now
+    return now - timestamp < ONLINE_WINDOW
+
+
+def prime(users) -> None:
+    """
+    Charge la présence de plusieurs utilisateurs en un seul accès au cache,
+    pour éviter un accès par utilisateur lors de l'affichage d'une liste.
+    """
+    users = list(users)
+    seen = last_seen_many(u.pk for u in users)
+    for u in users:
+        u._presence_seen = seen.get(u.pk)
+
+
+def flush_last_seen() -> int:
+    """
+    Reporte en base les dernières activités inscrites au journal depuis la
+    précédente synchronisation. Retourne le nombre d'utilisateurs mis à jour.
+    """
+    User = get_user_model()
+    upto = cache.get(SEQ_KEY) or 0
+    start = cache.get(CURSOR_KEY) or 0
+    if upto <= start:
+        return 0
+
+    updated = 0
+    for first in range(start + 1, upto + 1, FLUSH_BATCH_SIZE):
+        slots = [SLOT_KEY.format(slot=s) for s in range(first, min(first + FLUSH_BATCH_SIZE, upto + 1))]
+        user_ids = set(cache.get_many(slots).values())
+        seen = last_seen_many(user_ids)
+        users = [
+            User(pk=uid, last_seen=datetime.fromtimestamp(ts, tz=timezone.utc))
+            for uid, ts in seen.items()
+        ]
+        if users:
+            User.objects.bulk_update(users, ['last_seen'], batch_size=FLUSH_BATCH_SIZE)
+            updated += len(users)
+        cache.delete_many(slots)
+
+    cache.set(CURSOR_KEY, upto, None)
+    return updated
@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.conf import settings
-from courses.models import LearningPath
+from courses.models import Course, LearningPath, Lesson, LessonVideo, Module
+
+from . import channel, directory
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_learning_path(sender, instance, created, **kwargs):
@@ -18,3 +21,56 @@ def save_learning_path(sender, instance, **kwargs):
     """
     if hasattr(instance, 'learning_path'):
         instance.learning_path.save()
+
+
+def _invalidate_channel(trainer_id):
+    transaction.on_commit(lambda: channel.invalidate(trainer_id))
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_channel_course(sender, instance, **kwargs):
+    """La chaîne publique du formateur est reconstruite au prochain affichage."""
+    _invalidate_channel(instance.created_by_id)
+
+
+@receiver([post_save, post_delete], sender=Module)
+def invalidate_channel_module(sender, instance, **kwargs):
+    _invalidate_channel(
+        Course.objects.filter(pk=instance.course_id).values_list('created_by_id', flat=True).first()
+    )
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def invalidate_channel_lesson(sender, instance, **kwargs):
+    _invalidate_channel(
+        Module.objects.filter(pk=instance.module_id).values_list('course__created_by_id', flat=True).first()
+    )
+
+
+@receiver([post_save, post_delete], sender=LessonVideo)
+def invalidate_channel_video(sender, instance, **kwargs):
+    _invalidate_channel(
+        Lesson.objects.filter(pk=instance.lesson_id).values_list('module__course__created_by_id', flat=True).first()
+    )
+
+
+def _refresh_directory(user_id):
+    transaction.on_commit(lambda: directory.refresh([user_id]))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def refresh_directory_user(sender, instance, update_fields=None, **kwargs):
+    """Met à jour l'annuaire des formateurs si le nom ou le rôle a pu changer."""
+    if update_fields is None or directory.INDEXED_FIELDS & set(update_fields):
+        _refresh_directory(instance.pk)
+
+
+@receiver(post_save, sender=Course)
+def refresh_directory_course(sender, instance, created, **kwargs):
+    if created:
+        _refresh_directory(instance.created_by_id)
+
+
+@receiver(post_delete, sender=Course)
+def refresh_directory_course_deleted(sender, instance, **kwargs):
+    _refresh_directory(instance.created_by_id)
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .presence import flush_last_seen
+
+
+@shared_task
+def flush_presence():
+    return flush_last_seen()
@@ -1,3 +1,122 @@
-from django.test import TestCase
+import time
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import background
+from courses.models import Course, Lesson, LessonVideo, Module
+from subscriptions.models import Subscription
+
+from . import channel, presence
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=False)
+class PresenceTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='alice')
+
+    def test_mark_seen_does_not_write_to_db(self):
+        with self.assertNumQueries(0):
+            presence.mark_seen(self.user.pk)
+            self.assertTrue(self.user.is_online)
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_seen)
+
+    def test_flush_last_seen(self):
+        other = get_user_model().objects.create(username='bob')
+        presence.mark_seen(self.user.pk, at=time.time() - 1000)
+        presence.mark_seen(self.user.pk)
+        presence.mark_seen(other.pk, at=time.time() - 1000)
+        self.assertFalse(get_user_model().objects.get(pk=other.pk).is_online)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(presence.flush_last_seen(), 2)
+        self.user.refresh_from_db()
+        self.assertAlmostEqual(self.user.last_seen.timestamp(), time.time(), delta=5)
+        # Rien de nouveau depuis la dernière synchronisation
+        self.assertEqual(presence.flush_last_seen(), 0)
+
+    def test_prime_reads_presence_once(self):
+        presence.mark_seen(self.user.pk)
+        users = list(get_user_model().objects.all())
+        presence.prime(users)
+        cache.clear()
+        self.assertTrue(users[0].is_online)
+
+
+class PresenceWithoutBrokerTestCase(TestCase):
+    """Configuration par défaut : pas de Redis, tâches exécutées sur place."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='alice')
+
+    def test_mark_seen_persists_once_per_interval(self):
+        with self.assertNumQueries(1):
+            presence.mark_seen(self.user.pk)
+            presence.mark_seen(self.user.pk)
+        self.user.refresh_from_db()
+        self.assertAlmostEqual(self.user.last_seen.timestamp(), time.time(), delta=5)
+        cache.clear()
+        self.assertTrue(get_user_model().objects.get(pk=self.user.pk).is_online)
+
+
+class TrainerChannelTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.trainer = get_user_model().objects.create(username='formateur', role='trainer')
+        self.lessons = []
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(2):
+                course = Course.objects.create(title=f'Cours {i}', description='d', created_by=self.trainer)
+                module = Module.objects.create(course=course, title='Module')
+                lesson = Lesson.objects.create(module=module, title=f'Leçon {i}')
+                LessonVideo.objects.create(lesson=lesson, video_file='lessons/videos/v.mp4')
+                self.lessons.append(lesson)
+        # Notifications aux abonnés, différées hors de la requête
+        background.run_pending(force=True)
+
+    def test_videos_in_one_query_then_cached(self):
+        with self.assertNumQueries(2):
+            data = channel.get_channel(self.trainer.pk)
+        self.assertEqual([v['title'] for v in data['videos']], ['Leçon 1', 'Leçon 0'])
+        with self.assertNumQueries(0):
+            channel.get_channel(self.trainer.pk)
+
+    def test_content_change_invalidates(self):
+        channel.get_channel(self.trainer.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            LessonVideo.objects.create(lesson=self.lessons[0], title='Bonus', video_file='lessons/videos/b.mp4')
+        self.assertEqual(len(channel.get_channel(self.trainer.pk)['videos']), 3)
+
+
+class TrainerSearchTestCase(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.learner = User.objects.create(username='apprenant')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trainers = [
+                User.objects.create(username=f'formateur{i}', first_name='Hélène', role='trainer')
+                for i in range(3)
+            ]
+            Course.objects.create(title='Python', description='d', created_by=self.trainers[1])
+            Subscription.objects.create(subscriber=self.learner, trainer=self.trainers[2])
+        background.run_pending(force=True)
+
+    # Sessions en cache et présence reportée par lots : seules les requêtes
+    # de la vue sont comptées
+    @override_settings(SESSION_ENGINE='core.sessions', CELERY_TASK_ALWAYS_EAGER=False)
+    def test_search_uses_directory(self):
+        self.client.force_login(self.learner)
+        with self.assertNumQueries(4):  # utilisateur, comptage, page, abonnements
+            response = self.client.get(reverse('users:search_trainers'), {'q': 'helene'})
+        trainers = response.json()['trainers']
+        self.assertEqual([t['username'] for t in trainers], ['formateur2', 'formateur1', 'formateur0'])
+        self.assertEqual([t['is_subscribed'] for t in trainers], [True, False, False])
+        self.assertEqual(trainers[1]['courses_count'], 1)
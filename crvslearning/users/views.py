@@ -5,8 +5,10 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
+from django.core.paginator import Paginator
 from django.utils import timezone
+from . import directory
+from .channel import VIDEOS_PER_PAGE, get_channel
 from .models import CustomUser
 from subscriptions.models import Subscription
 from .forms import CustomUserCreationForm
@@ -15,6 +17,9 @@ from .forms import ProfileForm
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth import update_session_auth_hash
 
+TRAINERS_PER_PAGE = 20
+
+
 def instructor_public(request, username: str):
     trainer = get_object_or_404(CustomUser, username=username)
     # Vérifier si l'utilisateur est un formateur ou un administrateur
@@ -33,35 +38,18 @@ def instructor_public(request, username: str):
             is_active=True
         ).exists()
     
-    # Compter le nombre d'abonnés
-    subscribers_count = trainer.subscribers.filter(is_active=True).count()
+    # Compteur dénormalisé, tenu à jour à chaque (dés)abonnement
+    subscribers_count = trainer.subscribers_count
     
-    courses = Course.objects.filter(created_by=trainer).select_related('category').order_by('-created_at')
-    teacher_courses = Course.objects.filter(created_by=trainer).order_by('title')
-    categories = Category.objects.all().order_by('name')
+    # Cours et vidéos de la chaîne, en cache par formateur
+    channel = get_channel(trainer.pk)
+    courses = channel['courses']
+    videos_page = Paginator(channel['videos'], VIDEOS_PER_PAGE).get_page(request.GET.get('page'))
     
-    # Récupérer toutes les vidéos des cours du formateur
-    from courses.models import LessonVideo
-    videos = []
-    for course in courses:
-        course_videos = LessonVideo.objects.filter(
-            lesson__module__course=course
-        ).select_related('lesson__module').order_by('lesson__module__order', 'lesson__order', 'order')
-        
-        for video in course_videos:
-            videos.append({
-                'id': video.id,
-                'title': video.title or video.lesson.title,
-                'description': video.lesson.description or '',
-                'thumbnail_url': video.lesson.thumbnail.url if video.lesson.thumbnail else (
-                    course.thumbnail.url if course.thumbnail else None
-                ),
-                'course_title': course.title,
-                'course_id': course.id,
-                'duration': video.duration,
-                'created_at': getattr(video.lesson, 'created_at', timezone.now()),
-                'lesson_id': video.lesson.id
-            })
+    # Les catégories ne servent qu'au formulaire de création de cours du propriétaire
+    categories = []
+    if request.user.is_authenticated and (request.user == trainer or request.user.is_superuser):
+        categories = Category.objects.all().order_by('name')
     
     upcoming_sessions = []
     try:
@@ -75,7 +63,7 @@ def instructor_public(request, username: str):
         upcoming_sessions = []
     
     stats = {
-        'courses': courses.count(),
+        'courses': len(courses),
     }
     
     # Vérifier si l'utilisateur vient d'une recherche
@@ -93,7 +81,6 @@ def instructor_public(request, username: str):
     return render(request, 'users/instructor_public.html', {
         'trainer': trainer,
         'courses': courses,
-        'teacher_courses': teacher_courses,
         'upcoming_sessions': upcoming_sessions,
         'stats': stats,
         'categories': categories,
@@ -101,7 +88,7 @@ def instructor_public(request, username: str):
         'subscribers_count': subscribers_count,
         'from_search': from_search,
         'unread_count': unread_count,
-        'videos': videos,
+        'videos_page': videos_page,
     })
 
 @login_required
@@ -404,42 +391,38 @@ def search_trainers(request):
     if not query or len(query) < 2:
         return JsonResponse({'trainers': []})
     
-    # Recherche des formateurs correspondant à la requête
-    trainers = CustomUser.objects.filter(
-        Q(role='trainer') | Q(is_superuser=True),
-        Q(username__icontains=query) | 
-        Q(first_name__icontains=query) | 
-        Q(last_name__icontains=query)
-    ).distinct()
-    
-    # Préparation des données des formateurs
-    results = []
-    current_user = request.user if request.user.is_authenticated else None
+    # Une requête paginée sur l'annuaire (compteurs précalculés)
+    page = Paginator(directory.search(query), TRAINERS_PER_PAGE).get_page(request.GET.get('page'))
+    entries = list(page)
     
-    for trainer in trainers:
-        # Vérifier si l'utilisateur actuel est abonné à ce formateur
-        is_subscribed = False
-        if current_user and current_user.is_authenticated and current_user != trainer:
-            is_subscribed = Subscription.objects.filter(
-                subscriber=current_user,
-                trainer=trainer,
+    # Abonnements de l'utilisateur courant, chargés une fois
+    subscribed_ids = set()
+    if request.user.is_authenticated:
+        subscribed_ids = set(
+            Subscription.objects.filter(
+                subscriber=request.user,
+                trainer_id__in=[entry.trainer_id for entry in entries],
                 is_active=True
-            ).exists()
-        
-        # Compter le nombre d'abonnés et de cours
-        subscribers_count = trainer.subscribers.filter(is_active=True).count()
-        courses_count = Course.objects.filter(created_by=trainer).count()
-        
+            ).values_list('trainer_id', flat=True)
+        )
+    
+    results = []
+    for entry in entries:
+        trainer = entry.trainer
         results.append({
             'id': trainer.id,
             'username': trainer.username,
             'full_name': trainer.get_full_name(),
             'avatar': trainer.avatar.url if trainer.avatar else None,
-            'is_subscribed': is_subscribed,
-            'subscribers_count': subscribers_count,
-            'courses_count': courses_count
+            'is_subscribed': trainer.id in subscribed_ids,
+            'subscribers_count': trainer.subscribers_count,
+            'courses_count': entry.courses_count
         })
     
-    return JsonResponse({'trainers': results})
+    return JsonResponse({
+        'trainers': results,
+        'page': page.number,
+        'has_next': page.has_next(),
+    })
 
 # Les vues de gestion des abonnements ont été déplacées vers l'application 'subscriptions'